@@ -0,0 +1,106 @@
+"""
+Bytes on the wire per rerun of the Map page: the previous page, which inlined its marker payload into
+components.html on every run, against the page passing the url of the content-hashed marker asset (see
+support/assets.py). The page is run cold, rerun unchanged and rerun after a widget change, each page in its
+own process. Page bytes are the serialized size of every element the run sends; asset bytes are what the
+browser downloads from Streamlit's static file serving, gzip encoded as Tornado sends it, on the first run
+only since the browser revalidates its cached copy afterwards. Also reports the asset sizes for the marker
+payload of --synthetic N restaurants.
+
+    python -m benchmarks.bench_assets
+    python -m benchmarks.bench_assets --synthetic 30000
+"""
+import argparse
+import base64
+import gzip
+import json
+import os
+import tempfile
+from benchmarks.common import element_bytes, fixture, report, run_child
+
+PAGE_PATH = 'pages/2_🗺_Map.py'
+# The previous page, which inlined the marker payload
+PREVIOUS_PAGE = 'map_page_inline.py'
+
+
+def asset_bytes():
+    # Bytes of the current single-file assets, gzip encoded; history shards and tiles are directories the map
+    # fetches a file at a time as it is used, which a page run does not show
+    from support.assets import ASSETS_DIR, manifest_assets, read_asset_manifest
+    total = 0
+    for name in manifest_assets(read_asset_manifest()):
+        path = os.path.join(ASSETS_DIR, name)
+        if os.path.isfile(path):
+            with open(path, 'rb') as f:
+                total += len(gzip.compress(f.read()))
+    return total
+
+def rerun_bytes(page):
+    from streamlit.testing.v1 import AppTest
+
+    source = fixture(PREVIOUS_PAGE) if page == 'previous' else open(PAGE_PATH).read()
+    app = AppTest.from_string(source, default_timeout=600)
+    runs = []
+    for run in ('cold', 'rerun', 'widget_change'):
+        if run == 'widget_change':
+            next(radio for radio in app.radio if radio.label == 'Show the trend of a:').set_value('Restaurant')
+        app.run()
+        assert not app.exception, [e.value for e in app.exception]
+        page_bytes, map_bytes = element_bytes(app._tree)
+        downloaded = asset_bytes() if page == 'assets' and run == 'cold' else 0
+        runs.append({'run': run, 'page_bytes': page_bytes, 'map_element_bytes': map_bytes, 'asset_bytes': downloaded,
+                     'wire_bytes': page_bytes + downloaded})
+    return {'page': page, 'runs': runs}
+
+
+def payload_sizes(synthetic):
+    # Inlined base64 payload against the stored asset, raw and gzip encoded
+    from benchmarks.synthetic import make_inspections
+    from support.assets import write_map_assets
+    from support.data_cleaner import compact_map_data, format_map_data
+    from support.latest import build_latest_inspections
+    from support.markers import encode_marker_payload, marker_columns
+
+    data = compact_map_data(format_map_data(make_inspections(synthetic)))
+    latest = build_latest_inspections(data)
+    encoded = encode_marker_payload(*marker_columns(data, latest))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        manifest = write_map_assets(data, latest, temp_dir)
+        sizes = {}
+        # History shards and tiles are directories fetched a file at a time, sized as a whole
+        for name, asset in manifest.items():
+            if not isinstance(asset, str):
+                continue
+            path = os.path.join(temp_dir, asset)
+            files = [os.path.join(root, file) for root, _, names in os.walk(path) for file in names] if os.path.isdir(path) else [path]
+            raw = gzipped = 0
+            for file in files:
+                with open(file, 'rb') as f:
+                    data = f.read()
+                raw, gzipped = raw + len(data), gzipped + len(gzip.compress(data))
+            sizes[name] = {'raw': raw, 'gzip': gzipped}
+    return {'restaurants': synthetic, 'inline_base64_bytes': len(base64.b64encode(encoded)),
+            'inline_gzip_bytes': len(gzip.compress(base64.b64encode(encoded))), 'assets': sizes}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--synthetic', type=int, default=0, help="Also size the assets of N synthetic restaurants")
+    parser.add_argument('--out')
+    parser.add_argument('--child')
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(rerun_bytes(args.child)))
+        return
+
+    results = {page: run_child('benchmarks.bench_assets', '--child', page) for page in ('previous', 'assets')}
+    previous, current = (results[page]['runs'] for page in ('previous', 'assets'))
+    results['rerun_bytes_reduction'] = round(previous[1]['wire_bytes'] / current[1]['wire_bytes'], 1)
+    if args.synthetic:
+        results['synthetic'] = payload_sizes(args.synthetic)
+    report(results, args.out)
+
+
+if __name__ == '__main__':
+    main()
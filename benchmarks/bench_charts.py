@@ -0,0 +1,101 @@
+"""
+EDA charts drawn by matplotlib in every session (as the page did, under one lock since pyplot is not thread
+safe) against the chart cache, which draws them once per aggregates version in a background process.
+Time to first chart is measured in fresh processes: drawing inline, with the cache empty and with the charts
+stored. Then 1 to 16 concurrent sessions visit the page; every session must get the same images.
+
+    python -m benchmarks.bench_charts
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.bench_history import percentiles
+from benchmarks.common import report, run_child
+from support.charts import EDA_CHARTS, aggregates_version, iter_eda_charts, load_eda_charts, render_eda_charts
+from support.eda import read_eda_aggregates
+
+# What a correct page had to do around pyplot with concurrent sessions
+PYPLOT_LOCK = threading.Lock()
+
+
+def load_aggregates():
+    aggregates = read_eda_aggregates()
+    if aggregates is None:
+        from support.dataset import get_dataset, get_latest_inspections
+        from support.eda import build_eda_aggregates
+        aggregates = build_eda_aggregates(get_dataset(), get_latest_inspections())
+    return aggregates
+
+
+def first_chart(mode, charts_dir):
+    aggregates = load_aggregates()
+    start = time.perf_counter()
+    if mode == 'inline':
+        charts = iter_eda_charts(aggregates)
+        next(charts)
+        first = time.perf_counter() - start
+        list(charts)
+    else:
+        load_eda_charts(aggregates, aggregates_version(aggregates), charts_dir)
+        first = time.perf_counter() - start
+    return {'mode': mode, 'first_chart_seconds': round(first, 3), 'all_charts_seconds': round(time.perf_counter() - start, 3)}
+
+
+def visit_inline(aggregates):
+    with PYPLOT_LOCK:
+        return render_eda_charts(aggregates)
+
+def visit_cached(aggregates, charts_dir):
+    return load_eda_charts(aggregates, aggregates_version(aggregates), charts_dir)
+
+def sessions(visit, n, *args):
+    def session(_):
+        start = time.perf_counter()
+        images = visit(*args)
+        return images, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=n) as executor:
+        results = list(executor.map(session, range(n)))
+    wall = time.perf_counter() - start
+    assert all(images == results[0][0] for images, _ in results)
+    return results[0][0], {'wall_seconds': round(wall, 3), 'session': percentiles([seconds for _, seconds in results])}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 4, 8, 16])
+    parser.add_argument('--out')
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'CHARTS_DIR'))
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(first_chart(*args.child)))
+        return
+
+    aggregates = load_aggregates()
+    results = {'cpus': os.cpu_count()}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        charts_dir = os.path.join(temp_dir, 'charts')
+        # The cold run fills charts_dir for the stored one
+        results['first_chart'] = [run_child('benchmarks.bench_charts', '--child', mode, charts_dir) for mode in ('inline', 'cold', 'stored')]
+
+        results['sessions'] = {}
+        for n in args.sessions:
+            inline, results['sessions'][f"inline_{n}"] = sessions(visit_inline, n, aggregates)
+            # Sessions arriving together on an empty cache wait for a single render
+            load_eda_charts.clear()
+            for name in os.listdir(charts_dir):
+                os.rename(os.path.join(charts_dir, name), os.path.join(temp_dir, f"{name}.{n}"))
+            cached, results['sessions'][f"cached_cold_{n}"] = sessions(visit_cached, n, aggregates, charts_dir)
+            _, results['sessions'][f"cached_warm_{n}"] = sessions(visit_cached, n, aggregates, charts_dir)
+            assert inline == cached and list(cached) == list(EDA_CHARTS)
+    report(results, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Cluster summaries behind the pydeck maps of the Map and Cluster pages: the previous groupby + row by row
+coloring, called three times per rerun, against one vectorized pass over both clusterings and against
+a rerun served from the summaries cached per clustering result. Summaries are checked to be equal.
+
+    python -m benchmarks.bench_cluster_summary --synthetic 30000 --haversine-km 0.1 --min-samples 3
+"""
+import argparse
+import numpy as np
+import pandas as pd
+from benchmarks.common import report, timed
+from support.cluster import valid_inspection_rows
+from support.data_cleaner import compact_map_data, format_map_data, load_map_data
+from support.df_utils import get_column_size
+from support.latest import build_latest_inspections
+from support.maPy import CLUSTER_COLUMNS, cluster_summaries, color_map, get_color_group, summarize_clusters
+from support.spatial import add_neighbourhood_scores, neighbourhood_columns
+from support.sweep import sweep_clustering, sweep_fingerprint
+
+
+def groupby_cluster_map(df, cluster_col='euclidean_cluster', size_col='euclidean_cluster_size'):
+    # What format_cluster_map did before
+    area_cols = [col for col in neighbourhood_columns() if col in df.columns]
+    df = df[df[cluster_col] != -1].groupby(cluster_col).agg({
+        'latitude': 'median', 'longitude': 'median', 'score': 'mean', size_col: 'first', **{col: 'mean' for col in area_cols}
+    }).reset_index()
+    df = df.rename(columns={col: col.replace(' ', '_') for col in area_cols}).round({col.replace(' ', '_'): 1 for col in area_cols})
+    df['color_group'] = df['score'].apply(get_color_group)
+    df['color'] = df['color_group'].map(color_map)
+    return df
+
+def page_rerun(df):
+    # The selected method plus the two unused frames
+    return [groupby_cluster_map(df), groupby_cluster_map(df), groupby_cluster_map(df, 'haversine_cluster', 'haversine_cluster_size')]
+
+def cached_rerun(df):
+    # What a widget interaction costs the Cluster page now
+    return cluster_summaries(df, df['euclidean_cluster'].to_numpy(), df['haversine_cluster'].to_numpy(), sweep_fingerprint(df))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--file-path', default='data/data.zip')
+    parser.add_argument('--synthetic', type=int, default=0, help="Number of synthetic restaurants to generate instead")
+    parser.add_argument('--euclidean-km', type=float, default=0.5)
+    parser.add_argument('--haversine-km', type=float, default=0.03)
+    parser.add_argument('--min-samples', type=int, default=5)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--out')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from benchmarks.synthetic import make_inspections
+        data = compact_map_data(format_map_data(make_inspections(args.synthetic)))
+    else:
+        data = compact_map_data(load_map_data(args.file_path))
+    df = valid_inspection_rows(compact_map_data(add_neighbourhood_scores(build_latest_inspections(data))))
+
+    # The Cluster page defaults unless given
+    df['haversine_cluster'] = sweep_clustering(df, 'haversine', args.haversine_km, args.min_samples, None)[0]
+    df['euclidean_cluster'] = sweep_clustering(df, 'euclidean', args.euclidean_km, args.min_samples, 0.1)[0]
+    for cluster_col, size_col in CLUSTER_COLUMNS.items():
+        df[size_col] = get_column_size(df, cluster_col)
+
+    previous, groupby_seconds = timed(page_rerun, df, repeat=args.repeat)
+    summaries, summary_seconds = timed(summarize_clusters, df, repeat=args.repeat)
+    cached_rerun(df)
+    _, cached_seconds = timed(cached_rerun, df, repeat=args.repeat)
+    for expected, (cluster_col, size_col) in zip(previous[1:], CLUSTER_COLUMNS.items()):
+        pd.testing.assert_frame_equal(expected.astype({size_col: np.int64}), summaries[cluster_col], check_dtype=False, atol=1e-4)
+
+    report({'restaurants': len(df), 'clusters': {col: len(summary) for col, summary in summaries.items()},
+            'groupby_per_rerun_seconds': round(groupby_seconds, 4), 'vectorized_seconds': round(summary_seconds, 4),
+            'speedup': round(groupby_seconds / summary_seconds, 1), 'cached_rerun_seconds': round(cached_seconds, 4),
+            'cached_speedup': round(groupby_seconds / cached_seconds, 1)}, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+"""
+Sweep of 20 DBSCAN parameter combinations (5 eps x 4 min_samples) on the Cluster page features:
+a fresh sklearn fit per combination against one neighbourhood graph built at the largest eps and
+every combination derived from it. Labels are checked to be identical.
+
+    python -m benchmarks.bench_dbscan_graph --synthetic 30000
+"""
+import argparse
+import time
+import numpy as np
+from benchmarks.common import report, timed
+from support.cluster import cluster_features, fit_dbscan, km_to_rad, valid_inspection_rows
+from support.data_cleaner import compact_map_data, format_map_data, load_map_data
+from support.dbscan import DbscanGraph
+from support.latest import build_latest_inspections
+from support.spatial import add_neighbourhood_scores
+
+EPS_KM = (0.02, 0.03, 0.05, 0.1, 0.25)
+MIN_SAMPLES = (3, 5, 7, 10)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--file-path', default='data/data.zip')
+    parser.add_argument('--synthetic', type=int, default=0, help="Number of synthetic restaurants to generate instead")
+    parser.add_argument('--score-weight', type=float, default=0.1)
+    parser.add_argument('--out')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from benchmarks.synthetic import make_inspections
+        data = compact_map_data(format_map_data(make_inspections(args.synthetic)))
+    else:
+        data = compact_map_data(load_map_data(args.file_path))
+    df = valid_inspection_rows(compact_map_data(add_neighbourhood_scores(build_latest_inspections(data))))
+    features = cluster_features(df, args.score_weight)
+    combinations = [(km_to_rad(eps), samples) for eps in EPS_KM for samples in MIN_SAMPLES]
+
+    results = {'restaurants': len(df), 'combinations': len(combinations)}
+    for metric in ('haversine', 'euclidean'):
+        start = time.perf_counter()
+        refits = [fit_dbscan(features, eps, samples, metric) for eps, samples in combinations]
+        refit_seconds = time.perf_counter() - start
+
+        graph, graph_seconds = timed(DbscanGraph, features, km_to_rad(max(EPS_KM)), metric)
+        start = time.perf_counter()
+        derived = [graph.labels(eps, samples) for eps, samples in combinations]
+        derive_seconds = time.perf_counter() - start
+        assert all(np.array_equal(a, b) for a, b in zip(refits, derived))
+
+        results[metric] = {'refit_seconds': round(refit_seconds, 3), 'graph_build_seconds': round(graph_seconds, 3),
+                           'derive_seconds': round(derive_seconds, 3), 'graph_edges': len(graph.distances),
+                           'speedup': round(refit_seconds / (graph_seconds + derive_seconds), 1)}
+    report(results, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Render time and memory of the EDA page at a cold cache (first run in a fresh process) and a warm one
+(the next run), rendered from the aggregates stored at ingest time against the previous page, which
+loaded the inspection rows and recomputed every aggregate. Each page runs in its own process.
+
+    python -m benchmarks.bench_eda
+"""
+import argparse
+import json
+import os
+import time
+from benchmarks.common import current_rss_mb, peak_rss_mb, fixture, report, run_child, timed
+
+PAGE_PATH = 'pages/3_📊_EDA.py'
+# The previous page, which computed every aggregate itself
+PREVIOUS_PAGE = 'eda_page_recompute.py'
+
+
+def render(page, runs):
+    from streamlit.testing.v1 import AppTest
+
+    source = fixture(PREVIOUS_PAGE) if page == 'previous' else open(PAGE_PATH).read()
+    app = AppTest.from_string(source, default_timeout=600)
+    baseline = current_rss_mb()
+    seconds = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        app.run()
+        seconds.append(time.perf_counter() - start)
+        assert not app.exception, [e.value for e in app.exception]
+    return {'page': page, 'cold_seconds': round(seconds[0], 3), 'warm_seconds': round(min(seconds[1:]), 3),
+            'cold_rss_growth_mb': round(current_rss_mb() - baseline, 1), 'peak_rss_mb': round(peak_rss_mb(), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5, help="Page runs per process, the first one cold")
+    parser.add_argument('--out')
+    parser.add_argument('--child')
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(render(args.child, args.runs)))
+        return
+
+    from support.dataset import get_dataset, get_latest_inspections
+    from support.eda import EDA_PATH, build_eda_aggregates, read_eda_aggregates, write_eda_aggregates
+
+    # What the previous page computed from the rows, now done once at ingest
+    aggregates, build_seconds = timed(build_eda_aggregates, get_dataset(), get_latest_inspections())
+    if read_eda_aggregates() is None:
+        write_eda_aggregates(aggregates)
+        print(f"Wrote EDA aggregates to {EDA_PATH}")
+    _, read_seconds = timed(read_eda_aggregates)
+
+    results = {'aggregates_build_seconds': round(build_seconds, 3), 'aggregates_read_seconds': round(read_seconds, 4),
+               'aggregates_kb': round(os.path.getsize(EDA_PATH) / 1024, 1)}
+    results.update({page: run_child('benchmarks.bench_eda', '--child', page, '--runs', args.runs) for page in ('previous', 'aggregates')})
+    results['cold_speedup'] = round(results['previous']['cold_seconds'] / results['aggregates']['cold_seconds'], 1)
+    results['warm_speedup'] = round(results['previous']['warm_seconds'] / results['aggregates']['warm_seconds'], 1)
+    report(results, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Wall-clock ingest time of the concurrent page fetcher against the number of workers.
+The local Socrata stand-in adds a fixed latency per request and can fail every n-th request to exercise retries.
+
+    python -m benchmarks.bench_fetch --synthetic 3000 --latency 0.1 --workers 1 2 4 8
+"""
+import argparse
+import time
+from benchmarks.common import report
+from benchmarks.socrata_stub import SocrataStub, to_socrata_records
+from benchmarks.synthetic import make_inspections
+from support.fetcher import ColumnAccumulator, fetch_pages
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--synthetic', type=int, default=3000)
+    parser.add_argument('--page-size', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.1, help="Seconds added to every request")
+    parser.add_argument('--fail-every', type=int, default=0, help="Every n-th request returns a 503 (0 disables)")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--out')
+    args = parser.parse_args()
+
+    records = to_socrata_records(make_inspections(args.synthetic))
+    results = []
+    for workers in args.workers:
+        with SocrataStub(records, args.latency, args.fail_every) as stub:
+            start = time.perf_counter()
+            data, bytes_downloaded = fetch_pages(stub.url, page_size=args.page_size, max_workers=workers)
+            seconds = time.perf_counter() - start
+            results.append({'workers': workers, 'rows': len(data), 'bytes_downloaded': bytes_downloaded,
+                            'requests': stub.requests, 'seconds': round(seconds, 3)})
+    for result in results:
+        result['speedup'] = round(results[0]['seconds'] / result['seconds'], 2)
+
+    # Resume: a pull without retries stops at the first failure, the second call only fetches the missing pages
+    accumulator = ColumnAccumulator()
+    with SocrataStub(records, args.latency, fail_every=5) as stub:
+        try:
+            fetch_pages(stub.url, page_size=args.page_size, max_workers=4, accumulator=accumulator, retries=1)
+        except Exception:
+            pass
+        pages_before = len(accumulator.pages)
+        stub.fail_every = 0
+        data, _ = fetch_pages(stub.url, page_size=args.page_size, max_workers=4, accumulator=accumulator)
+    resume = {'pages_kept_after_failure': pages_before, 'pages_total': len(accumulator.pages), 'rows': len(data)}
+
+    report({'scaling': results, 'resume': resume}, args.out)
+
+
+if __name__ == '__main__':
+    main()
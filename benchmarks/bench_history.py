@@ -0,0 +1,103 @@
+"""
+Map payload with inspection history embedded up front against the lazy layout, where popups fetch the
+static history shard holding their restaurant (see support/history.py). Reports payload bytes, shard sizes,
+time to interactive and popup latency (node harness, if node is on the PATH) and history lookup latency at
+p50 / p99, in process and reading and parsing a shard as the browser would.
+
+    python -m benchmarks.bench_history                 # uses data/data.zip
+    python -m benchmarks.bench_history --synthetic 30000
+"""
+import argparse
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from benchmarks.bench_map_payload import browser_timings
+from benchmarks.common import ROOT, fixture, report, timed
+from support.assets import write_map_assets
+from support.history import HistoryIndex
+from support.latest import build_latest_inspections
+from support.markers import build_marker_payload
+
+
+def embedded_payload(payload, index):
+    # The previous layout: every restaurant carries its full history, violations through a string table
+    restaurants = []
+    for record, start, end in zip(payload['restaurants'], index.bounds[:-1], index.bounds[1:]):
+        history = [[index.dates[j], int(index.scores[j]),
+                    index.violation_codes[index.violation_bounds[j]:index.violation_bounds[j + 1]].tolist()]
+                   for j in range(start, end)]
+        restaurants.append(record[:6] + [history])
+    return {'names': payload['names'], 'violations': index.violations, 'restaurants': restaurants}
+
+
+def percentiles(seconds):
+    return {'p50_ms': round(float(np.percentile(seconds, 50)) * 1000, 3),
+            'p99_ms': round(float(np.percentile(seconds, 99)) * 1000, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--file-path', default='data/data.zip')
+    parser.add_argument('--synthetic', type=int, default=0, help="Number of synthetic restaurants to generate instead")
+    parser.add_argument('--lookups', type=int, default=2000)
+    parser.add_argument('--out')
+    args = parser.parse_args()
+
+    from support.data_cleaner import compact_map_data, format_map_data, load_map_data
+    if args.synthetic:
+        from benchmarks.synthetic import make_inspections
+        data = compact_map_data(format_map_data(make_inspections(args.synthetic)))
+    else:
+        data = compact_map_data(load_map_data(args.file_path))
+
+    latest = build_latest_inspections(data)
+    payload = build_marker_payload(data, latest)
+    index, index_seconds = timed(HistoryIndex, data)
+    lazy = json.dumps(payload, separators=(',', ':'))
+    embedded = json.dumps(embedded_payload(payload, index), separators=(',', ':'))
+    results = {name: {'bytes': len(text.encode()), 'gzip_bytes': len(gzip.compress(text.encode()))}
+               for name, text in (('embedded', embedded), ('lazy', lazy))}
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        assets_dir = os.path.join(temp_dir, 'map')
+        manifest, write_seconds = timed(write_map_assets, data, latest, assets_dir)
+        history_dir = os.path.join(assets_dir, manifest['history'])
+        shard_bytes = [os.path.getsize(os.path.join(history_dir, name)) for name in os.listdir(history_dir)]
+
+        # Lookups for random restaurants, in process and from their shard
+        camis = np.random.default_rng(0).choice(index.camis, args.lookups)
+        in_process, from_shard = [], []
+        for c in camis:
+            start = time.perf_counter()
+            index.lookup(c)
+            in_process.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            with open(os.path.join(history_dir, f"{c % manifest['history_shards']}.json"), 'rb') as f:
+                shard = json.loads(f.read())
+            [[date, score, [shard['violations'][code] for code in codes]] for date, score, codes in shard['restaurants'][str(c)]]
+            from_shard.append(time.perf_counter() - start)
+
+        if shutil.which('node'):
+            # Popups open on the markers of the tiles in view, read from the static tiles
+            embedded_template = fixture('map_embedded_history.html')
+            with open(os.path.join(ROOT, 'templates', 'test.html'), encoding='utf-8') as f:
+                lazy_template = f.read()
+            results['embedded'].update(browser_timings(embedded_template, embedded, temp_dir, 'embedded'))
+            results['lazy'].update(browser_timings(lazy_template, lazy, temp_dir, 'lazy', assets_dir))
+        else:
+            print("node not found, skipping time to interactive.")
+
+    report({'inspections': len(data), 'restaurants': len(index), 'index_build_seconds': round(index_seconds, 3),
+            'assets_write_seconds': round(write_seconds, 3), **results,
+            'bytes_reduction': round(results['embedded']['bytes'] / results['lazy']['bytes'], 1),
+            'history_shards': manifest['history_shards'], 'mean_shard_bytes': round(float(np.mean(shard_bytes))),
+            'max_shard_bytes': max(shard_bytes), 'lookup_in_process': percentiles(in_process),
+            'lookup_from_shard': percentiles(from_shard)}, args.out)
+
+
+if __name__ == '__main__':
+    main()
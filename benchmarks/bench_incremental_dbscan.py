@@ -0,0 +1,89 @@
+"""
+Daily update of the Cluster page's DBSCAN labels (haversine 0.03 km and euclidean 0.5 km with score weight 0.1,
+min_samples 5) from the restaurants changed by each day's inspections, against a full refit. The last days of
+the snapshot are replayed one at a time on top of the rows before them, with some restaurants closed each day.
+Labels are checked to be identical to the refit every day.
+
+    python -m benchmarks.bench_incremental_dbscan --synthetic 30000 --days 30
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from benchmarks.bench_history import percentiles
+from benchmarks.common import report, timed
+from support.cluster import cluster_features, fit_dbscan, km_to_rad, valid_inspection_rows
+from support.data_cleaner import compact_map_data, format_map_data, is_inspected, load_map_data
+from support.incremental import IncrementalDbscan, valid_rows_delta
+from support.latest import build_latest_inspections, refresh_latest_inspections
+from support.spatial import neighbourhood_columns
+
+CONFIGS = {'haversine': (0.03, 5, 0), 'euclidean': (0.5, 5, 0.1)}
+
+
+def valid_rows(latest, closed):
+    # Area scores do not take part in the clustering
+    latest = latest[~latest['camis'].isin(closed)].assign(**{column: np.nan for column in neighbourhood_columns()})
+    return valid_inspection_rows(latest)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--file-path', default='data/data.zip')
+    parser.add_argument('--synthetic', type=int, default=0, help="Number of synthetic restaurants to generate instead")
+    parser.add_argument('--days', type=int, default=30, help="Days of inspections replayed")
+    parser.add_argument('--closures', type=int, default=5, help="Restaurants closed each day")
+    parser.add_argument('--out')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from benchmarks.synthetic import make_inspections
+        data = compact_map_data(format_map_data(make_inspections(args.synthetic)))
+    else:
+        data = compact_map_data(load_map_data(args.file_path))
+    dates = data['inspection date']
+    days = np.sort(dates[is_inspected(dates)].unique())[-args.days:]
+
+    rng = np.random.default_rng(0)
+    latest, closed = build_latest_inspections(data[dates < days[0]]), set()
+    df = valid_rows(latest, closed)
+    states = {metric: timed(IncrementalDbscan, df, km_to_rad(eps_km), min_samples, metric, score_weight)
+              for metric, (eps_km, min_samples, score_weight) in CONFIGS.items()}
+    results = {'restaurants': len(df), 'days': len(days),
+               'initial_build_seconds': {metric: round(seconds, 3) for metric, (_, seconds) in states.items()}}
+    timings = {metric: {'update': [], 'refit': [], 'recomputed': []} for metric in CONFIGS}
+    changed_per_day = []
+
+    for day in days:
+        latest = refresh_latest_inspections(latest, data[dates == day])
+        closed.update(rng.choice(df['camis'].to_numpy(), args.closures, replace=False).tolist())
+        new = valid_rows(latest, closed)
+        changed, gone = valid_rows_delta(df, new)
+        changed_per_day.append(len(changed) + len(gone))
+
+        for metric, (eps_km, min_samples, score_weight) in CONFIGS.items():
+            state = states[metric][0]
+            start = time.perf_counter()
+            recomputed = state.update(changed, gone)
+            labels, sizes = state.clustering(new)
+            timings[metric]['update'].append(time.perf_counter() - start)
+            timings[metric]['recomputed'].append(recomputed)
+
+            start = time.perf_counter()
+            expected = fit_dbscan(cluster_features(new, score_weight), km_to_rad(eps_km), min_samples, metric)
+            timings[metric]['refit'].append(time.perf_counter() - start)
+            assert np.array_equal(labels, expected)
+            pd.testing.assert_series_equal(sizes, pd.Series(expected).value_counts().sort_index())
+        df = new
+
+    results['changed_per_day'] = round(float(np.mean(changed_per_day)), 1)
+    for metric, timing in timings.items():
+        update, refit = np.median(timing['update']), np.median(timing['refit'])
+        results[metric] = {'update': percentiles(timing['update']), 'refit': percentiles(timing['refit']),
+                           'speedup_p50': round(refit / update, 1), 'rebuilds': states[metric][0].rebuilds,
+                           'recomputed_per_day': round(float(np.mean(timing['recomputed'])), 1)}
+    report(results, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+Peak RSS and time of pd.read_json on the extracted zip against streaming ingestion from the zip member.
+
+    python -m benchmarks.bench_ingest                   # uses data/data.zip
+    python -m benchmarks.bench_ingest --synthetic 30000 --chunk-size 50000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from benchmarks.common import peak_rss_mb, report, run_child
+
+
+def load_once(mode, file_path, chunk_size):
+    from support.data_cleaner import read_map_data
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    data = read_map_data(file_path, snapshot_path=None, chunk_size=int(chunk_size) if mode == 'stream' else None)
+    seconds = time.perf_counter() - start
+    frame_mb = data.memory_usage(deep=True).sum() / 1024 ** 2
+    return {'mode': mode, 'rows': len(data), 'seconds': round(seconds, 3), 'frame_mb': round(frame_mb, 1),
+            'peak_rss_mb': round(peak_rss_mb(), 1), 'peak_over_import_mb': round(peak_rss_mb() - baseline, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--file-path', default='data/data.zip')
+    parser.add_argument('--synthetic', type=int, default=0, help="Number of synthetic restaurants to generate instead")
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--out')
+    parser.add_argument('--child', nargs=3, metavar=('MODE', 'FILE_PATH', 'CHUNK_SIZE'))
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(load_once(*args.child)))
+        return
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = args.file_path
+        if args.synthetic:
+            from benchmarks.synthetic import make_inspections, write_zip
+            file_path = write_zip(make_inspections(args.synthetic), os.path.join(temp_dir, 'data.zip'))
+        results = [run_child('benchmarks.bench_ingest', '--child', mode, file_path, args.chunk_size)
+                   for mode in ('read_json', 'stream')]
+    report(results, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Cost of building the latest-inspection-per-restaurant table: the previous sort + drop_duplicates,
+the groupby-argmax rebuild and an incremental refresh with one day of new inspections.
+
+    python -m benchmarks.bench_latest --synthetic 30000
+"""
+import argparse
+import pandas as pd
+from benchmarks.common import report, timed
+from benchmarks.synthetic import make_inspections
+from support.data_cleaner import compact_map_data, format_map_data
+from support.latest import build_latest_inspections, refresh_latest_inspections
+
+
+def sort_latest(data):
+    # What the pages did before the latest table existed
+    return data.sort_values(by=['camis', 'inspection date'], ascending=[True, False]).drop_duplicates(subset='camis', keep='first')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--synthetic', type=int, default=30000)
+    parser.add_argument('--new-inspections', type=int, default=300)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--out')
+    args = parser.parse_args()
+
+    data = compact_map_data(format_map_data(make_inspections(args.synthetic)))
+    new_rows = data.sample(args.new_inspections, random_state=1).assign(**{'inspection date': pd.Timestamp('2025-04-01')})
+
+    expected, sort_seconds = timed(sort_latest, data, repeat=args.repeat)
+    latest, build_seconds = timed(build_latest_inspections, data, repeat=args.repeat)
+    refreshed, refresh_seconds = timed(refresh_latest_inspections, latest, new_rows, repeat=args.repeat)
+    rebuilt, rebuild_seconds = timed(build_latest_inspections, pd.concat([new_rows, data], ignore_index=True), repeat=args.repeat)
+
+    # Same rows as the sort based approach
+    pd.testing.assert_frame_equal(expected.sort_values('camis').reset_index(drop=True),
+                                  latest.sort_values('camis').reset_index(drop=True))
+    # The refresh only looks at the restaurants with new rows, and ends up where a rebuild over all rows does
+    pd.testing.assert_frame_equal(rebuilt.sort_values('camis').reset_index(drop=True),
+                                  refreshed.sort_values('camis').reset_index(drop=True))
+
+    report({'rows': len(data), 'restaurants': len(latest),
+            'sort_drop_duplicates_seconds': round(sort_seconds, 4),
+            'groupby_argmax_seconds': round(build_seconds, 4),
+            'incremental_refresh_seconds': round(refresh_seconds, 4),
+            'rebuild_with_new_rows_seconds': round(rebuild_seconds, 4),
+            'speedup': round(sort_seconds / build_seconds, 1)}, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Payload bytes and time to interactive of the Leaflet map: one row per inspection (the previous template)
+against the per-restaurant payload from support/markers.py. Browser-side timings need node on the PATH.
+
+    python -m benchmarks.bench_map_payload                 # uses data/data.zip
+    python -m benchmarks.bench_map_payload --synthetic 30000
+"""
+import argparse
+import gzip
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import pandas as pd
+from benchmarks.common import ROOT, fixture, report, timed
+from support.data_cleaner import is_inspected
+from support.markers import build_marker_payload
+from support.latest import build_latest_inspections
+
+HARNESS = os.path.join(ROOT, 'benchmarks', 'map_harness.js')
+
+
+def serializable_list(df, date_cols, sort_cols, fill_na_cols):
+    # The removed map_dataframe_to_serializable_list: cleaned on a copy, then boxed by df.values.tolist()
+    if 'inspection date' in df.columns:
+        df = df[is_inspected(df['inspection date'])]
+    df = df.sort_values(by=sort_cols, ascending=False)
+    df[date_cols] = df[date_cols].astype(str)
+    for col, fill in fill_na_cols.items():
+        if isinstance(df[col].dtype, pd.CategoricalDtype) and fill not in df[col].cat.categories:
+            df[col] = df[col].cat.add_categories([fill])
+        df[col] = df[col].fillna(fill)
+    return df.values.tolist()
+
+def row_payload(data):
+    # What the Map page shipped before the marker payload existed
+    has_location = (data['latitude'] != 0) & (data['longitude'] != 0) & data['latitude'].notna() & data['longitude'].notna()
+    map_data = data.loc[has_location, ['latitude', 'longitude', 'dba', 'inspection date', 'violation description', 'score']]
+    return json.dumps(serializable_list(map_data, date_cols=['inspection date'], sort_cols=['inspection date'],
+                                        fill_na_cols={'violation description': 'No violations recorded.', 'score': 0}))
+
+
+def marker_payload(data):
+    return json.dumps(build_marker_payload(data, build_latest_inspections(data)), separators=(',', ':'))
+
+
+def browser_timings(template, payload, temp_dir, name, assets_dir=None):
+    """
+    Runs the template's script against the payload in the node harness, with the map assets written
+    to assets_dir (see support/assets.py).
+    """
+    template_path, payload_path = os.path.join(temp_dir, f'{name}.html'), os.path.join(temp_dir, f'{name}.json')
+    with open(template_path, 'w', encoding='utf-8') as f:
+        f.write(template)
+    with open(payload_path, 'w', encoding='utf-8') as f:
+        f.write(payload)
+    command = ['node', HARNESS, template_path, payload_path, '1000', assets_dir or '']
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode:
+        raise RuntimeError(f"map harness failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--file-path', default='data/data.zip')
+    parser.add_argument('--synthetic', type=int, default=0, help="Number of synthetic restaurants to generate instead")
+    parser.add_argument('--out')
+    args = parser.parse_args()
+
+    from support.data_cleaner import compact_map_data, format_map_data, load_map_data
+    if args.synthetic:
+        from benchmarks.synthetic import make_inspections
+        data = compact_map_data(format_map_data(make_inspections(args.synthetic)))
+    else:
+        data = compact_map_data(load_map_data(args.file_path))
+
+    rows, row_seconds = timed(row_payload, data)
+    markers, marker_seconds = timed(marker_payload, data)
+    results = {}
+    for name, payload, seconds in (('rows', rows, row_seconds), ('restaurants', markers, marker_seconds)):
+        results[name] = {'build_seconds': round(seconds, 3), 'bytes': len(payload.encode()),
+                         'gzip_bytes': len(gzip.compress(payload.encode()))}
+
+    if shutil.which('node'):
+        old_template = fixture('map_rows.html')
+        with open(os.path.join(ROOT, 'templates', 'test.html'), encoding='utf-8') as f:
+            new_template = f.read()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            results['rows'].update(browser_timings(old_template, rows, temp_dir, 'rows'))
+            results['restaurants'].update(browser_timings(new_template, markers, temp_dir, 'restaurants'))
+    else:
+        print("node not found, skipping time to interactive.")
+
+    results['bytes_reduction'] = round(results['rows']['bytes'] / results['restaurants']['bytes'], 1)
+    report({'inspections': len(data), **results}, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+"""
+Per-column memory of the inspections frame before and after compact_map_data.
+
+    python -m benchmarks.bench_memory                   # uses data/data.zip (or the snapshot if built)
+    python -m benchmarks.bench_memory --synthetic 30000
+"""
+import argparse
+import time
+from benchmarks.common import report
+from support.data_cleaner import compact_map_data, format_map_data, memory_report
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--file-path', default='data/data.zip')
+    parser.add_argument('--synthetic', type=int, default=0, help="Number of synthetic restaurants to generate instead")
+    parser.add_argument('--out')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from benchmarks.synthetic import make_inspections
+        data = format_map_data(make_inspections(args.synthetic))
+    else:
+        from support.data_cleaner import load_map_data
+        data = load_map_data(args.file_path)
+
+    start = time.perf_counter()
+    compact = compact_map_data(data)
+    seconds = time.perf_counter() - start
+
+    table = memory_report(data, compact)
+    print(table.to_string())
+    report({'rows': len(data), 'compact_seconds': round(seconds, 3),
+            'columns': table.reset_index(names='column').to_dict(orient='records')}, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Full city recompute of the area scores (distance weighted neighbour scores within 250 m, 500 m and 1 km)
+over the spatial index, against a per-restaurant pairwise scan timed on a sample and scaled up.
+Results are checked against that scan.
+
+    python -m benchmarks.bench_neighbourhood --synthetic 30000 300000
+"""
+import argparse
+import time
+import numpy as np
+from benchmarks.bench_spatial import haversine_m
+from benchmarks.common import report, timed
+from benchmarks.synthetic import make_inspections
+from support.data_cleaner import compact_map_data, format_map_data, load_map_data
+from support.latest import build_latest_inspections
+from support.spatial import NEIGHBOURHOOD_RADII, SpatialIndex, add_neighbourhood_scores, neighbourhood_columns
+
+
+def pairwise_scores(index, i, radii=NEIGHBOURHOOD_RADII):
+    # One restaurant against every other one
+    distances = haversine_m(index, index.latitude[i], index.longitude[i])
+    distances[i] = np.inf
+    scores = []
+    for radius in sorted(radii):
+        near = distances <= radius
+        weights = 1 - distances[near] / radius
+        scores.append((weights * index.scores[near]).sum() / weights.sum() if weights.sum() > 0 else np.nan)
+    return scores
+
+
+def run(latest, sample):
+    index, build_seconds = timed(SpatialIndex.from_latest, latest)
+    scores, seconds = timed(index.neighbourhood_scores)
+    _, add_seconds = timed(add_neighbourhood_scores, latest, index)
+
+    picks = np.random.default_rng(0).choice(len(index), min(sample, len(index)), replace=False)
+    start = time.perf_counter()
+    expected = np.array([pairwise_scores(index, i) for i in picks])
+    pairwise_seconds = (time.perf_counter() - start) / len(picks) * len(index)
+    got = scores[neighbourhood_columns()].to_numpy()[picks]
+    assert np.allclose(got, expected, rtol=1e-4, equal_nan=True)
+
+    return {'restaurants': len(index), 'index_build_seconds': round(build_seconds, 3),
+            'recompute_seconds': round(seconds, 3), 'add_to_latest_seconds': round(add_seconds, 3),
+            'pairwise_seconds_estimated': round(pairwise_seconds, 1),
+            'speedup': round(pairwise_seconds / seconds, 1),
+            'with_neighbours': {column: round(float(scores[column].notna().mean()), 3) for column in neighbourhood_columns()}}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--file-path', default='data/data.zip')
+    parser.add_argument('--synthetic', type=int, nargs='*', default=[], help="Numbers of synthetic restaurants to generate instead")
+    parser.add_argument('--inspections', type=int, default=3, help="Inspections per synthetic restaurant")
+    parser.add_argument('--sample', type=int, default=200, help="Restaurants checked against the pairwise scan")
+    parser.add_argument('--out')
+    args = parser.parse_args()
+
+    results = {}
+    if args.synthetic:
+        for n in args.synthetic:
+            data = compact_map_data(format_map_data(make_inspections(n, inspections_per_restaurant=args.inspections)))
+            results[n] = run(build_latest_inspections(data), args.sample)
+            del data
+    else:
+        results[args.file_path] = run(build_latest_inspections(compact_map_data(load_map_data(args.file_path))), args.sample)
+    report(results, args.out)
+
+
+if __name__ == '__main__':
+    main()
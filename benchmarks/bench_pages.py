@@ -0,0 +1,170 @@
+"""
+Every page of the app run headlessly with Streamlit's AppTest against a fixed synthetic dataset, built into
+a scratch directory by build_data.py. Each page runs in its own process from that directory: a cold run,
+then --runs warm reruns, recording wall time, peak RSS and the bytes of the elements the run sends (see
+common.element_bytes). Widget interactions are then replayed one after the other, each timed as the rerun it
+triggers: the Euclidean / Haversine radio, the colour multiselect and the size checkbox of the cluster maps,
+the Cluster page's min_samples slider, the Map page's trend radio and the EDA page's rolling window and zip code.
+The Map page's cluster layer is replayed with the clusters of a Cluster page run, as a session would hold them.
+
+Results carry the commit they were measured at; pass --baseline with the JSON of an earlier run to print
+the ratio of every timing and size to it.
+
+    python -m benchmarks.bench_pages --out pages.json
+    python -m benchmarks.bench_pages --baseline pages.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import time
+from benchmarks.common import ROOT, current_rss_mb, element_bytes, peak_rss_mb, report, run_child
+
+PAGES = ('🏠_Home.py', 'pages/2_🗺_Map.py', 'pages/3_📊_EDA.py', 'pages/4_📦_Cluster.py')
+# Read by the pages relative to the working directory, alongside data/
+PAGE_RESOURCES = ('style', 'templates')
+CLUSTER_PAGE = 'pages/4_📦_Cluster.py'
+# Share of the synthetic restaurants bunched into blocks
+BUNCHED = 0.5
+
+
+def widget(app, kind, label):
+    return next(element for element in getattr(app, kind) if element.label == label)
+
+def cluster_replays(app):
+    # Widgets under the pydeck cluster map, shared by the Map and Cluster pages
+    return [
+        ('haversine_radio', lambda: widget(app, 'radio', 'Choose a Method:').set_value('Haversine')),
+        ('colour_multiselect', lambda: widget(app, 'multiselect', 'Select score levels to display').set_value(['yellow', 'red'])),
+        ('size_checkbox', lambda: widget(app, 'checkbox', 'Increase cluster size').check()),
+        ('euclidean_radio', lambda: widget(app, 'radio', 'Choose a Method:').set_value('Euclidean')),
+    ]
+
+def clustered_session():
+    # Clusters the Cluster page leaves in the session for the Map page
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(ROOT, CLUSTER_PAGE), default_timeout=600)
+    app.run()
+    return {key: app.session_state[key] for key in ('DBSCAN_df', 'DBSCAN_summaries')}
+
+def replays(page, app):
+    """
+    Widget interactions replayed on a page, in order, as (name, action) pairs; an action changes the
+    widgets or session of the app before the rerun that is timed.
+    """
+    if page == 'pages/2_🗺_Map.py':
+        def cluster_layer():
+            for key, value in clustered_session().items():
+                app.session_state[key] = value
+        return [('trend_radio', lambda: widget(app, 'radio', 'Show the trend of a:').set_value('Restaurant')),
+                ('cluster_layer', cluster_layer), *cluster_replays(app)]
+    if page == 'pages/3_📊_EDA.py':
+        return [('rolling_window_slider', lambda: widget(app, 'slider', 'Rolling window (months)').set_value(3)),
+                ('zip_code_selectbox', lambda: (lambda box: box.set_value(box.options[-1]))(widget(app, 'selectbox', 'Zip code')))]
+    if page == CLUSTER_PAGE:
+        from support.sweep import SWEEP_MIN_SAMPLES
+        return [*cluster_replays(app),
+                ('min_samples_slider', lambda: widget(app, 'select_slider', 'min_samples').set_value(SWEEP_MIN_SAMPLES[-1]))]
+    return []
+
+def run_page(page, workdir, runs):
+    """
+    Cold run, warm reruns and widget replays of a page, from the directory holding its data.
+    """
+    os.chdir(workdir)
+    from streamlit.testing.v1 import AppTest
+
+    def timed_run(app):
+        start = time.perf_counter()
+        app.run()
+        seconds = time.perf_counter() - start
+        assert not app.exception, [e.value for e in app.exception]
+        total, frames = element_bytes(app._tree)
+        return {'seconds': round(seconds, 3), 'payload_bytes': total, 'component_bytes': frames}
+
+    app = AppTest.from_file(os.path.join(ROOT, page), default_timeout=600)
+    baseline = current_rss_mb()
+    cold = timed_run(app)
+    warm = [timed_run(app) for _ in range(runs)]
+    result = {'page': page, 'cold_seconds': cold['seconds'], 'warm_seconds': min(run['seconds'] for run in warm),
+              'payload_bytes': cold['payload_bytes'], 'component_bytes': cold['component_bytes'],
+              'cold_rss_growth_mb': round(current_rss_mb() - baseline, 1), 'peak_rss_mb': round(peak_rss_mb(), 1)}
+    result['replays'] = []
+    for name, action in replays(page, app):
+        action()
+        result['replays'].append({'replay': name, **timed_run(app)})
+    return result
+
+
+def build_workdir(workdir, synthetic, dbscan_sweep):
+    # The pages' data/ built from the synthetic dataset, with the files they read next to it; half the
+    # restaurants are bunched so the cluster maps have clusters to draw
+    from benchmarks.synthetic import make_inspections, write_zip
+    from build_data import build_data
+    from support.derived import DerivedPaths
+
+    data_dir = os.path.join(workdir, 'data')
+    os.makedirs(data_dir)
+    file_path = write_zip(make_inspections(synthetic, bunched=BUNCHED), os.path.join(data_dir, 'data.zip'))
+    build_data(file_path, os.path.join(data_dir, 'data.parquet'),
+               paths=DerivedPaths.under(data_dir, os.path.join(workdir, 'static', 'map'), sweep=dbscan_sweep))
+    for resource in PAGE_RESOURCES:
+        os.symlink(os.path.join(ROOT, resource), os.path.join(workdir, resource))
+
+def compare(results, baseline):
+    """
+    Ratio of every timing and size of the results to the baseline's, per page and replay.
+    """
+    metrics = ('cold_seconds', 'warm_seconds', 'payload_bytes', 'peak_rss_mb')
+    previous = {page['page']: page for page in baseline['pages']}
+    ratios = {}
+    for page in results['pages']:
+        before = previous.get(page['page'])
+        if not before:
+            continue
+        ratios[page['page']] = {metric: round(page[metric] / before[metric], 2) for metric in metrics if before.get(metric)}
+        replayed = {replay['replay']: replay for replay in before.get('replays', [])}
+        for replay in page['replays']:
+            if replayed.get(replay['replay'], {}).get('seconds'):
+                ratios[page['page']][f"{replay['replay']}_seconds"] = round(replay['seconds'] / replayed[replay['replay']]['seconds'], 2)
+    return ratios
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--synthetic', type=int, default=3000, help="Synthetic restaurants of the fixed dataset")
+    parser.add_argument('--runs', type=int, default=3, help="Warm reruns per page after the cold run")
+    parser.add_argument('--pages', nargs='+', default=PAGES)
+    parser.add_argument('--dbscan-sweep', action='store_true', help="Precompute the Cluster page's DBSCAN sweep")
+    parser.add_argument('--baseline', help="JSON of an earlier run to compare against")
+    parser.add_argument('--out')
+    parser.add_argument('--child', nargs=2, metavar=('PAGE', 'WORKDIR'))
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_page(*args.child, args.runs)))
+        return
+
+    # Labels the run with its commit, left empty outside a git checkout
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ''
+    with tempfile.TemporaryDirectory() as workdir:
+        start = time.perf_counter()
+        build_workdir(workdir, args.synthetic, args.dbscan_sweep)
+        build_seconds = time.perf_counter() - start
+        pages = [run_child('benchmarks.bench_pages', '--child', page, workdir, '--runs', args.runs) for page in args.pages]
+
+    results = {'commit': commit, 'synthetic': args.synthetic, 'dbscan_sweep': args.dbscan_sweep,
+               'build_seconds': round(build_seconds, 1), 'pages': pages}
+    if args.baseline:
+        with open(args.baseline) as f:
+            results['baseline_ratios'] = compare(results, json.load(f))
+    report(results, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""
+Scaling of the partitioned DBSCAN (spatial tiles clustered by a process pool, border clusters merged)
+over 1, 2, 4 and 8 workers and growing numbers of synthetic points, against a single sklearn fit.
+Labels are checked to be identical. Speedups are bounded by the cores available (reported as cpus).
+
+    python -m benchmarks.bench_partitioned_dbscan --sizes 100000 1000000 5000000
+"""
+import argparse
+import os
+import numpy as np
+from benchmarks.common import peak_rss_mb, report, timed
+from benchmarks.synthetic import make_points
+from support.cluster import cluster_features, fit_dbscan, km_to_rad
+from support.dbscan import partitioned_dbscan
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000, 5000000])
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--metric', default='haversine', choices=['haversine', 'euclidean'])
+    parser.add_argument('--eps-km', type=float, default=0.03, help="The Cluster page default for haversine")
+    parser.add_argument('--min-samples', type=int, default=5)
+    parser.add_argument('--out')
+    args = parser.parse_args()
+
+    eps = km_to_rad(args.eps_km)
+    results = {'cpus': os.cpu_count(), 'metric': args.metric, 'eps_km': args.eps_km, 'min_samples': args.min_samples}
+    for size in args.sizes:
+        features = cluster_features(make_points(size))
+        single, single_seconds = timed(fit_dbscan, features, eps, args.min_samples, args.metric)
+        run = {'single_seconds': round(single_seconds, 2), 'clusters': int(single.max()) + 1}
+        for workers in args.workers:
+            labels, seconds = timed(partitioned_dbscan, features, eps, args.min_samples, args.metric, workers)
+            assert np.array_equal(labels, single)
+            run[f"workers_{workers}"] = {'seconds': round(seconds, 2), 'speedup': round(single_seconds / seconds, 2)}
+        results[size] = run
+        del features, single
+    results['peak_rss_mb'] = round(peak_rss_mb())
+    report(results, args.out)
+
+
+if __name__ == '__main__':
+    main()
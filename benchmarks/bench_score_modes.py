@@ -0,0 +1,87 @@
+"""
+Score modes of the map (see support/scores.py): Python time to band and weigh every restaurant's average
+and latest score, one get_color_group call per restaurant and mode as before against the vectorized pass of
+score_modes, and the tile build that now carries both modes. With node on the PATH, the previous template,
+which rebuilt every layer in view when the score mode radio flipped, is timed against the one swapping
+icons and heat points in the harness, in the initial view and at street level (median of --repeat runs).
+
+    python -m benchmarks.bench_score_modes                 # uses data/data.zip
+    python -m benchmarks.bench_score_modes --synthetic 30000
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import numpy as np
+from benchmarks.bench_map_payload import browser_timings
+from benchmarks.common import ROOT, fixture, report, timed
+from support.assets import write_map_assets
+from support.latest import build_latest_inspections
+from support.maPy import get_color_group
+from support.markers import build_marker_payload, marker_columns, marker_payload_script
+from support.scores import COLOR_GROUPS, score_modes
+from support.tiles import build_tiles, restaurant_frame
+
+SWITCH_KEYS = ('switch_to_latest_ms', 'switch_to_average_ms', 'zoomed_switch_ms', 'time_to_interactive_ms')
+
+
+def previous_score_modes(average, latest):
+    # Color groups one restaurant at a time, intensities as build_tiles computed them
+    return {'color': [[get_color_group(score) for score in scores] for scores in (average, latest)],
+            'intensity': [np.clip(np.asarray(scores) / 50, 0, 1) for scores in (average, latest)]}
+
+def median_timings(template, payload, temp_dir, name, assets_dir, repeat):
+    runs = [browser_timings(template, payload, temp_dir, name, assets_dir) for _ in range(repeat)]
+    return {key: float(np.median([run[key] for run in runs])) for key in SWITCH_KEYS}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--file-path', default='data/data.zip')
+    parser.add_argument('--synthetic', type=int, default=0, help="Number of synthetic restaurants to generate instead")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--out')
+    args = parser.parse_args()
+
+    from support.data_cleaner import compact_map_data, format_map_data, load_map_data
+    if args.synthetic:
+        from benchmarks.synthetic import make_inspections
+        data = compact_map_data(format_map_data(make_inspections(args.synthetic)))
+    else:
+        data = compact_map_data(load_map_data(args.file_path))
+    latest = build_latest_inspections(data)
+    payload = build_marker_payload(data, latest)
+    restaurants = restaurant_frame(payload)
+    average, latest_scores = restaurants['average score'].to_numpy(), restaurants['latest score'].to_numpy()
+
+    # ---- Python precompute ---- #
+    previous, previous_seconds = timed(previous_score_modes, average, latest_scores, repeat=args.repeat)
+    modes, modes_seconds = timed(score_modes, average, latest_scores, repeat=args.repeat)
+    assert all((COLOR_GROUPS[bands] == colors).all() for bands, colors in zip(modes['band'], previous['color']))
+    assert all(np.allclose(new, old, atol=1e-6) for new, old in zip(modes['intensity'], previous['intensity']))
+    _, tiles_seconds = timed(build_tiles, restaurants)
+    results = {'restaurants': len(restaurants),
+               'precompute': {'previous_seconds': round(previous_seconds, 4), 'score_modes_seconds': round(modes_seconds, 4),
+                              'speedup': round(previous_seconds / modes_seconds, 1),
+                              'packed_bytes': sum(values.nbytes for values in modes.values())},
+               'build_tiles_seconds': round(tiles_seconds, 3)}
+
+    # ---- Mode switch in the harness ---- #
+    if shutil.which('node'):
+        previous_template = fixture('map_rebuild_layers.html')
+        with open(os.path.join(ROOT, 'templates', 'test.html'), encoding='utf-8') as f:
+            template = f.read()
+        script = marker_payload_script(*marker_columns(data, latest))
+        with tempfile.TemporaryDirectory() as temp_dir:
+            assets_dir = os.path.join(temp_dir, 'map')
+            write_map_assets(data, latest, assets_dir)
+            results['rebuild_layers'] = median_timings(previous_template, script, temp_dir, 'previous', assets_dir, args.repeat)
+            results['swap_arrays'] = median_timings(template, script, temp_dir, 'swap', assets_dir, args.repeat)
+    else:
+        print("node not found, skipping mode switch timings.")
+
+    report(results, args.out)
+
+
+if __name__ == '__main__':
+    main()
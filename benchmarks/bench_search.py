@@ -0,0 +1,81 @@
+"""
+Per keystroke latency of the restaurant search (see support/search.py) and the size of its index.
+Names and addresses of sampled restaurants are typed one character at a time, some with a typo, and every
+prefix is queried in process, as the Map page's search box does on every rerun. Every fully typed name must
+come back as the top result. Only the records matched are sent to the page; their size is reported per query.
+
+    python -m benchmarks.bench_search --synthetic 30000
+"""
+import argparse
+import os
+import tempfile
+import numpy as np
+from benchmarks.bench_history import percentiles
+from benchmarks.common import report, timed
+from support.data_cleaner import compact_map_data, format_map_data, load_map_data
+from support.latest import build_latest_inspections
+from support.search import SearchIndex, read_search_index, write_search_index
+
+
+def typed_queries(index, samples, typo_share, seed=0):
+    # Every prefix of sampled names and addresses, a share of them typed with two letters swapped
+    rng = np.random.default_rng(seed)
+    queries, names = [], []
+    for position in rng.choice(len(index), min(samples, len(index)), replace=False):
+        name, address = index.records.at[position, 'dba'], index.records.at[position, 'address']
+        names.append(name)
+        for text in (name, address):
+            if rng.random() < typo_share and len(text) > 3:
+                i = rng.integers(1, len(text) - 2)
+                text = text[:i] + text[i + 1] + text[i] + text[i + 2:]
+            queries.extend(text[:end] for end in range(1, len(text) + 1))
+    return queries, names
+
+def latencies(fn, queries):
+    seconds = []
+    for query in queries:
+        _, elapsed = timed(fn, query)
+        seconds.append(elapsed)
+    return percentiles(seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--file-path', default='data/data.zip')
+    parser.add_argument('--synthetic', type=int, default=0, help="Number of synthetic restaurants to generate instead")
+    parser.add_argument('--samples', type=int, default=200, help="Restaurants whose name and address are typed")
+    parser.add_argument('--typo-share', type=float, default=0.3)
+    parser.add_argument('--out')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from benchmarks.synthetic import make_inspections
+        data = compact_map_data(format_map_data(make_inspections(args.synthetic)))
+    else:
+        data = compact_map_data(load_map_data(args.file_path))
+    latest = build_latest_inspections(data)
+
+    index, build_seconds = timed(SearchIndex.from_latest, latest)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = write_search_index(index, os.path.join(temp_dir, 'search_index.pkl'))
+        _, read_seconds = timed(read_search_index, path)
+        stored_kb = os.path.getsize(path) / 1024
+
+    queries, names = typed_queries(index, args.samples, args.typo_share)
+    for name in names:
+        assert index.search(name)['dba'].iloc[0] == name, name
+
+    # What the page sends the browser per query: the labels of the matches in its select box
+    response_bytes = [len(''.join(index.search(query).pipe(lambda m: m['dba'] + ' (' + m['address'] + ')')).encode('utf-8'))
+                      for query in queries[:1000]]
+    results = {'restaurants': len(index), 'queries': len(queries),
+               'build_seconds': round(build_seconds, 3), 'read_seconds': round(read_seconds, 4),
+               'index_kb': round(index.nbytes() / 1024, 1), 'records_kb': round(index.records.memory_usage(deep=True).sum() / 1024, 1),
+               'stored_kb': round(stored_kb, 1), 'in_process': latencies(index.search, queries),
+               'response_bytes_p50': int(np.median(response_bytes))}
+
+    report(results, args.out)
+
+
+if __name__ == '__main__':
+    main()
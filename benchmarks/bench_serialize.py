@@ -0,0 +1,87 @@
+"""
+Serialization of the marker payload the Map page ships (see support/serialize.py): time and bytes of the
+per-restaurant objects passed through json.dumps against the JSON written from column arrays and the binary
+encoding, with the time the template takes to read each encoding in the headless harness when node is on the
+PATH. Every encoding is checked to hold the same values.
+
+    python -m benchmarks.bench_serialize --synthetic 31000
+"""
+import argparse
+import gzip
+import json
+import os
+import shutil
+import struct
+import tempfile
+import numpy as np
+from benchmarks.bench_map_payload import browser_timings
+from benchmarks.common import ROOT, report, timed
+from support.data_cleaner import compact_map_data, format_map_data, load_map_data
+from support.latest import build_latest_inspections
+from support.markers import build_marker_payload, encode_marker_payload, marker_columns, marker_payload_script
+from support.serialize import MAGIC, SECTION_TYPES, STRING_TABLE, STRING_TERMINATOR
+
+
+def unpack_columns(data):
+    # The template's decodeMarkerBuffer in Python: (columns, string tables) of a pack_columns encoding
+    assert data[:len(MAGIC)] == MAGIC
+    _, _, count = struct.unpack_from('<3I', data, len(MAGIC))
+    entries = struct.unpack_from(f'<{3 * count}I', data, len(MAGIC) + 12)
+    dtypes = {code: dtype.newbyteorder('<') for dtype, code in SECTION_TYPES.items()}
+    columns, strings = [], []
+    for code, offset, length in zip(entries[::3], entries[1::3], entries[2::3]):
+        if code == STRING_TABLE:
+            strings.append(data[offset:offset + length].decode('utf-8').split(STRING_TERMINATOR)[:-1])
+        else:
+            columns.append(np.frombuffer(data, dtype=dtypes[code], count=length // dtypes[code].itemsize, offset=offset))
+    return columns, strings
+
+def sizes(payload):
+    payload = payload.encode() if isinstance(payload, str) else payload
+    return {'bytes': len(payload), 'gzip_bytes': len(gzip.compress(payload))}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--file-path', default='data/data.zip')
+    parser.add_argument('--synthetic', type=int, default=0, help="Number of synthetic restaurants to generate instead")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--out')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from benchmarks.synthetic import make_inspections
+        data = compact_map_data(format_map_data(make_inspections(args.synthetic)))
+    else:
+        data = compact_map_data(load_map_data(args.file_path))
+
+    latest = build_latest_inspections(data)
+    objects, objects_seconds = timed(lambda: json.dumps(build_marker_payload(data, latest), separators=(',', ':')), repeat=args.repeat)
+    (columns, names), columns_seconds = timed(marker_columns, data, latest, repeat=args.repeat)
+    scripts, markers = {}, {'objects_json': {'seconds': round(objects_seconds, 3), **sizes(objects)}}
+    for encoding in ('json', 'binary'):
+        scripts[encoding], seconds = timed(marker_payload_script, columns, names, encoding, repeat=args.repeat)
+        markers[encoding] = {'seconds': round(columns_seconds + seconds, 3), **sizes(scripts[encoding])}
+    markers['json_speedup'] = round(objects_seconds / markers['json']['seconds'], 1)
+    markers['binary_speedup'] = round(objects_seconds / markers['binary']['seconds'], 1)
+    assert json.loads(scripts['json']) == json.loads(objects)
+    # Single precision holds the float32 coordinates and the rounded scores
+    decoded, decoded_names = unpack_columns(encode_marker_payload(columns, names))
+    assert decoded_names == [names] and all(np.allclose(values, expected, rtol=1e-6, atol=1e-5, equal_nan=True)
+                                            for values, expected in zip(decoded, columns.values()))
+
+    if shutil.which('node'):
+        with open(os.path.join(ROOT, 'templates', 'test.html'), encoding='utf-8') as f:
+            template = f.read()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for encoding, script in scripts.items():
+                timings = browser_timings(template, script, temp_dir, encoding)
+                markers[encoding]['time_to_interactive_ms'] = timings['time_to_interactive_ms']
+    else:
+        print("node not found, skipping time to interactive.")
+
+    report({'restaurants': len(columns['camis']), 'markers': markers}, args.out)
+
+
+if __name__ == '__main__':
+    main()
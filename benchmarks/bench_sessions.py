@@ -0,0 +1,71 @@
+"""
+RSS as simulated sessions go from 1 to 50, with each session holding the frame it loaded plus a small
+derived summary. Compares per-session copies from st.cache_data (read_map_data) with the shared dataset (get_dataset).
+
+    python -m benchmarks.bench_sessions --synthetic 30000
+"""
+import argparse
+import gc
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.common import current_rss_mb, report, run_child
+
+
+def simulate(mode, file_path, snapshot_path, steps):
+    from support.data_cleaner import read_map_data
+    from support.dataset import get_dataset
+
+    def session(_):
+        # A page run holds on to the full frame and derives a small summary from it
+        if mode == 'cache_data':
+            data = read_map_data(file_path, snapshot_path=snapshot_path, compact=True)
+        else:
+            data = get_dataset(file_path, snapshot_path)
+        return data, data.groupby('boro', observed=True)['score'].describe()
+
+    sessions, results = [], []
+    session(0) # Warm the cache so only per-session cost is measured
+    gc.collect()
+    baseline = current_rss_mb()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for target in steps:
+            sessions.extend(executor.map(session, range(target - len(sessions))))
+            gc.collect()
+            results.append({'sessions': target, 'rss_mb': round(current_rss_mb(), 1),
+                            'growth_mb': round(current_rss_mb() - baseline, 1)})
+    return {'mode': mode, 'baseline_rss_mb': round(baseline, 1), 'steps': results}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--file-path', default='data/data.zip')
+    parser.add_argument('--synthetic', type=int, default=0, help="Number of synthetic restaurants to generate instead")
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 5, 10, 25, 50])
+    parser.add_argument('--out')
+    parser.add_argument('--child', nargs=3, metavar=('MODE', 'FILE_PATH', 'SNAPSHOT_PATH'))
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(simulate(*args.child, args.sessions)))
+        return
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = args.file_path
+        if args.synthetic:
+            from benchmarks.synthetic import make_inspections, write_zip
+            file_path = write_zip(make_inspections(args.synthetic), os.path.join(temp_dir, 'data.zip'))
+        from build_data import build_data
+        from support.derived import DerivedPaths
+        snapshot_path = os.path.join(temp_dir, 'data.parquet')
+        build_data(file_path, snapshot_path, paths=DerivedPaths.under(temp_dir))
+
+        results = [run_child('benchmarks.bench_sessions', '--child', mode, file_path, snapshot_path,
+                             '--sessions', *args.sessions)
+                   for mode in ('cache_data', 'shared')]
+    report(results, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Cold-load time and peak RSS of the zip/JSON path against the Parquet snapshot.
+
+    python -m benchmarks.bench_snapshot                 # uses data/data.zip
+    python -m benchmarks.bench_snapshot --synthetic 30000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from benchmarks.common import peak_rss_mb, report, run_child
+
+# Columns the Map page actually needs
+MAP_COLUMNS = ['camis', 'dba', 'latitude', 'longitude', 'inspection date', 'violation description', 'score']
+
+
+def load_once(mode, file_path, snapshot_path):
+    from support.data_cleaner import read_map_data
+    start = time.perf_counter()
+    if mode == 'zip':
+        data = read_map_data(file_path, snapshot_path=None)
+    elif mode == 'snapshot':
+        data = read_map_data(file_path, snapshot_path=snapshot_path)
+    else:
+        data = read_map_data(file_path, snapshot_path=snapshot_path, columns=MAP_COLUMNS)
+    seconds = time.perf_counter() - start
+    return {'mode': mode, 'rows': len(data), 'columns': data.shape[1], 'seconds': round(seconds, 3),
+            'peak_rss_mb': round(peak_rss_mb(), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--file-path', default='data/data.zip')
+    parser.add_argument('--synthetic', type=int, default=0, help="Number of synthetic restaurants to generate instead")
+    parser.add_argument('--out')
+    parser.add_argument('--child', nargs=3, metavar=('MODE', 'FILE_PATH', 'SNAPSHOT_PATH'))
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(load_once(*args.child)))
+        return
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        file_path = args.file_path
+        if args.synthetic:
+            from benchmarks.synthetic import make_inspections, write_zip
+            file_path = write_zip(make_inspections(args.synthetic), os.path.join(temp_dir, 'data.zip'))
+
+        from build_data import build_data
+        from support.derived import DerivedPaths
+        snapshot_path = os.path.join(temp_dir, 'data.parquet')
+        build_data(file_path, snapshot_path, paths=DerivedPaths.under(temp_dir))
+
+        results = [run_child('benchmarks.bench_snapshot', '--child', mode, file_path, snapshot_path)
+                   for mode in ('zip', 'snapshot', 'snapshot_projected')]
+        for result in results:
+            result['speedup'] = round(results[0]['seconds'] / result['seconds'], 1)
+        report({'file_bytes': {'zip': os.path.getsize(file_path), 'snapshot': os.path.getsize(snapshot_path)},
+                'loads': results}, args.out)
+
+
+if __name__ == '__main__':
+    main()
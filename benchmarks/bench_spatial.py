@@ -0,0 +1,103 @@
+"""
+Spatial index over the latest inspections: build, save and load time, single query latency (p50 / p99)
+for radius, k-NN and bounding box queries, and batches of 10k queries against a loop of single ones.
+Results are checked against a brute force haversine scan.
+
+    python -m benchmarks.bench_spatial --synthetic 30000
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from benchmarks.bench_history import percentiles
+from benchmarks.common import report, timed
+from benchmarks.synthetic import make_inspections
+from support.data_cleaner import compact_map_data, format_map_data, load_map_data
+from support.latest import build_latest_inspections
+from support.spatial import EARTH_RADIUS_M, SpatialIndex, read_spatial_index, write_spatial_index
+
+
+def haversine_m(index, lat, lon):
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(index.latitude), np.radians(index.longitude)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+def single_latency(fn, queries):
+    seconds = []
+    for query in queries:
+        start = time.perf_counter()
+        fn(*query)
+        seconds.append(time.perf_counter() - start)
+    return percentiles(seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--file-path', default='data/data.zip')
+    parser.add_argument('--synthetic', type=int, default=0, help="Number of synthetic restaurants to generate instead")
+    parser.add_argument('--queries', type=int, default=2000, help="Single queries timed per kind")
+    parser.add_argument('--batch', type=int, default=10000)
+    parser.add_argument('--meters', type=float, default=500)
+    parser.add_argument('--k', type=int, default=20)
+    parser.add_argument('--out')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        data = compact_map_data(format_map_data(make_inspections(args.synthetic)))
+    else:
+        data = compact_map_data(load_map_data(args.file_path))
+    latest = build_latest_inspections(data)
+
+    index, build_seconds = timed(SpatialIndex.from_latest, latest)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        index_path = os.path.join(temp_dir, 'spatial_index.pkl')
+        _, write_seconds = timed(write_spatial_index, index, index_path)
+        index, read_seconds = timed(read_spatial_index, index_path)
+        index_bytes = os.path.getsize(index_path)
+
+    # Query points around the restaurants themselves
+    rng = np.random.default_rng(0)
+    picks = rng.integers(0, len(index), args.batch)
+    lat = index.latitude[picks] + rng.normal(0, 0.002, args.batch)
+    lon = index.longitude[picks] + rng.normal(0, 0.002, args.batch)
+    half = 0.005
+    boxes = (lat - half, lon - half, lat + half, lon + half)
+
+    # Same answers as a brute force scan
+    for i in range(20):
+        radius = index.radius(lat[i], lon[i], args.meters)
+        assert set(radius['camis']) == set(index.camis[haversine_m(index, lat[i], lon[i]) <= args.meters])
+        nearest = index.nearest(lat[i], lon[i], args.k)
+        expected = np.sort(haversine_m(index, lat[i], lon[i]))[:args.k]
+        assert np.allclose(nearest['distance m'], expected)
+        box = index.bbox(*(b[i] for b in boxes))
+        inside = ((index.latitude >= boxes[0][i]) & (index.longitude >= boxes[1][i]) &
+                  (index.latitude <= boxes[2][i]) & (index.longitude <= boxes[3][i]))
+        assert set(box['camis']) == set(index.camis[inside])
+
+    n = args.queries
+    single = {'radius': single_latency(lambda a, b: index.radius(a, b, args.meters), zip(lat[:n], lon[:n])),
+              'nearest': single_latency(lambda a, b: index.nearest(a, b, args.k), zip(lat[:n], lon[:n])),
+              'bbox': single_latency(index.bbox, zip(*(b[:n] for b in boxes))),
+              'tree_radius_only': single_latency(
+                  lambda a, b: index.tree.query_radius(np.radians([[a, b]]), args.meters / EARTH_RADIUS_M), zip(lat[:n], lon[:n]))}
+
+    batch = {}
+    for name, fn, batch_args in (('radius', index.radius_batch, (lat, lon, args.meters)),
+                                 ('nearest', index.nearest_batch, (lat, lon, args.k)),
+                                 ('bbox', index.bbox_batch, boxes)):
+        result, seconds = timed(fn, *batch_args, repeat=3)
+        batch[name] = {'queries': args.batch, 'seconds': round(seconds, 3),
+                       'us_per_query': round(seconds / args.batch * 1e6, 1),
+                       'mean_count': round(float(result['count'].mean()), 1)}
+
+    report({'restaurants': len(index), 'build_seconds': round(build_seconds, 3), 'write_seconds': round(write_seconds, 3),
+            'read_seconds': round(read_seconds, 3), 'index_bytes': index_bytes,
+            'single_query': single, 'batch': batch}, args.out)
+
+
+if __name__ == '__main__':
+    main()
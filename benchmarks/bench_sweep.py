@@ -0,0 +1,72 @@
+"""
+Offline DBSCAN sweep of the Cluster page: grid build time and size on disk, then the cost of switching
+parameters, a lookup in the memory mapped sweep against a fresh DBSCAN fit (p50 / p99).
+
+    python -m benchmarks.bench_sweep --synthetic 30000
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from benchmarks.bench_history import percentiles
+from benchmarks.common import report, timed
+from support.cluster import fit_dbscan, geospatial_preprocessing, valid_inspection_rows
+from support.data_cleaner import compact_map_data, format_map_data, load_map_data
+from support.latest import build_latest_inspections
+from support.spatial import add_neighbourhood_scores
+from support.sweep import DbscanSweep, sweep_configs, write_dbscan_sweep
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--file-path', default='data/data.zip')
+    parser.add_argument('--synthetic', type=int, default=0, help="Number of synthetic restaurants to generate instead")
+    parser.add_argument('--switches', type=int, default=200, help="Parameter switches timed from the sweep")
+    parser.add_argument('--fits', type=int, default=10, help="Parameter switches timed with a fresh fit")
+    parser.add_argument('--out')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from benchmarks.synthetic import make_inspections
+        data = compact_map_data(format_map_data(make_inspections(args.synthetic)))
+    else:
+        data = compact_map_data(load_map_data(args.file_path))
+    df = valid_inspection_rows(compact_map_data(add_neighbourhood_scores(build_latest_inspections(data))))
+    configs = sweep_configs()
+    picks = [configs[i] for i in np.random.default_rng(0).integers(0, len(configs), args.switches)]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'dbscan_sweep.bin')
+        stats = write_dbscan_sweep(df, path, configs)
+        sweep, open_seconds = timed(DbscanSweep, path)
+
+        # Same labels as fitting the page's features directly
+        for metric, eps_km, min_samples, score_weight in picks[:5]:
+            features, eps = geospatial_preprocessing(df, score_weight or 0, eps_km)
+            assert np.array_equal(sweep.lookup(metric, eps_km, min_samples, score_weight)[0],
+                                  fit_dbscan(features, eps, min_samples, metric))
+
+        lookups = []
+        for config in picks:
+            start = time.perf_counter()
+            sweep.matches(df)
+            sweep.lookup(*config)
+            lookups.append(time.perf_counter() - start)
+
+        fits = []
+        for metric, eps_km, min_samples, score_weight in picks[:args.fits]:
+            start = time.perf_counter()
+            features, eps = geospatial_preprocessing(df, score_weight or 0, eps_km)
+            fit_dbscan(features, eps, min_samples, metric)
+            fits.append(time.perf_counter() - start)
+        del sweep
+
+    report({**stats, 'mb_on_disk': round(stats['bytes'] / 1024 ** 2, 2),
+            'seconds_per_config': round(stats['build_seconds'] / stats['configs'], 3),
+            'open_seconds': round(open_seconds, 4), 'switch_from_sweep': percentiles(lookups),
+            'switch_with_fit': percentiles(fits)}, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Full pull against incremental delta sync, both served by a local Socrata stand-in.
+
+    python -m benchmarks.bench_sync --synthetic 10000 --new-restaurants 300
+"""
+import argparse
+import os
+import tempfile
+import numpy as np
+from benchmarks.common import report
+from benchmarks.socrata_stub import SocrataStub, to_socrata_records
+from benchmarks.synthetic import make_inspections
+from support.derived import DerivedPaths
+from support.socrata import sync_from_nyc_db
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--synthetic', type=int, default=10000)
+    parser.add_argument('--new-restaurants', type=int, default=300, help="Restaurants inspected on the new day")
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--out')
+    args = parser.parse_args()
+
+    # Yesterday's feed, then today's feed with a day of new inspections stamped with a newer record date
+    history = make_inspections(args.synthetic)
+    new_day = make_inspections(args.new_restaurants, inspections_per_restaurant=1, seed=1)
+    new_day['camis'] = np.random.default_rng(1).choice(history['camis'].unique(), len(new_day))
+    new_day[['inspection date', 'grade date']] = '2025-04-01T00:00:00.000'
+    new_day['record date'] = '2025-04-02T00:00:00.000'
+    history_records = to_socrata_records(history)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        snapshot_path = os.path.join(temp_dir, 'data.parquet')
+        paths = DerivedPaths.under(temp_dir)
+        with SocrataStub(history_records) as stub:
+            full = sync_from_nyc_db(snapshot_path, stub.url, args.page_size, paths=paths)
+        with SocrataStub(history_records + to_socrata_records(new_day)) as stub:
+            incremental = sync_from_nyc_db(snapshot_path, stub.url, args.page_size, paths=paths)
+            noop = sync_from_nyc_db(snapshot_path, stub.url, args.page_size, paths=paths)
+
+    report({'full_pull': full, 'incremental': incremental, 'no_new_rows': noop}, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Pre-rendered tiles for the Leaflet map: build time, tile counts and sizes per zoom level and per-tile
+read latency (p50 / p99) of the static tile files (see support/assets.py). With node on the PATH, the previous
+template, which clusters every restaurant in the browser, is timed against the tiled one in the node harness.
+
+    python -m benchmarks.bench_tiles                 # uses data/data.zip
+    python -m benchmarks.bench_tiles --synthetic 30000
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from benchmarks.bench_history import percentiles
+from benchmarks.bench_map_payload import browser_timings
+from benchmarks.common import ROOT, fixture, report, timed
+from support.assets import write_asset_dir, write_map_assets
+from support.latest import build_latest_inspections
+from support.markers import build_marker_payload
+from support.tiles import MAX_ZOOM, MIN_ZOOM, build_tiles, restaurant_frame, tile_files
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--file-path', default='data/data.zip')
+    parser.add_argument('--synthetic', type=int, default=0, help="Number of synthetic restaurants to generate instead")
+    parser.add_argument('--reads', type=int, default=500, help="Tile reads per zoom level")
+    parser.add_argument('--out')
+    args = parser.parse_args()
+
+    from support.data_cleaner import compact_map_data, format_map_data, load_map_data
+    if args.synthetic:
+        from benchmarks.synthetic import make_inspections
+        data = compact_map_data(format_map_data(make_inspections(args.synthetic)))
+    else:
+        data = compact_map_data(load_map_data(args.file_path))
+    latest = build_latest_inspections(data)
+    payload = build_marker_payload(data, latest)
+
+    tiles, build_seconds = timed(build_tiles, restaurant_frame(payload))
+    files, encode_seconds = timed(tile_files, tiles)
+    browser = {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        start = time.perf_counter()
+        tiles_dir = os.path.join(temp_dir, write_asset_dir(files, 'tiles', temp_dir))
+        static_seconds = time.perf_counter() - start
+        static_bytes = sum(len(body) for body in files.values())
+
+        # Read latency per zoom level, for random tiles holding restaurants, read and parsed as the browser would
+        rng = np.random.default_rng(0)
+        zooms = []
+        for zoom in range(MIN_ZOOM, MAX_ZOOM + 1):
+            keys = [key for key in files if key.startswith(f"{zoom}/")]
+            sizes = [len(files[key]) for key in keys]
+            seconds = []
+            for key in rng.choice(keys, args.reads):
+                start = time.perf_counter()
+                with open(os.path.join(tiles_dir, key), 'rb') as f:
+                    json.loads(f.read())
+                seconds.append(time.perf_counter() - start)
+            zooms.append({'zoom': zoom, 'tiles': len(keys), 'mean_tile_bytes': round(float(np.mean(sizes))),
+                          'max_tile_bytes': max(sizes), **percentiles(seconds)})
+
+        if shutil.which('node'):
+            client_template = fixture('map_client_clustering.html')
+            with open(os.path.join(ROOT, 'templates', 'test.html'), encoding='utf-8') as f:
+                tiled_template = f.read()
+            text = json.dumps(payload, separators=(',', ':'))
+            assets_dir = os.path.join(temp_dir, 'map')
+            write_map_assets(data, latest, assets_dir)
+            browser['client_clustering'] = browser_timings(client_template, text, temp_dir, 'client', assets_dir)
+            browser['server_tiles'] = browser_timings(tiled_template, text, temp_dir, 'tiled', assets_dir)
+        else:
+            print("node not found, skipping browser timings.")
+
+    report({'restaurants': len(payload['restaurants']), 'build_seconds': round(build_seconds, 3),
+            'encode_seconds': round(encode_seconds, 3), 'tiles': len(files),
+            'static_write_seconds': round(static_seconds, 3), 'static_bytes': static_bytes,
+            'zooms': zooms, **browser}, args.out)
+
+
+if __name__ == '__main__':
+    main()
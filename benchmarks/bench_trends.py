@@ -0,0 +1,95 @@
+"""
+Score trends (see support/trends.py): a full recompute over the whole inspection history against appending
+the inspections of each new month to the stored trends. The last months of the history are replayed one at a
+time on top of the months before them; after every month the appended trends are checked to hold the same
+cells as a full recompute. Also reports the stored size and the time of the queries the pages make.
+
+    python -m benchmarks.bench_trends --synthetic 30000 --months 6
+"""
+import argparse
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from benchmarks.common import report, timed
+from support.data_cleaner import compact_map_data, format_map_data, is_inspected, load_map_data
+from support.trends import MONTH_BITS, MONTH_MASK, TREND_LEVELS, ScoreTrends, read_score_trends, write_score_trends
+
+
+def level_cells(trends, level):
+    # Cells by key and month, independent of the order keys were added in
+    keys, cells = trends.arrays[f"{level}_keys"], trends.arrays[f"{level}_cells"]
+    transitions = trends.arrays[f"{level}_transitions"]
+    frame = pd.DataFrame({'key': keys[cells >> MONTH_BITS], 'month': cells & MONTH_MASK,
+                          'sums': trends.arrays[f"{level}_sums"], 'counts': trends.arrays[f"{level}_counts"],
+                          **{f"transition_{code}": transitions[:, code] for code in range(9)}})
+    return frame.sort_values(['key', 'month']).reset_index(drop=True)
+
+def restaurant_state(trends):
+    frame = pd.DataFrame({'camis': trends.arrays['restaurant_keys'], 'last_date': trends.arrays['last_date'],
+                          'last_grade': trends.arrays['last_grade']})
+    return frame.sort_values('camis').reset_index(drop=True)
+
+def assert_same_trends(appended, rebuilt):
+    for level in TREND_LEVELS:
+        pd.testing.assert_frame_equal(level_cells(appended, level), level_cells(rebuilt, level))
+    pd.testing.assert_frame_equal(restaurant_state(appended), restaurant_state(rebuilt))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--file-path', default='data/data.zip')
+    parser.add_argument('--synthetic', type=int, default=0, help="Number of synthetic restaurants to generate instead")
+    parser.add_argument('--months', type=int, default=6, help="Months of inspections appended one at a time")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--out')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        from benchmarks.synthetic import make_inspections
+        data = compact_map_data(format_map_data(make_inspections(args.synthetic)))
+    else:
+        data = compact_map_data(load_map_data(args.file_path))
+
+    trends, full_seconds = timed(ScoreTrends.from_inspections, data, repeat=args.repeat)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, 'trends.npz')
+        _, write_seconds = timed(write_score_trends, trends, path)
+        _, read_seconds = timed(read_score_trends, path, repeat=args.repeat)
+        stored_kb = os.path.getsize(path) / 1024
+
+    # Replay the last months on top of the history before them
+    months = data['inspection date'].to_numpy().astype('datetime64[M]')
+    inspected = is_inspected(data['inspection date']).to_numpy()
+    replayed = np.unique(months[inspected])[-args.months:]
+    appended = ScoreTrends.from_inspections(data[~inspected | (months < replayed[0])])
+    append_seconds, rebuild_seconds = [], []
+    for month in replayed:
+        rows = data[inspected & (months == month)]
+        _, seconds = timed(appended.append, rows)
+        append_seconds.append(seconds)
+        rebuilt, seconds = timed(ScoreTrends.from_inspections, data[~inspected | (months <= month)])
+        rebuild_seconds.append(seconds)
+        assert_same_trends(appended, rebuilt)
+
+    zipcode = trends.keys('zipcode')[0]
+    camis = trends.keys('restaurant')[0]
+    queries = {
+        'city_trend': timed(trends.trend, 'city', repeat=10)[1],
+        'borough_rolling_scores': timed(trends.rolling_scores, 'borough', repeat=10)[1],
+        'zipcode_trend': timed(trends.trend, 'zipcode', zipcode, repeat=10)[1],
+        'restaurant_trend': timed(trends.trend, 'restaurant', camis, repeat=10)[1],
+    }
+
+    report({'rows': len(data), 'inspections': int(sum(trends.arrays['restaurant_counts'])),
+            'months': trends.months()[1], 'cells': {level: len(trends.arrays[f"{level}_cells"]) for level in TREND_LEVELS},
+            'array_kb': round(sum(values.nbytes for values in trends.arrays.values()) / 1024, 1), 'stored_kb': round(stored_kb, 1),
+            'full_recompute_seconds': round(full_seconds, 4), 'write_seconds': round(write_seconds, 4), 'read_seconds': round(read_seconds, 4),
+            'monthly_append_seconds': [round(seconds, 4) for seconds in append_seconds],
+            'monthly_rebuild_seconds': [round(seconds, 4) for seconds in rebuild_seconds],
+            'append_speedup': round(np.median(rebuild_seconds) / np.median(append_seconds), 1),
+            'query_ms': {name: round(seconds * 1000, 3) for name, seconds in queries.items()}}, args.out)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+# Repo root, so benchmarks can be launched from anywhere
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES_DIR = os.path.join(ROOT, 'benchmarks', 'fixtures')
+
+
+def peak_rss_mb():
+    """
+    Peak resident set size of the current process in MB.
+    On Linux VmHWM is used since ru_maxrss carries over the parent's peak through fork/exec.
+    """
+    if os.path.exists('/proc/self/status'):
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    # ru_maxrss is KB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def current_rss_mb():
+    """
+    Current resident set size of the process in MB (Linux only, falls back to the peak elsewhere).
+    """
+    if os.path.exists('/proc/self/statm'):
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    return peak_rss_mb()
+
+
+def element_bytes(node):
+    """
+    Serialized size in bytes of every element under a node of an AppTest tree, which is what a page run sends
+    to the browser, and of its component iframes among them. Returns (total, iframe bytes).
+    """
+    total, frame_bytes = 0, 0
+    for child in getattr(node, 'children', {}).values():
+        proto = getattr(child, 'proto', None)
+        if proto is not None:
+            total += proto.ByteSize()
+            if type(proto).__name__ == 'IFrame':
+                frame_bytes += proto.ByteSize()
+        child_total, child_frames = element_bytes(child)
+        total, frame_bytes = total + child_total, frame_bytes + child_frames
+    return total, frame_bytes
+
+
+def timed(fn, *args, repeat=1, **kwargs):
+    """
+    Runs fn repeat times and returns (last result, best wall time in seconds).
+    """
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def run_child(module, *args):
+    """
+    Runs `python -m module *args` in a fresh interpreter so cold timings and peak RSS are isolated.
+    The child must print a single JSON object as its last line of output.
+    """
+    output = subprocess.run([sys.executable, '-m', module, *map(str, args)], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def report(results, out_path=None):
+    """
+    Prints benchmark results and optionally writes them as JSON for comparison between commits.
+    """
+    text = json.dumps(results, indent=2, default=str)
+    print(text)
+    if out_path:
+        with open(out_path, 'w') as f:
+            f.write(text)
+
+
+def fixture(name):
+    """
+    Source of an earlier layout of a page or template, checked in under benchmarks/fixtures so it can be
+    benchmarked against the current one without the git history (shallow clones, source tarballs).
+    """
+    with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+        return f.read()
@@ -0,0 +1,166 @@
+import streamlit as st
+import numpy as np
+import pandas as pd
+import datetime as dt
+import pydeck as pdk
+import json
+import os
+import streamlit.components.v1 as components
+from support.dataset import get_dataset, get_latest_inspections
+from support.markers import marker_columns, marker_payload_script
+from support.assets import asset_url, load_map_assets
+from support.tiles import MAX_ZOOM, MIN_ZOOM
+from support.cluster import filter_valid_inspection_data, geospatial_preprocessing, dbscan_clustering
+from support.df_utils import get_column_size
+from support.maPy import summarize_clusters
+from support.trends import load_score_trends
+
+# ---- Define Config ---- #
+st.set_page_config(page_title="Mapping Out New York City Restaurants", page_icon=':world_map:', layout='wide')
+
+#Use local css
+def local_css(file_name):
+	with open(file_name) as f:
+		st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
+local_css("style/style.css")
+
+@st.cache_data
+def marker_payload_binary(file_path="data/data.zip"):
+    """
+    Marker payload for the Leaflet template as a base64 binary encoding, built once per dataset.
+    """
+    columns, names = marker_columns(get_dataset(file_path), get_latest_inspections(file_path))
+    return marker_payload_script(columns, names, 'binary')
+
+
+# ---- Introduction ---- #
+with st.container():
+    st.title("Health Clusters in NYC Dining")
+    st.write("""
+        By leveraging two powerful clustering algorithms, Hierarchical Clustering and Density-Based Spatial Clustering of Applications with Noise (DBSCAN), we aim to uncover patterns in restaurant health based on their health scores, inspections records, and location.
+        
+        In the first of these interactive maps, we give a searchable index of the restauraunts to inspect historical violations, the concentration of healthy or unhealthy pockets and more. 
+        
+        In the second, we look at clusters informed by DBSCAN using both a Haversine and Euclidean metric that views average health inspection scores across clusters compounded with cluster sizes. We're gating this for now until you go check out the 📦 Cluster page! Afterwards a second map will appear here!
+    """)
+    
+
+# ---- Leaflet Map ---- #
+with st.container():
+    st.write("---")
+    st.subheader("Heatmaps and Hierarchical Clustering")
+    st.markdown("""The map displays restaurant locations in NYC, with **hiearchical clustering** markers based on proximity to other restaurants.
+                The markers are color-coded based on either the average health inspection score or the most recent (toggleable view), with green indicating better scores and red indicating worse scores.
+                The size of each cluster (large circles) represents the number of restaurants within the cluster, and the color represents the average score of its constituent restaurants. 
+                You can click on each marker to view detailed information about the restaurant, including its name, inspection date, and any recorded violations.""")
+    st.markdown("""The heatmap displays areas with higher and lower average health scores, providing a quick visual representation of regions with better or worse overall hygiene. The gradient on this heatmap ranges from green to red, coinciding with health inspection scores. NYC uses golf rules for these inspection scores, so the lower the better! From this we can see hot spots that update and render as increase zoom levels on our map.""")
+    
+    # Read html file
+    with open("templates/test.html", 'r', encoding='utf-8') as file:
+        source = file.read()
+    # Pass the per-restaurant marker payload to HTML Template and render (see support/markers.py),
+    # binary encoded so the browser reads typed arrays instead of parsing JSON
+    source = source.replace("{{ markers_data|tojson }}", marker_payload_binary(r"data/data.zip"))
+    # Popups and tiles read the static assets as on the current page, only the marker payload is inlined
+    assets = load_map_assets(r"data/data.zip")
+    source = source.replace("{{ history_url }}", asset_url(assets['history']))
+    source = source.replace("{{ history_shards }}", str(assets['history_shards']))
+    source = source.replace("{{ tiles_url }}", asset_url(assets['tiles']))
+    source = source.replace("{{ tile_zooms }}", json.dumps([MIN_ZOOM, MAX_ZOOM]))
+    source = source.replace("{{ focus }}", "null")
+    components.html(source, height=700)
+
+# ---- Score Trends ---- #
+with st.container():
+    st.write("---")
+    st.subheader("Score Trends")
+    st.markdown("""The map shows where restaurants stand today. Pick a zip code, or enter the CAMIS of a restaurant from its map popup, to see how its inspection scores moved over the full inspection history, month by month and averaged over the trailing 12 months.""")
+
+    # Precomputed at ingest time (see support/trends.py), so a lookup only slices arrays
+    trends = load_score_trends(r"data/data.zip")
+    trend_option = st.radio("Show the trend of a:", ('Zip code', 'Restaurant'), horizontal=True)
+    if trend_option == 'Zip code':
+        zipcode = st.selectbox("Zip code", trends.keys('zipcode'))
+        trend = trends.trend('zipcode', zipcode)
+    else:
+        camis = st.text_input("Restaurant CAMIS").strip()
+        trend = trends.trend('restaurant', int(camis)) if camis.isdigit() else None
+        if trend is not None:
+            # Single restaurants are only inspected a few times a year
+            trend = trend[trend['inspections'] > 0]
+        elif camis:
+            st.write(f"No inspections found for CAMIS {camis}.")
+    if trend is not None:
+        st.line_chart(trend[['average score', 'rolling average score']])
+   
+# ---- Pydeck Map --- #
+with st.container():
+    st.write("---")
+    st.subheader("DBSCAN in NYC")
+    
+    # If dataframe exists
+    if 'DBSCAN_df' in st.session_state:
+        df = st.session_state['DBSCAN_df']
+        # Summaries the Cluster page computed for its clusterings
+        summaries = st.session_state.get('DBSCAN_summaries') or summarize_clusters(df)
+        
+        # Radio button
+        data_option = st.radio(
+            "Choose a Method:",
+            ('Euclidean', 'Haversine'),
+            index=0 # Default selection
+        )
+        if data_option == 'Euclidean':
+            cluster_df = summaries['euclidean_cluster']
+            radius = 'euclidean_cluster_size'
+        else:
+            cluster_df = summaries['haversine_cluster']
+            radius = 'haversine_cluster_size'
+        
+        # Select color mappings
+        selected_colors = st.multiselect(
+            "Select score levels to display",
+            options=['green', 'yellow', 'red'],
+            default=['green', 'yellow', 'red']
+        )
+        
+        # Allow filtering to selected color
+        filtered_df = cluster_df[cluster_df['color_group'].isin(selected_colors)]
+        
+        # Allow checkbox for changing cluster member sizes
+        increase_size = st.checkbox("Increase cluster size", value=False)
+        size_multiplier = 50 if increase_size else 1
+        
+        # pyDeck Chart
+        layer = pdk.Layer(
+            "ScatterplotLayer",
+            data=filtered_df,
+            get_position='[longitude, latitude]',
+            get_radius=f'{radius} * {size_multiplier}', # Adjust for visual
+            get_fill_color='color',
+            get_line_color=[0,0,0],
+            line_width_min_pixels=1,
+            pickable=True,
+            auto_highlight=True,
+        )
+        # view of NYC
+        view_state = pdk.ViewState(
+            latitude=40.7128,
+            longitude=-74.0060,
+            zoom=10,
+            pitch=0
+        )
+        # Render map
+        st.pydeck_chart(pdk.Deck(
+            layers=[layer],
+            initial_view_state=view_state,
+            tooltip={"text":"Cluster: {euclidean_cluster}\nScore: {score}\nSize: {euclidean_cluster_size}\nArea score (250 m / 500 m / 1 km): {area_score_250m} / {area_score_500m} / {area_score_1000m}"} if data_option == 'Euclidean' else {"text":"Cluster: {haversine_cluster}\nScore: {score}\nSize: {haversine_cluster_size}\nArea score (250 m / 500 m / 1 km): {area_score_250m} / {area_score_500m} / {area_score_1000m}"}
+        ))
+    else:
+        st.markdown("""
+                    <div style='text-align: center;'>
+                        <span style='color: red; font-size: 24px;'>Check out the 📦 Cluster Page and then return here!</span>
+                    </div>
+                    """, 
+                    unsafe_allow_html=True)
+    
\ No newline at end of file
@@ -0,0 +1,223 @@
+// Headless timing harness for the inline script of templates/test.html.
+// Leaflet, its plugins, Fuse and the DOM are replaced by minimal stand-ins so only the template's own
+// work is measured: parsing or decoding the inlined payload, building the layers, switching score mode (in the
+// initial view and at street level) and opening popups. PAYLOAD holds what the Map page inlines: the JSON payload or the call decoding the binary one.
+// With ASSETS_DIR, the map assets named in its manifest.json (see support/assets.py), tiles among them, are read
+// from disk where the page would fetch them from Streamlit's static file serving. Pass '' to skip an argument.
+//
+//     node benchmarks/map_harness.js TEMPLATE PAYLOAD [POPUPS] [ASSETS_DIR] [TILE_ZOOMS]
+//
+// Prints one JSON object with timings in milliseconds.
+const fs = require('fs');
+const path = require('path');
+const vm = require('vm');
+const { performance } = require('perf_hooks');
+
+const [templatePath, payloadPath, popupArg, assetsDir, tileZooms] = process.argv.slice(2);
+const popups = parseInt(popupArg || '1000', 10);
+const STATIC_URL = '/app/static/map';
+const manifest = assetsDir ? JSON.parse(fs.readFileSync(path.join(assetsDir, 'manifest.json'), 'utf8')) : {};
+
+// Versioned url of an asset, as support/assets.py asset_url gives it
+function assetUrl(name) {
+    return name ? `${STATIC_URL}/${name}?v=${name.split('.')[1]}` : `${STATIC_URL}/${name}`;
+}
+
+const html = fs.readFileSync(templatePath, 'utf8');
+const payloadText = fs.readFileSync(payloadPath, 'utf8');
+const scripts = [...html.matchAll(/<script>([\s\S]*?)<\/script>/g)].map(m => m[1]);
+const source = scripts[scripts.length - 1]
+    .replace('{{ markers_data|tojson }}', payloadText)
+    .replace('{{ history_url }}', assetUrl(manifest.history))
+    .replace('{{ history_shards }}', manifest.history_shards || 1)
+    .replace('{{ focus }}', 'null')
+    .replace('{{ tiles_url }}', assetUrl(manifest.tiles))
+    .replace('{{ tile_zooms }}', tileZooms || '[10, 17]');
+
+// Static assets are read from ASSETS_DIR, as Streamlit serves them
+function fetchStub(url) {
+    if (assetsDir && url.startsWith(`${STATIC_URL}/`)) {
+        // The version argument only sets the cache lifetime; the fixture templates append their file after it
+        const file = path.join(assetsDir, url.slice(STATIC_URL.length + 1).replace(/\?v=[0-9a-f]+/, ''));
+        return Promise.resolve(fs.existsSync(file) ? new Response(fs.readFileSync(file)) : new Response(null, { status: 404 }));
+    }
+    return Promise.reject(new Error(`no asset at ${url}`));
+}
+
+// ---- Stand-ins ---- //
+function element(value) {
+    const listeners = {};
+    return {
+        value, style: {}, innerHTML: '', textContent: '', listeners,
+        addEventListener(type, fn) { listeners[type] = fn; },
+        appendChild() {},
+    };
+}
+const elements = {};
+const radios = [element('average'), element('latest')];
+const documentStub = {
+    getElementById: id => (elements[id] = elements[id] || element('')),
+    querySelectorAll: () => radios,
+    createElement: () => element(''),
+};
+
+function layer(extra) {
+    return Object.assign({ addTo() { return this; } }, extra);
+}
+function group() {
+    return layer({
+        layers: [],
+        clearLayers() { this.layers = []; },
+        addLayer(m) { this.layers.push(m); },
+        addLayers(ms) { this.layers.push(...ms); },
+        eachLayer(fn) { this.layers.forEach(fn); },
+        zoomToShowLayer(m, fn) { fn(); },
+    });
+}
+
+// Map with a 1200 x 700 viewport, projecting like Leaflet's spherical mercator
+const VIEWPORT = [1200, 700];
+function project(latlng, zoom) {
+    const lat = latlng.lat !== undefined ? latlng.lat : latlng[0];
+    const lng = latlng.lng !== undefined ? latlng.lng : latlng[1];
+    const scale = 256 * 2 ** zoom;
+    const sin = Math.sin(lat * Math.PI / 180);
+    return { x: (lng + 180) / 360 * scale, y: (0.5 - Math.log((1 + sin) / (1 - sin)) / (4 * Math.PI)) * scale };
+}
+function unproject(point, zoom) {
+    const scale = 256 * 2 ** zoom;
+    const n = Math.PI - 2 * Math.PI * point.y / scale;
+    return { lat: 180 / Math.PI * Math.atan(Math.sinh(n)), lng: point.x / scale * 360 - 180 };
+}
+function mapStub() {
+    const listeners = {};
+    const map = layer({
+        center: [40.7128, -74.0060], zoom: 10,
+        setView(center, zoom) {
+            this.center = center.lat !== undefined ? [center.lat, center.lng] : center;
+            this.zoom = zoom;
+            (listeners.moveend || []).forEach(fn => fn());
+            return this;
+        },
+        getZoom() { return this.zoom; },
+        getBounds() {
+            const c = project(this.center, this.zoom);
+            const nw = unproject({ x: c.x - VIEWPORT[0] / 2, y: c.y - VIEWPORT[1] / 2 }, this.zoom);
+            const se = unproject({ x: c.x + VIEWPORT[0] / 2, y: c.y + VIEWPORT[1] / 2 }, this.zoom);
+            return { getNorthWest: () => nw, getSouthEast: () => se };
+        },
+        project: (latlng, zoom) => project(latlng, zoom),
+        on(type, fn) { (listeners[type] = listeners[type] || []).push(fn); return this; },
+        addLayer() {}, removeLayer() {}, hasLayer() { return true; },
+    });
+    return map;
+}
+
+let mapInstance = null;
+const allMarkers = [];
+const L = {
+    map: () => (mapInstance = mapStub()),
+    tileLayer: () => layer({}),
+    markerClusterGroup: group,
+    layerGroup: group,
+    marker: (latlng, options) => {
+        const marker = layer({
+            options,
+            getLatLng: () => ({ lat: latlng[0], lng: latlng[1] }),
+            listeners: {},
+            bindPopup(content) { this.popup = content; return this; },
+            setIcon(icon) { this.options.icon = icon; return this; },
+            on(type, fn) { this.listeners[type] = fn; return this; },
+            openPopup() {},
+        });
+        allMarkers.push(marker);
+        return marker;
+    },
+    Icon: function (options) { this.options = options; },
+    divIcon: options => options,
+    point: (x, y) => [x, y],
+    latLng: (lat, lng) => ({ lat, lng }),
+    heatLayer: () => layer({ setLatLngs(points) { this.points = points; } }),
+};
+class Fuse {
+    constructor(list) { this.list = list; }
+    search() { return []; }
+}
+const context = vm.createContext({
+    L, Fuse, document: documentStub, console, alert() {}, atob, TextDecoder,
+    setTimeout: fn => fn(),
+    fetch: fetchStub,
+});
+
+// ---- Timings ---- //
+// Templates that render tiles expose a promise for the render in flight
+async function settled() {
+    await context.rendered;
+}
+
+async function time(fn) {
+    const start = performance.now();
+    fn();
+    await settled();
+    return performance.now() - start;
+}
+
+// Location of the first restaurant, from the template's payload in either encoding or, for older templates, the JSON
+function firstLocation() {
+    const payload = context.payload && !Array.isArray(context.payload) ? context.payload : JSON.parse(payloadText);
+    if (Array.isArray(payload)) return [payload[0][0], payload[0][1]];  // one row per inspection
+    if (payload.columns) return [payload.columns[1][0], payload.columns[2][0]];
+    return [payload.restaurants[0][1], payload.restaurants[0][2]];
+}
+
+// Popups are either prebuilt strings, built on open, or completed once their history has loaded
+function openPopup(marker) {
+    const start = performance.now();
+    const content = marker.popup;
+    if (typeof content === 'function') content();
+    if (!marker.listeners.popupopen) return Promise.resolve(performance.now() - start);
+    return new Promise(resolve => {
+        marker.listeners.popupopen({ popup: { setContent() { resolve(performance.now() - start); } } });
+    });
+}
+
+function percentile(values, q) {
+    if (!values.length) return null;
+    const sorted = [...values].sort((a, b) => a - b);
+    return +sorted[Math.min(sorted.length - 1, Math.floor(q * sorted.length))].toFixed(3);
+}
+
+(async () => {
+    const interactive = await time(() => vm.runInContext(source, context));
+    const initialLayers = allMarkers.length;
+    const switchLatest = await time(() => radios[1].listeners.change.call(radios[1]));
+    const switchAverage = await time(() => radios[0].listeners.change.call(radios[0]));
+
+    // Street level view of the first restaurant, where every restaurant is a marker
+    const first = firstLocation();
+    const before = allMarkers.length;
+    const zoomIn = await time(() => mapInstance.setView(first, 17));
+    const zoomed = allMarkers.length - before;
+
+    const withPopups = allMarkers.filter(marker => marker.popup);
+    const current = withPopups.slice(-Math.min(withPopups.length, initialLayers));
+    const step = Math.max(1, Math.floor(current.length / popups));
+    const popupTimes = [];
+    for (let i = 0; i < current.length && popupTimes.length < popups; i += step) {
+        popupTimes.push(await openPopup(current[i]));
+    }
+    const zoomedSwitch = await time(() => radios[1].listeners.change.call(radios[1]));
+
+    console.log(JSON.stringify({
+        layers: initialLayers,
+        time_to_interactive_ms: +interactive.toFixed(1),
+        switch_to_latest_ms: +switchLatest.toFixed(1),
+        switch_to_average_ms: +switchAverage.toFixed(1),
+        zoom_in_ms: +zoomIn.toFixed(1),
+        zoom_in_layers: zoomed,
+        zoomed_switch_ms: +zoomedSwitch.toFixed(1),
+        popup_open_p50_ms: percentile(popupTimes, 0.5),
+        popup_open_p99_ms: percentile(popupTimes, 0.99),
+        heap_used_mb: +(process.memoryUsage().heapUsed / 1024 ** 2).toFixed(1),
+    }));
+})();
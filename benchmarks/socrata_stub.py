@@ -0,0 +1,84 @@
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+WHERE_PATTERN = re.compile(r"(\w+) > '([^']*)'")
+
+
+def to_socrata_records(df):
+    """
+    Converts a synthetic frame into the API's wire format: snake_case keys, string values, nulls omitted.
+    """
+    df = df.rename(columns=lambda col: col.replace(' ', '_'))
+    as_text = lambda value: str(int(value)) if isinstance(value, float) and value.is_integer() else str(value)
+    return [{key: as_text(value) for key, value in row.items() if value == value and value is not None}
+            for row in df.to_dict(orient='records')]
+
+
+class SocrataStub:
+    """
+    Local HTTP stand-in for the Socrata resource endpoint.
+    Supports $limit, $offset, a `count(*) AS total` $select and a single `field > 'value'` $where clause. latency adds a fixed delay per request
+    and fail_every makes every n-th request return a 503, to exercise retries.
+    """
+    def __init__(self, records, latency=0.0, fail_every=0):
+        self.records = records
+        self.latency = latency
+        self.fail_every = fail_every
+        self.requests = 0
+        self._filtered = {}
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_port}/resource/43nn-pn8j.json"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def query(self, params):
+        where = params.get('$where', [None])[0]
+        if where not in self._filtered:
+            field, value = WHERE_PATTERN.match(where).groups() if where else (None, None)
+            self._filtered[where] = [r for r in self.records if field is None or r.get(field, '') > value]
+        rows = self._filtered[where]
+        if '$select' in params: # Only count(*) AS total is supported
+            return [{'total': str(len(rows))}]
+        offset = int(params.get('$offset', ['0'])[0])
+        limit = int(params.get('$limit', ['1000'])[0])
+        return rows[offset:offset + limit]
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with stub._lock:
+                    stub.requests += 1
+                    failing = stub.fail_every and stub.requests % stub.fail_every == 0
+                time.sleep(stub.latency)
+                if failing:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                body = json.dumps(stub.query(parse_qs(urlparse(self.path).query))).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,118 @@
+import json
+import zipfile
+import numpy as np
+import pandas as pd
+
+# Rough bounding boxes for each borough, used to scatter synthetic restaurants
+BOROUGHS = {
+    'Manhattan': (40.70, 40.88, -74.02, -73.91),
+    'Brooklyn': (40.57, 40.74, -74.04, -73.86),
+    'Queens': (40.54, 40.80, -73.96, -73.70),
+    'Bronx': (40.79, 40.92, -73.93, -73.76),
+    'Staten Island': (40.50, 40.65, -74.26, -74.05),
+}
+CUISINES = ['American', 'Chinese', 'Pizza', 'Italian', 'Mexican', 'Japanese', 'Caribbean', 'Bakery Products/Desserts',
+            'Coffee/Tea', 'Latin American', 'Spanish', 'Indian', 'Thai', 'Korean', 'French', 'Haute Cuisine',
+            'Donuts', 'Hotdogs', 'Pretzels', 'Mediterranean']
+VIOLATIONS = ['02B', '02G', '04L', '04N', '06C', '06D', '08A', '08C', '09C', '10B', '10F', '99B']
+ACTIONS = ['Violations were cited in the following area(s).', 'No violations were recorded at the time of this inspection.',
+           'Establishment re-opened by DOHMH.', 'Establishment Closed by DOHMH.']
+
+
+def make_inspections(n_restaurants=30000, inspections_per_restaurant=9, seed=0, bunched=0.0):
+    """
+    Builds a synthetic frame shaped like the raw DOHMH export (lowercase column names, ISO date strings).
+    A small share of restaurants are left uninspected with the 1900-01-01 placeholder date. A bunched share
+    of the restaurants is moved into small blocks as in make_points, so DBSCAN finds clusters; the rest of
+    the frame is the same as without.
+    """
+    rng = np.random.default_rng(seed)
+    n_rows = n_restaurants * inspections_per_restaurant
+
+    # Restaurant level attributes
+    camis = np.arange(40000000, 40000000 + n_restaurants)
+    boro_names = np.array(list(BOROUGHS))
+    boro_idx = rng.integers(0, len(boro_names), n_restaurants)
+    bounds = np.array(list(BOROUGHS.values()))[boro_idx]
+    latitude = rng.uniform(bounds[:, 0], bounds[:, 1])
+    longitude = rng.uniform(bounds[:, 2], bounds[:, 3])
+    if bunched:
+        bunch_rng = np.random.default_rng(seed + 1)
+        moved = np.flatnonzero(bunch_rng.random(n_restaurants) < bunched)
+        centers = bunch_rng.integers(0, n_restaurants, max(1, n_restaurants // 50))[bunch_rng.integers(0, max(1, n_restaurants // 50), len(moved))]
+        latitude[moved] = latitude[centers] + bunch_rng.normal(0, 0.0002, len(moved))
+        longitude[moved] = longitude[centers] + bunch_rng.normal(0, 0.0002, len(moved))
+    missing_geo = rng.random(n_restaurants) < 0.01
+    latitude[missing_geo], longitude[missing_geo] = np.nan, np.nan
+    cuisine = np.array(CUISINES)[rng.integers(0, len(CUISINES), n_restaurants)]
+    names = np.array([f"RESTAURANT {i % (n_restaurants // 3 + 1)}" for i in range(n_restaurants)])
+    zipcode = 10000 + boro_idx * 300 + rng.integers(0, 100, n_restaurants)
+
+    # Inspection level attributes
+    owner = rng.integers(0, n_restaurants, n_rows)
+    days = rng.integers(0, 365 * 8, n_rows)
+    inspection_date = (np.datetime64('2017-01-01') + days.astype('timedelta64[D]')).astype(str)
+    uninspected = rng.random(n_rows) < 0.01
+    inspection_date[uninspected] = '1900-01-01'
+    score = rng.gamma(2.0, 7.0, n_rows).round()
+    score[rng.random(n_rows) < 0.05] = np.nan
+    grade = np.where(score <= 13, 'A', np.where(score <= 27, 'B', 'C')).astype(object)
+    grade[np.isnan(score)] = None
+    violation = np.array(VIOLATIONS, dtype=object)[rng.integers(0, len(VIOLATIONS), n_rows)]
+
+    df = pd.DataFrame({
+        'camis': camis[owner],
+        'dba': names[owner],
+        'boro': boro_names[boro_idx][owner],
+        'building': rng.integers(1, 2000, n_rows).astype(str),
+        'street': np.array(['BROADWAY', 'MAIN STREET', '5 AVENUE', 'QUEENS BOULEVARD', 'FLATBUSH AVENUE'])[owner % 5],
+        'zipcode': zipcode[owner],
+        'phone': 2120000000 + owner,
+        'cuisine description': cuisine[owner],
+        'inspection date': [f"{d}T00:00:00.000" for d in inspection_date],
+        'action': np.array(ACTIONS)[rng.integers(0, len(ACTIONS), n_rows)],
+        'violation code': violation,
+        'violation description': [f"Violation {v} described at length for the inspection record." for v in violation],
+        'critical flag': np.where(rng.random(n_rows) < 0.5, 'Critical', 'Not Critical'),
+        'score': score,
+        'grade': grade,
+        'grade date': [f"{d}T00:00:00.000" for d in inspection_date],
+        'record date': '2025-04-01T00:00:00.000',
+        'inspection type': 'Cycle Inspection / Initial Inspection',
+        'latitude': latitude[owner],
+        'longitude': longitude[owner],
+        'community board': rng.integers(100, 500, n_rows),
+        'council district': rng.integers(1, 52, n_rows),
+        'census tract': rng.integers(100, 99999, n_rows),
+        'bin': rng.integers(1000000, 5999999, n_rows),
+        'bbl': rng.integers(1000000000, 5999999999, n_rows),
+        'nta': 'MN17',
+    })
+    return df
+
+
+def make_points(n_points, seed=0):
+    """
+    Synthetic restaurant locations and latest scores across the boroughs, half of them scattered and half
+    bunched into small blocks the way restaurants share streets and food halls.
+    """
+    rng = np.random.default_rng(seed)
+    bounds = np.array(list(BOROUGHS.values()))[rng.integers(0, len(BOROUGHS), n_points)]
+    latitude = rng.uniform(bounds[:, 0], bounds[:, 1])
+    longitude = rng.uniform(bounds[:, 2], bounds[:, 3])
+    bunched = np.flatnonzero(rng.random(n_points) < 0.5)
+    centers = rng.integers(0, n_points, max(1, n_points // 50))[rng.integers(0, max(1, n_points // 50), len(bunched))]
+    latitude[bunched] = latitude[centers] + rng.normal(0, 0.0002, len(bunched))
+    longitude[bunched] = longitude[centers] + rng.normal(0, 0.0002, len(bunched))
+    score = rng.gamma(2.0, 7.0, n_points).round()
+    return pd.DataFrame({'latitude': latitude, 'longitude': longitude, 'score': score})
+
+
+def write_zip(df, file_path, map_data="data.json"):
+    """
+    Writes a synthetic frame as a records-oriented JSON member inside a zip, matching data/data.zip.
+    """
+    records = json.loads(df.to_json(orient='records'))
+    with zipfile.ZipFile(file_path, 'w', compression=zipfile.ZIP_DEFLATED) as zip_ref:
+        zip_ref.writestr(map_data, json.dumps(records))
+    return file_path
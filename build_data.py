@@ -0,0 +1,54 @@
+import argparse
+import time
+from support.data_cleaner import read_map_data
+from support.derived import DerivedPaths, write_clusters, write_derived
+from support.latest import build_latest_inspections, read_latest_inspections
+from support.snapshot import SNAPSHOT_PATH, write_snapshot
+from support.socrata import sync_from_nyc_db
+from support.sweep import SWEEP_PATH
+
+def build_data(file_path="data/data.zip", snapshot_path=SNAPSHOT_PATH, from_nyc_db=False, chunk_size=50000, paths=DerivedPaths()):
+    """
+    Ingest step: reads the raw zip (or DOHMH API) once and writes the typed snapshot the pages load from,
+    then everything derived from it to paths (see support/derived.py): the latest inspection per restaurant
+    (with its area scores), the spatial and search indexes over it, the aggregates the EDA page renders from,
+    the monthly score trends over the full history and the content-hashed map assets the Map page references.
+    The zip is streamed in chunks of chunk_size records to bound memory; pass None to use pd.read_json.
+    With paths.sweep, the DBSCAN parameter sweep of the Cluster page is also run and stored there.
+    """
+    start = time.perf_counter()
+    data = read_map_data(file_path, from_nyc_db=from_nyc_db, snapshot_path=None, chunk_size=chunk_size)
+    write_snapshot(data, snapshot_path)
+    print(f"Wrote {len(data)} rows to {snapshot_path} in {time.perf_counter() - start:.2f}s")
+
+    write_derived(data, build_latest_inspections(data), paths)
+    return data
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the data snapshot used by the Streamlit pages.")
+    parser.add_argument("--file-path", default="data/data.zip")
+    parser.add_argument("--snapshot-path", default=SNAPSHOT_PATH)
+    parser.add_argument("--latest-path", default=DerivedPaths.latest)
+    parser.add_argument("--index-path", default=DerivedPaths.index)
+    parser.add_argument("--eda-path", default=DerivedPaths.eda)
+    parser.add_argument("--trends-path", default=DerivedPaths.trends)
+    parser.add_argument("--search-path", default=DerivedPaths.search)
+    parser.add_argument("--assets-dir", default=DerivedPaths.assets)
+    parser.add_argument("--from-nyc-db", action="store_true")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Records per chunk when streaming the zip (0 to disable)")
+    parser.add_argument("--sync", action="store_true", help="Incrementally sync the snapshot with the DOHMH API")
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--watermark", help="Only fetch rows with a record date after this timestamp")
+    parser.add_argument("--dbscan-sweep", action="store_true", help="Also precompute the DBSCAN parameter sweep of the Cluster page")
+    parser.add_argument("--sweep-path", default=SWEEP_PATH)
+    parser.add_argument("--clusters-path", default=DerivedPaths.clusters, help="Incremental DBSCAN labels, started with the sweep")
+    args = parser.parse_args()
+    paths = DerivedPaths(args.latest_path, args.index_path, args.search_path, args.eda_path, args.trends_path, args.assets_dir,
+                         args.sweep_path if args.dbscan_sweep else None, args.clusters_path)
+    if args.sync:
+        stats = sync_from_nyc_db(args.snapshot_path, page_size=args.page_size, watermark=args.watermark, paths=paths)
+        # Without new rows nothing was rewritten, the sweep is still run when asked for
+        if paths.sweep and not stats['rows_fetched']:
+            write_clusters(read_latest_inspections(paths.latest), paths)
+    else:
+        build_data(args.file_path, args.snapshot_path, args.from_nyc_db, args.chunk_size, paths)
@@ -5,11 +5,12 @@ import datetime as dt
 import pydeck as pdk
 import json
 import streamlit.components.v1 as components
-from support.data_cleaner import read_map_data
-from support.df_utils import map_dataframe_to_serializable_list
+from support.assets import asset_url, load_map_assets, render_map_template
 from support.cluster import filter_valid_inspection_data, geospatial_preprocessing, dbscan_clustering
 from support.df_utils import get_column_size
-from support.maPy import format_cluster_map
+from support.maPy import summarize_clusters
+from support.search import load_search_index
+from support.trends import load_score_trends
 
 # ---- Define Config ---- #
 st.set_page_config(page_title="Mapping Out New York City Restaurants", page_icon=':world_map:', layout='wide')
@@ -33,16 +34,6 @@ with st.container():
     """)
     
 
-# ---- Data ---- #
-data = read_map_data(r"data/data.zip", from_nyc_db=False) # Change to True in production to avoid need for stored data
-      
-# Sort by restaurant and inspection date descending
-data = data.sort_values(by=['camis', 'inspection date'], ascending=[True, False])
-
-# Keep only the most recent inspection per restaurant
-# COMMENT OUT TO RETURN TO ALL VALUES
-#data = data.drop_duplicates(subset='camis', keep='first')
-
 # ---- Leaflet Map ---- #
 with st.container():
     st.write("---")
@@ -53,16 +44,50 @@ with st.container():
                 You can click on each marker to view detailed information about the restaurant, including its name, inspection date, and any recorded violations.""")
     st.markdown("""The heatmap displays areas with higher and lower average health scores, providing a quick visual representation of regions with better or worse overall hygiene. The gradient on this heatmap ranges from green to red, coinciding with health inspection scores. NYC uses golf rules for these inspection scores, so the lower the better! From this we can see hot spots that update and render as increase zoom levels on our map.""")
     
-    map_data = data[(data['latitude'] != 0) & (data['longitude'] != 0)].dropna(subset=['latitude', 'longitude'])
-    # Read html file
-    with open("templates/test.html", 'r', encoding='utf-8') as file:
-        source = file.read()
-    # Pass markers data to HTML Template and render
-    markers_data = map_dataframe_to_serializable_list(df=map_data[['latitude', 'longitude', 'dba', 'inspection date', 'violation description', 'score']], 
-                                                    date_cols=['inspection date'], sort_cols=['inspection date'], 
-                                                    fill_na_cols={'violation description':'No violations recorded.', 'score': 0})
-    source = source.replace("{{ markers_data|tojson }}", json.dumps(markers_data))
+    # Queries are answered in Python over the index stored at ingest time (see support/search.py); only the
+    # restaurant picked is passed to the map, which opens on its marker
+    focus = None
+    query = st.text_input("Search restaurants by name, address or cuisine").strip()
+    if query:
+        matches = load_search_index(r"data/data.zip").search(query)
+        if matches.empty:
+            st.write(f"No restaurants found for '{query}'.")
+        else:
+            position = st.selectbox("Matches", range(len(matches)),
+                                    format_func=lambda i: f"{matches['dba'].iloc[i]} ({matches['address'].iloc[i]})")
+            picked = matches.iloc[position]
+            focus = {'camis': int(picked['camis']), 'lat': float(picked['latitude']), 'lon': float(picked['longitude'])}
+
+    # The marker payload, the tiles in view and the inspection history shards popups fetch are content-hashed
+    # files Streamlit serves from static/ (see support/assets.py), on the origin the page came from, so a rerun
+    # only sends the template with their urls and the browser keeps them cached
+    assets = load_map_assets(r"data/data.zip")
+    source = render_map_template(asset_url(assets['markers']), asset_url(assets['history']), assets['history_shards'],
+                                 asset_url(assets['tiles']), focus)
     components.html(source, height=700)
+
+# ---- Score Trends ---- #
+with st.container():
+    st.write("---")
+    st.subheader("Score Trends")
+    st.markdown("""The map shows where restaurants stand today. Pick a zip code, or enter the CAMIS of a restaurant from its map popup, to see how its inspection scores moved over the full inspection history, month by month and averaged over the trailing 12 months.""")
+
+    # Precomputed at ingest time (see support/trends.py), so a lookup only slices arrays
+    trends = load_score_trends(r"data/data.zip")
+    trend_option = st.radio("Show the trend of a:", ('Zip code', 'Restaurant'), horizontal=True)
+    if trend_option == 'Zip code':
+        zipcode = st.selectbox("Zip code", trends.keys('zipcode'))
+        trend = trends.trend('zipcode', zipcode)
+    else:
+        camis = st.text_input("Restaurant CAMIS").strip()
+        trend = trends.trend('restaurant', int(camis)) if camis.isdigit() else None
+        if trend is not None:
+            # Single restaurants are only inspected a few times a year
+            trend = trend[trend['inspections'] > 0]
+        elif camis:
+            st.write(f"No inspections found for CAMIS {camis}.")
+    if trend is not None:
+        st.line_chart(trend[['average score', 'rolling average score']])
    
 # ---- Pydeck Map --- #
 with st.container():
@@ -72,6 +97,8 @@ with st.container():
     # If dataframe exists
     if 'DBSCAN_df' in st.session_state:
         df = st.session_state['DBSCAN_df']
+        # Summaries the Cluster page computed for its clusterings
+        summaries = st.session_state.get('DBSCAN_summaries') or summarize_clusters(df)
         
         # Radio button
         data_option = st.radio(
@@ -80,16 +107,12 @@ with st.container():
             index=0 # Default selection
         )
         if data_option == 'Euclidean':
-            cluster_df = format_cluster_map(df)
+            cluster_df = summaries['euclidean_cluster']
             radius = 'euclidean_cluster_size'
         else:
-            cluster_df = format_cluster_map(df, cluster_col='haversine_cluster', size_col='haversine_cluster_size')
+            cluster_df = summaries['haversine_cluster']
             radius = 'haversine_cluster_size'
         
-        # Get Dataframes
-        euclidean_df_clusters = format_cluster_map(df)
-        haversine_df_clusters = format_cluster_map(df, cluster_col='haversine_cluster', size_col='haversine_cluster_size')
-        
         # Select color mappings
         selected_colors = st.multiselect(
             "Select score levels to display",
@@ -127,7 +150,7 @@ with st.container():
         st.pydeck_chart(pdk.Deck(
             layers=[layer],
             initial_view_state=view_state,
-            tooltip={"text":"Cluster: {euclidean_cluster}\nScore: {score}\nSize: {euclidean_cluster_size}"} if data_option == 'Euclidean' else {"text":"Cluster: {haversine_cluster}\nScore: {score}\nSize: {haversine_cluster_size}"}
+            tooltip={"text":"Cluster: {euclidean_cluster}\nScore: {score}\nSize: {euclidean_cluster_size}\nArea score (250 m / 500 m / 1 km): {area_score_250m} / {area_score_500m} / {area_score_1000m}"} if data_option == 'Euclidean' else {"text":"Cluster: {haversine_cluster}\nScore: {score}\nSize: {haversine_cluster_size}\nArea score (250 m / 500 m / 1 km): {area_score_250m} / {area_score_500m} / {area_score_1000m}"}
         ))
     else:
         st.markdown("""
@@ -1,19 +1,21 @@
 import streamlit as st
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
-from collections import Counter
-from support.data_cleaner import read_map_data
+from support.charts import aggregates_version, load_eda_charts
+from support.eda import load_eda_aggregates
+from support.trends import ROLLING_MONTHS, load_score_trends
 
 st.set_page_config(page_title="EDA", page_icon=':bar_chart:', layout='wide')
 
 st.title("Exploratory Data Analysis (EDA)")
 
-# Load dataset
-data = read_map_data(r"data/data.zip", from_nyc_db=False)
+# Load the aggregates built at ingest time, the page never touches the inspection rows
+eda = load_eda_aggregates(r"data/data.zip")
 
-# Convert inspection date to datetime
-data["inspection date"] = pd.to_datetime(data["inspection date"], errors="coerce")
+# Charts are drawn once per version of the aggregates in a background process, the page only shows the images
+charts = load_eda_charts(eda, aggregates_version(eda))
+
+# Monthly score trends over the full inspection history, also precomputed at ingest time
+trends = load_score_trends(r"data/data.zip")
 
 with st.container():
     st.markdown(
@@ -43,14 +45,11 @@ with st.container():
 Here is a brief preview of the dataset, which has been randomly sampled to show a variety of restaurants and their inspection results, but is otherwise unaltered.
         """
     )
-sampled_data = data.sample(n=10, random_state=42)
-st.write(sampled_data)
+st.write(eda['sample'])
 
 
-# Overall health score distribution
-unique_df = data.sort_values(by=['camis', 'inspection date'], ascending=[True, False])
-most_recent = unique_df.drop_duplicates(subset='camis', keep='first')
-summary_df = most_recent[['score', 'boro']]
+# Overall health score distribution, from the number of restaurants at each most recent score
+score_counts = eda['score_counts']
 st.subheader("Overall Distribution of Health Scores")
 with st.container():
     st.markdown(
@@ -62,16 +61,11 @@ Keep in mind, a **lower** score corresponds to **fewer** health code violations
         """
     )
 # Plot the distribution of health scores
-fig, ax = plt.subplots(figsize=(8, 4))
-sns.histplot(pd.to_numeric(summary_df["score"].dropna(), errors='coerce'), bins=30, kde=False, ax=ax)
-ax.set_xlabel("Inspection Score")
-ax.set_ylabel("Count")
-ax.set_title("Overall Distribution of Inspection Scores")
-st.pyplot(fig)
+st.image(charts['score_histogram'], use_container_width=True)
 
-average_score = summary_df["score"].mean()
-failing = summary_df[summary_df["score"] > 28].shape[0]
-high_score = summary_df[summary_df["score"] == 10].shape[0]
+average_score = (score_counts.index.to_numpy(dtype=int) * score_counts.to_numpy()).sum() / score_counts.sum()
+failing = score_counts[score_counts.index > 28].sum()
+high_score = score_counts[score_counts.index == 10].sum()
 st.markdown(
     """
     We see that the distribution is right-skewed, with a long tail of restaurants that have high scores. 
@@ -91,61 +85,8 @@ with st.container():
     A violation code of 'None' indicates that there were no violations recorded during the inspection and these instances were not included in this chart.
         """
     )
-violation_severity_map = {
-    '02A': 'Critical',
-    '02B': 'Critical', '02C': 'Critical',
-    '02D': 'Critical', '02E': 'Critical',
-    '02F': 'Critical', '02G': 'Critical',
-    '02H': 'Critical', '02I': 'Critical',
-    '02J': 'Critical', '03A': 'Critical',
-    '03B': 'Critical', '03C': 'Critical',
-    '03D': 'Critical', '03E': 'Critical',
-    '03F': 'Critical', '03G': 'Critical',
-    '04A': 'Critical', '04B': 'Critical',
-    '04C': 'Critical', '04D': 'Critical',
-    '04E': 'Critical', '04F': 'Critical',
-    '04G': 'Critical', '04H': 'Critical',
-    '04I': 'Critical', '04J': 'Critical',
-    '04K': 'Critical', '04L': 'Critical',
-    '04M': 'Critical', '04N': 'Critical',
-    '04O': 'Critical', '05A': 'Critical',
-    '05B': 'Critical', '05C': 'Critical',
-    '05D': 'Critical', '05E': 'Critical',
-    '05F': 'Critical', '05G': 'Critical',
-    '05H': 'Critical', '05I': 'Critical',
-    '06A': 'Critical', '06B': 'Critical',
-    '06C': 'Critical', '06D': 'Critical',
-    '06E': 'Critical', '06F': 'Critical',
-    '06G': 'Critical', '06H': 'Critical',
-    '06I': 'Critical', '07A': 'Critical',
-    '08A': 'General', '08B': 'General',
-    '08C': 'General', '09A': 'General',
-    '09B': 'General', '09C': 'General',
-    '10A': 'General', '10B': 'General',
-    '10C': 'General', '10D': 'General',
-    '10E': 'General', '10G': 'General',
-    '10H': 'General', '10I': 'General',
-    '10J': 'General', '99B': 'General Other'
-}
-
-# Add a severity level column to most_recent
-most_recent['violation_severity'] = most_recent['violation code'].map(violation_severity_map)
-severity_score_df = most_recent.dropna(subset=['violation_severity', 'score'])
-
 # Plot: Distribution of inspection scores by violation severity
-fig, ax = plt.subplots(figsize=(8, 4))
-sns.histplot(
-    data=severity_score_df,
-    x='score',
-    hue='violation_severity',
-    multiple='stack',
-    bins=30,
-    palette='Set1'
-)
-ax.set_title("Distribution of Inspection Scores by Violation Severity")
-ax.set_xlabel("Inspection Score")
-ax.set_ylabel("Number of Restaurants")
-st.pyplot(fig)
+st.image(charts['severity_histogram'], use_container_width=True)
 
 
 # Summary statistics for score by borough
@@ -156,31 +97,11 @@ with st.container():
 We have provided some basic summary statistics for health inspection scores grouped by borough. These results again reflect only the *most recent* score for a given restaurant.
         """
     )
-grouped_stats = summary_df.groupby('boro').agg({"score": ["count", "mean", "median", "min", "max", "std"]})
-grouped_stats = grouped_stats.rename(columns={'count': 'Count', 'mean': 'Mean', 'median': 'Median', 'min': 'Min', 'max': 'Max', 'std': 'Std'})
-grouped_stats = grouped_stats.dropna()
-grouped_stats.columns = grouped_stats.columns.droplevel(0)
-grouped_stats = grouped_stats.rename_axis("Borough")
-grouped_stats = grouped_stats.round(2)
+grouped_stats = eda['borough_stats']
 st.write(grouped_stats)
 
-# Average health score by borough
-avg_score_boro = (
-    most_recent[['boro', 'score']]
-    .dropna()
-    .groupby('boro', as_index=False)
-    .mean(numeric_only=True)
-    .rename(columns={'score': 'average_score'})
-    .sort_values(by='average_score', ascending=True)
-)
-# Plot
-fig, ax = plt.subplots(figsize=(8, 4))
-sns.barplot(data=avg_score_boro, x='boro', y='average_score', palette='PuBu', ax=ax)
-ax.set_xlabel("Borough")
-ax.set_ylabel("Average Health Score")
-ax.set_title("Average Most Recent Health Score by Borough")
-ax.tick_params(axis='x', rotation=45)
-st.pyplot(fig)
+# Plot: Average health score by borough
+st.image(charts['borough_means'], use_container_width=True)
 
 
 # Summary statistics for score by cuisine
@@ -194,23 +115,8 @@ The lowest average score is for 'Haute Cuisine', which is a type of expsensive F
 "Grab and go" cuisines, like pretzels, hot dogs, and donuts, also seem to have relatively low average scores.
         """
     )
-# Average health score by cuisine description
-avg_score_cuisine = (
-    most_recent[['cuisine description', 'score']]
-    .dropna()
-    .groupby('cuisine description', as_index=False)
-    .mean(numeric_only=True)
-    .rename(columns={'score': 'average_score'})
-    .sort_values(by='average_score', ascending=True)
-)
-# Plot
-fig, ax = plt.subplots(figsize=(8, 4))
-sns.barplot(data=avg_score_cuisine, x='cuisine description', y='average_score', palette='PuBu', ax=ax)
-ax.set_xlabel("Cuisine Description")
-ax.set_ylabel("Average Health Score")
-ax.set_title("Average Most Recent Health Score by Cuisine")
-ax.tick_params(axis='x', rotation=90, labelsize=4)
-st.pyplot(fig)
+# Plot: Average health score by cuisine description
+st.image(charts['cuisine_means'], use_container_width=True)
 
 
 # Correlation analysis 
@@ -224,27 +130,8 @@ Categorical features have been numerically encoded for this analysis.
         """
     )
 
-# Select relevant columns for correlation analysis
-correlation_data = most_recent[['score', 'zipcode', 'cuisine description', 'boro']].dropna()
-for col in ['cuisine description', 'boro']:
-    correlation_data[col] = correlation_data[col].astype('category').cat.codes
-correlation_matrix = correlation_data.corr(method='spearman')
-
-# Plot the correlation matrix
-fig, ax = plt.subplots(figsize=(5, 5))
-sns.heatmap(
-    correlation_matrix,
-    annot=True,
-    fmt=".2f",
-    cmap="vlag",
-    ax=ax,
-    annot_kws={"size": 8},
-    cbar_kws={"shrink": 0.8}
-)
-ax.set_title("Correlation Matrix", fontsize=10)
-ax.tick_params(axis='x', labelrotation=45, labelsize=5)
-ax.tick_params(axis='y', labelrotation=45, labelsize=5)
-st.pyplot(fig)
+# Plot the Spearman correlation matrix of the numerically encoded features
+st.image(charts['correlation'], use_container_width=True)
 
 st.markdown(
     """
@@ -254,3 +141,33 @@ st.markdown(
     The most significant correlation is between borough and zip code, which are inherently correlated because they both indicate similar physical locations.
     """
 )
+
+
+# Score trends over the full inspection history
+st.subheader("Score Trends Over Time")
+with st.container():
+    st.markdown(
+        """
+Every analysis above keeps only the *most recent* score of a restaurant. The full dataset also holds every earlier inspection, so here we follow scores over time.
+The lines show the average inspection score over a trailing window of months, which smooths out the month to month noise of the inspection schedule.
+        """
+    )
+window = st.slider("Rolling window (months)", min_value=1, max_value=24, value=ROLLING_MONTHS)
+
+# Plot: Rolling average score by borough
+st.line_chart(trends.rolling_scores('borough', window=window))
+
+# Plot: Share of grade changes that improved or declined the grade, city wide
+st.markdown(
+    """
+    Restaurants move between grades from one graded inspection to the next. Below is the share of those grade changes over the same window that **improved** the grade (*e.g.*, from a B to an A) and the share that **declined** it; the rest kept their grade.
+    """
+)
+city = trends.trend('city', window=window)
+st.line_chart(city[['improved', 'declined']])
+
+# Plot: Trend of a single zip code
+zipcode = st.selectbox("Zip code", trends.keys('zipcode'))
+zipcode_trend = trends.trend('zipcode', zipcode, window)
+st.line_chart(zipcode_trend[['average score', 'rolling average score']])
+st.write(f"Zip code **{zipcode}** has had **{zipcode_trend['inspections'].sum()}** scored inspections since {zipcode_trend.index[0]:%B %Y}.")
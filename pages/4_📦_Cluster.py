@@ -5,7 +5,9 @@ import datetime as dt
 import pydeck as pdk
 from support.cluster import filter_valid_inspection_data, geospatial_preprocessing, dbscan_clustering
 from support.df_utils import get_column_size
-from support.maPy import format_cluster_map
+from support.incremental import load_incremental_clusters
+from support.maPy import cluster_summaries
+from support.sweep import SWEEP_EPS_KM, SWEEP_MIN_SAMPLES, SWEEP_SCORE_WEIGHTS, load_dbscan_sweep, sweep_clustering, sweep_fingerprint
 
 st.set_page_config(page_title="DBSCAN", page_icon='📦', layout='wide')
 
@@ -90,11 +92,24 @@ with st.container():
     st.write("---")
     st.header("Clustering with DBSCAN")
     st.write("Let's apply our clustering algorithm, defining our min_samples as 4 neighbors (5 including the point itself), and ε corresponding to 1 kilometer distance. What will be the results?")
+    st.write("Feel free to change the hyperparameters below and see how the clusters respond!")
+    
+    # Hyperparameters, looked up from the precomputed sweep when it matches our data, or from the labels syncs keep up to date
+    sweep, clusters = load_dbscan_sweep(), load_incremental_clusters()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        euclidean_km = st.select_slider("Euclidean ε (km)", options=SWEEP_EPS_KM, value=0.5)
+    with col2:
+        haversine_km = st.select_slider("Haversine ε (km)", options=SWEEP_EPS_KM, value=0.03)
+    with col3:
+        min_samples = st.select_slider("min_samples", options=SWEEP_MIN_SAMPLES, value=5)
+    with col4:
+        score_weight = st.select_slider("Score weight (Euclidean)", options=SWEEP_SCORE_WEIGHTS, value=0.1)
     
     # Get Haversine Distance and clusters
-    haversine_clusters, haversine_cluster_size = dbscan_clustering(data_radians, eps*0.03, min_samples=5, metric='haversine')
+    haversine_clusters, haversine_cluster_size = sweep_clustering(data, 'haversine', haversine_km, min_samples, None, sweep, clusters)
     # Get Euclidean Distance and clusters
-    euclidean_clusters, euclidean_cluster_size = dbscan_clustering(data_radians, eps*.5, min_samples=5, metric='euclidean')
+    euclidean_clusters, euclidean_cluster_size = sweep_clustering(data, 'euclidean', euclidean_km, min_samples, score_weight, sweep, clusters)
     
     # Append to dataframe
     df = data.copy()
@@ -141,6 +156,9 @@ with st.container():
     st.write("---")
     st.header("Mapping out Clusters of Euclidean vs. Haversine metric")
     
+    # Summaries of both clusterings, computed once per clustering result
+    summaries = cluster_summaries(df, euclidean_clusters, haversine_clusters, sweep_fingerprint(data))
+    
     # Radio button
     data_option = st.radio(
         "Choose a Method:",
@@ -148,16 +166,12 @@ with st.container():
         index=0 # Default selection
     )
     if data_option == 'Euclidean':
-        cluster_df = format_cluster_map(df)
+        cluster_df = summaries['euclidean_cluster']
         radius = 'euclidean_cluster_size'
     else:
-        cluster_df = format_cluster_map(df, cluster_col='haversine_cluster', size_col='haversine_cluster_size')
+        cluster_df = summaries['haversine_cluster']
         radius = 'haversine_cluster_size'
     
-    # Get Dataframes
-    euclidean_df_clusters = format_cluster_map(df)
-    haversine_df_clusters = format_cluster_map(df, cluster_col='haversine_cluster', size_col='haversine_cluster_size')
-    
     # Select color mappings
     selected_colors = st.multiselect(
         "Select score levels to display",
@@ -195,7 +209,7 @@ with st.container():
     st.pydeck_chart(pdk.Deck(
         layers=[layer],
         initial_view_state=view_state,
-        tooltip={"text":"Cluster: {euclidean_cluster}\nScore: {score}\nSize: {euclidean_cluster_size}"} if data_option == 'Euclidean' else {"text":"Cluster: {haversine_cluster}\nScore: {score}\nSize: {haversine_cluster_size}"}
+        tooltip={"text":"Cluster: {euclidean_cluster}\nScore: {score}\nSize: {euclidean_cluster_size}\nArea score (250 m / 500 m / 1 km): {area_score_250m} / {area_score_500m} / {area_score_1000m}"} if data_option == 'Euclidean' else {"text":"Cluster: {haversine_cluster}\nScore: {score}\nSize: {haversine_cluster_size}\nArea score (250 m / 500 m / 1 km): {area_score_250m} / {area_score_500m} / {area_score_1000m}"}
     ))
     
 # ---- Conclusions ---- #
@@ -208,4 +222,5 @@ with st.container():
     """)
 
 st.session_state['DBSCAN_df'] = df
+st.session_state['DBSCAN_summaries'] = summaries
 
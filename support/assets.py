@@ -0,0 +1,171 @@
+import streamlit as st
+import pandas as pd
+import hashlib
+import json
+import os
+import re
+import shutil
+from support.dataset import get_dataset, get_latest_inspections
+from support.history import HistoryIndex
+from support.markers import encode_marker_payload, marker_columns
+from support.tiles import MAX_ZOOM, MIN_ZOOM, TILE_FORMAT, build_tiles, tile_files
+
+# Streamlit serves the files under static/ next to the app at /app/static/ (server.enableStaticServing in
+# .streamlit/config.toml), so the map fetches its data from the origin the page came from
+STATIC_DIR = "static"
+ASSETS_DIR = "static/map"
+MANIFEST_NAME = "manifest.json"
+# Entries of a current manifest; one written by an older version of this module is rebuilt
+MANIFEST_KEYS = {'markers', 'history', 'history_shards', 'tiles', 'tile_format'}
+TEMPLATE_PATH = "templates/test.html"
+# name.<hash>.ext files and name.<hash> directories, the only assets pruned
+ASSET_NAME = re.compile(r'^[a-z]+\.[0-9a-f]{16}(\.[a-z]+)?$')
+
+
+def asset_name(name, data):
+    """
+    Content-hashed file name of an asset: markers.bin becomes markers.<first 16 hex digits of its sha256>.bin.
+    """
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:16]}{ext}"
+
+def write_file(path, data):
+    # Write to a temporary file first so the browser never gets a half written asset
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def write_asset(data, name, assets_dir=ASSETS_DIR):
+    """
+    Writes data under its content-hashed name and returns the name.
+    An asset already written is left as it is, its name pins its content.
+    """
+    os.makedirs(assets_dir, exist_ok=True)
+    hashed = asset_name(name, data)
+    path = os.path.join(assets_dir, hashed)
+    if not os.path.exists(path):
+        write_file(path, data)
+    return hashed
+
+def write_asset_dir(files, name, assets_dir=ASSETS_DIR):
+    """
+    Writes files, {relative path: data}, into a directory named after the hash of all of them: history becomes
+    history.<first 16 hex digits of the sha256>. Returns the name; a directory already written is left as it is.
+    """
+    digest = hashlib.sha256()
+    for path in sorted(files):
+        digest.update(f"{path}\0".encode('utf-8') + hashlib.sha256(files[path]).digest())
+    hashed = f"{name}.{digest.hexdigest()[:16]}"
+    directory = os.path.join(assets_dir, hashed)
+    if not os.path.isdir(directory):
+        # Fill a temporary directory first so the browser never sees part of one
+        tmp_dir = f"{directory}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        for path, data in files.items():
+            os.makedirs(os.path.dirname(os.path.join(tmp_dir, path)), exist_ok=True)
+            with open(os.path.join(tmp_dir, path), 'wb') as f:
+                f.write(data)
+        os.replace(tmp_dir, directory)
+    return hashed
+
+def manifest_assets(manifest):
+    """
+    Names of the assets a manifest points to, leaving out its other entries such as the history shard count.
+    """
+    return {value for value in manifest.values() if isinstance(value, str)}
+
+def asset_url(name, assets_dir=ASSETS_DIR, static_dir=STATIC_DIR):
+    """
+    Url of an asset on Streamlit's own origin, under the app's base url path if it has one.
+    The content hash of the name is passed again as the v argument, for which Tornado's static file
+    handler sends a ten year max-age, so the browser reuses the asset without revalidating it on reruns.
+    The template keeps the argument on the files it fetches from asset directories.
+    """
+    path = os.path.relpath(os.path.join(assets_dir, name), static_dir).replace(os.sep, '/')
+    base = st.get_option("server.baseUrlPath").strip('/')
+    url = f"/{base}/app/static/{path}" if base else f"/app/static/{path}"
+    return f"{url}?v={name.split('.')[1]}"
+
+def render_map_template(markers_url, history_url, history_shards, tiles_url, focus=None, template_path=TEMPLATE_PATH):
+    """
+    The Leaflet template with its placeholders filled; the marker payload is fetched from markers_url
+    rather than inlined, popups fetch history_url/<camis % history_shards>.json and the map the tiles in
+    view from tiles_url/<z>/<x>/<y>.json. focus, a {'camis', 'lat', 'lon'} dict of the restaurant picked
+    in the page's search box, opens the map on its marker.
+    """
+    with open(template_path, 'r', encoding='utf-8') as f:
+        source = f.read()
+    source = source.replace("{{ markers_data|tojson }}", f"fetchMarkerPayload({json.dumps(markers_url)})")
+    source = source.replace("{{ history_url }}", history_url)
+    source = source.replace("{{ history_shards }}", str(history_shards))
+    source = source.replace("{{ focus }}", json.dumps(focus))
+    source = source.replace("{{ tiles_url }}", tiles_url)
+    return source.replace("{{ tile_zooms }}", json.dumps([MIN_ZOOM, MAX_ZOOM]))
+
+
+def write_map_assets(data, latest, assets_dir=ASSETS_DIR):
+    """
+    Build step of the map data: writes the binary marker payload (see support/markers.py), the inspection
+    history shards (see support/history.py) and the map tiles (see support/tiles.py) as content-hashed assets,
+    then the manifest naming the current version of each and the format of the tiles.
+    The Map page renders the Leaflet template with the url of every asset, which Streamlit serves from
+    static/ (see asset_url). Assets of versions older than the one replaced are removed.
+    Returns the manifest.
+    """
+    shards = HistoryIndex(data).shards()
+    history = write_asset_dir({f"{shard}.json": json.dumps(body, separators=(',', ':')).encode('utf-8')
+                               for shard, body in enumerate(shards)}, 'history', assets_dir)
+    columns, names = marker_columns(data, latest)
+    tiles = build_tiles(pd.DataFrame(columns))
+    manifest = {'markers': write_asset(encode_marker_payload(columns, names), 'markers.bin', assets_dir),
+                'history': history, 'history_shards': len(shards),
+                'tiles': write_asset_dir(tile_files(tiles), 'tiles', assets_dir), 'tile_format': TILE_FORMAT}
+    previous = read_asset_manifest(assets_dir)
+    if manifest != previous:
+        write_asset_manifest(manifest, assets_dir)
+        prune_assets(assets_dir, keep=manifest_assets(manifest) | manifest_assets(previous or {}))
+    return manifest
+
+def write_asset_manifest(manifest, assets_dir=ASSETS_DIR):
+    """
+    Stores the names of the current assets.
+    """
+    path = os.path.join(assets_dir, MANIFEST_NAME)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+    return path
+
+def read_asset_manifest(assets_dir=ASSETS_DIR):
+    """
+    Reads the names of the current assets, or None if none have been written yet.
+    """
+    path = os.path.join(assets_dir, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def prune_assets(assets_dir, keep):
+    """
+    Removes the assets whose names are not in keep. Pages still open on the previous version keep working
+    as long as its names are kept too.
+    """
+    for name in os.listdir(assets_dir):
+        if ASSET_NAME.match(name) and name not in keep:
+            path = os.path.join(assets_dir, name)
+            shutil.rmtree(path) if os.path.isdir(path) else os.remove(path)
+
+@st.cache_resource
+def load_map_assets(file_path="data/data.zip", assets_dir=ASSETS_DIR):
+    """
+    Names of the current map assets, checked once per process. The assets written at ingest time
+    (see build_data.py) are built from the dataset if they are missing or their tiles are in an older format.
+    """
+    manifest = read_asset_manifest(assets_dir)
+    if (manifest is None or not MANIFEST_KEYS <= manifest.keys() or manifest['tile_format'] != TILE_FORMAT
+            or not all(os.path.exists(os.path.join(assets_dir, name)) for name in manifest_assets(manifest))):
+        return write_map_assets(get_dataset(file_path), get_latest_inspections(file_path), assets_dir)
+    return manifest
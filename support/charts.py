@@ -0,0 +1,191 @@
+import streamlit as st
+import pandas as pd
+import hashlib
+import io
+import os
+import pickle
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+
+CHARTS_DIR = "data/charts"
+# Repo root, so the renderer can be started as a module from any working directory
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Directories of finished versions, the only ones pruned; renderers write into their own temporary directories
+VERSION_NAME = re.compile(r'^[0-9a-f]{16}$')
+# Charts of the EDA page, in the order it shows them
+EDA_CHARTS = ('score_histogram', 'severity_histogram', 'borough_means', 'cuisine_means', 'correlation')
+
+
+def aggregates_version(aggregates):
+    """
+    Content hash of the EDA aggregates (see support/eda.py), which names the charts rendered from them.
+    Frames are hashed on their values, index and labels; their pickles are not stable between processes.
+    """
+    digest = hashlib.sha1()
+    for key in sorted(aggregates):
+        value = aggregates[key]
+        digest.update(key.encode())
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            labels = value.columns.tolist() if isinstance(value, pd.DataFrame) else value.name
+            digest.update(repr((labels, value.index.names, str(value.dtypes))).encode())
+            digest.update(pd.util.hash_pandas_object(value).to_numpy().tobytes())
+        else:
+            digest.update(repr(value).encode())
+    return digest.hexdigest()[:16]
+
+def iter_eda_charts(aggregates):
+    """
+    Draws the EDA charts from the aggregates one at a time, yielding each one's name and PNG bytes,
+    saved as st.pyplot saves them. matplotlib is imported here, so only the process drawing loads it.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    def png(fig):
+        image = io.BytesIO()
+        fig.savefig(image, bbox_inches='tight', dpi=200, format='png')
+        plt.close(fig)
+        return image.getvalue()
+
+    # Overall distribution of the most recent scores, from the number of restaurants at each score
+    score_counts = aggregates['score_counts']
+    fig, ax = plt.subplots(figsize=(8, 4))
+    sns.histplot(x=score_counts.index, weights=score_counts.to_numpy(), bins=30, kde=False, ax=ax)
+    ax.set_xlabel("Inspection Score")
+    ax.set_ylabel("Count")
+    ax.set_title("Overall Distribution of Inspection Scores")
+    yield 'score_histogram', png(fig)
+
+    # Distribution of inspection scores by violation severity
+    fig, ax = plt.subplots(figsize=(8, 4))
+    sns.histplot(
+        data=aggregates['severity_counts'],
+        x='score',
+        hue='violation_severity',
+        weights='count',
+        multiple='stack',
+        bins=30,
+        palette='Set1'
+    )
+    ax.set_title("Distribution of Inspection Scores by Violation Severity")
+    ax.set_xlabel("Inspection Score")
+    ax.set_ylabel("Number of Restaurants")
+    yield 'severity_histogram', png(fig)
+
+    # Average most recent score by borough
+    fig, ax = plt.subplots(figsize=(8, 4))
+    sns.barplot(data=aggregates['borough_means'], x='boro', y='average_score', palette='PuBu', ax=ax)
+    ax.set_xlabel("Borough")
+    ax.set_ylabel("Average Health Score")
+    ax.set_title("Average Most Recent Health Score by Borough")
+    ax.tick_params(axis='x', rotation=45)
+    yield 'borough_means', png(fig)
+
+    # Average most recent score by cuisine
+    fig, ax = plt.subplots(figsize=(8, 4))
+    sns.barplot(data=aggregates['cuisine_means'], x='cuisine description', y='average_score', palette='PuBu', ax=ax)
+    ax.set_xlabel("Cuisine Description")
+    ax.set_ylabel("Average Health Score")
+    ax.set_title("Average Most Recent Health Score by Cuisine")
+    ax.tick_params(axis='x', rotation=90, labelsize=4)
+    yield 'cuisine_means', png(fig)
+
+    # Correlation matrix
+    fig, ax = plt.subplots(figsize=(5, 5))
+    sns.heatmap(
+        aggregates['correlation'],
+        annot=True,
+        fmt=".2f",
+        cmap="vlag",
+        ax=ax,
+        annot_kws={"size": 8},
+        cbar_kws={"shrink": 0.8}
+    )
+    ax.set_title("Correlation Matrix", fontsize=10)
+    ax.tick_params(axis='x', labelrotation=45, labelsize=5)
+    ax.tick_params(axis='y', labelrotation=45, labelsize=5)
+    yield 'correlation', png(fig)
+
+def render_eda_charts(aggregates):
+    """
+    PNG bytes of every EDA chart, by name.
+    """
+    return dict(iter_eda_charts(aggregates))
+
+def write_charts(images, version, charts_dir=CHARTS_DIR):
+    """
+    Stores the chart images of one aggregates version as charts_dir/version/name.png and removes
+    those of every other finished version.
+    """
+    version_dir = os.path.join(charts_dir, version)
+    os.makedirs(charts_dir, exist_ok=True)
+
+    # Write to a temporary directory of this process first so readers never see half the charts,
+    # and renderers running at the same time never write into each other's
+    tmp_dir = tempfile.mkdtemp(prefix=f"{version}.", suffix='.tmp', dir=charts_dir)
+    for name, image in images.items():
+        with open(os.path.join(tmp_dir, f"{name}.png"), 'wb') as f:
+            f.write(image)
+    try:
+        os.replace(tmp_dir, version_dir)
+    except OSError:
+        # Another renderer stored the same version first; its charts are kept unless some are missing
+        if read_charts(version, charts_dir, images) is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        else:
+            shutil.rmtree(version_dir, ignore_errors=True)
+            os.replace(tmp_dir, version_dir)
+
+    for other in os.listdir(charts_dir):
+        if other != version and VERSION_NAME.match(other):
+            shutil.rmtree(os.path.join(charts_dir, other), ignore_errors=True)
+    return version_dir
+
+def read_charts(version, charts_dir=CHARTS_DIR, names=EDA_CHARTS):
+    """
+    Reads the stored chart images of one aggregates version, or None if any of them is missing.
+    """
+    paths = {name: os.path.join(charts_dir, version, f"{name}.png") for name in names}
+    if not all(os.path.exists(path) for path in paths.values()):
+        return None
+    images = {}
+    for name, path in paths.items():
+        with open(path, 'rb') as f:
+            images[name] = f.read()
+    return images
+
+def render_in_background(aggregates, version, charts_dir=CHARTS_DIR):
+    """
+    Renders and stores the charts of one aggregates version in a separate process. matplotlib is not
+    thread safe, and drawing outside the server process keeps sessions from queueing behind it.
+    The aggregates go to the process on stdin; it is started fresh rather than through multiprocessing,
+    which would import the page Streamlit runs as __main__ again. If it fails, its traceback is raised here.
+    """
+    try:
+        subprocess.run([sys.executable, '-m', 'support.charts', version, os.path.abspath(charts_dir)], cwd=ROOT,
+                       input=pickle.dumps(aggregates, protocol=pickle.HIGHEST_PROTOCOL), capture_output=True, check=True)
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Rendering the EDA charts failed:\n{e.stderr.decode()}") from e
+
+@st.cache_resource
+def load_eda_charts(_aggregates, version, charts_dir=CHARTS_DIR):
+    """
+    PNG bytes of every EDA chart of one aggregates version, drawn once per version: read from
+    charts_dir when stored, otherwise rendered in a background process that stores them there.
+    Sessions asking for the same version wait for the one rendering.
+    """
+    images = read_charts(version, charts_dir)
+    if images is None:
+        render_in_background(_aggregates, version, charts_dir)
+        images = read_charts(version, charts_dir)
+    return images
+
+
+if __name__ == '__main__':
+    # Background renderer: python -m support.charts VERSION CHARTS_DIR < aggregates pickle
+    write_charts(render_eda_charts(pickle.load(sys.stdin.buffer)), sys.argv[1], sys.argv[2])
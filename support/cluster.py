@@ -5,30 +5,34 @@ import pandas as pd
 import datetime as dt
 from sklearn.cluster import DBSCAN
 from sklearn.preprocessing import MinMaxScaler
-from support.data_cleaner import read_map_data
+from support.data_cleaner import is_inspected
+from support.dataset import get_latest_inspections
+from support.dbscan import partitioned_dbscan
+from support.spatial import neighbourhood_columns
 
 
 # %% Functions
-@st.cache_data
-def filter_valid_inspection_data():
-    # Read Data
-    data = read_map_data()
-    
+def valid_inspection_rows(data):
     # Remove uninspected restaurants
-    df = data[data['inspection date'] != dt.date(1900, 1, 1)]
-    
-    # Get only most recent inspection data
+    df = data.loc[is_inspected(data['inspection date']), ['camis', 'dba', 'latitude', 'longitude', 'inspection date', 'score'] + neighbourhood_columns()]
     df.sort_values(by=['inspection date', 'camis'], ascending=[False, True], inplace=True)
-    df = df.drop_duplicates(subset='camis', keep='first')
     
     # Append scores for restaurants with non-critical violations and remove unknown geospatial information
     df.loc[df['score'].isna(), 'score'] = 0
     df.dropna(subset=['latitude', 'longitude'], inplace=True)
     
-    return df[['camis', 'dba', 'latitude', 'longitude', 'inspection date', 'score']]
+    return df[['camis', 'dba', 'latitude', 'longitude', 'inspection date', 'score'] + neighbourhood_columns()]
 
 @st.cache_data
-def geospatial_preprocessing(df, score_weight = 0.1, km=1):
+def filter_valid_inspection_data():
+    # Most recent inspection per restaurant, materialized at ingest time
+    return valid_inspection_rows(get_latest_inspections())
+
+def km_to_rad(km):
+    # Earth's radius
+    return km/6371.0
+
+def cluster_features(df, score_weight=0.1):
     # Convert latitude and longitude to radians
     coords_rad = np.radians(df[['latitude', 'longitude']])
     
@@ -36,24 +40,36 @@ def geospatial_preprocessing(df, score_weight = 0.1, km=1):
     score_scaled = MinMaxScaler().fit_transform(df[['score']])
     
     # Combine for clustering + weight scores
-    coords_with_score = np.hstack((coords_rad, score_scaled * score_weight))
+    return np.hstack((coords_rad, score_scaled * score_weight))
+
+@st.cache_data
+def geospatial_preprocessing(df, score_weight = 0.1, km=1):
+    # Radian coordinates + weighted scores
+    coords_with_score = cluster_features(df, score_weight)
     
     # Get eps in radians based on earth geography
-    km_to_rad = lambda x: x/6371.0 # Earth's radius
     eps = km_to_rad(km) # km will now map to radian distance such that 1 km entry gives corresponding epsilon value
     
     return coords_with_score, eps
 
-@st.cache_data
-def dbscan_clustering(data, eps=.5, min_samples=5, metric='euclidean'):
+def fit_dbscan(data, eps=.5, min_samples=5, metric='euclidean', workers=1):
+    # Large inputs can be split into spatial tiles clustered by a process pool, same labels. The pages always
+    # fit with one worker, starting a pool on a rerun costs more than it saves at city scale; workers > 1 is
+    # for offline fits of larger inputs (see benchmarks/bench_partitioned_dbscan.py)
+    if workers > 1:
+        return partitioned_dbscan(data, eps, min_samples, metric, workers)
+    
     # Init DBSCAN
     db = DBSCAN(eps=eps, min_samples=min_samples, metric=metric)
     
     # Fit clusters to data
     if metric == 'haversine':
-        clusters = db.fit_predict(data[:, :2])
-    else:
-        clusters = db.fit_predict(data)
+        return db.fit_predict(data[:, :2])
+    return db.fit_predict(data)
+
+@st.cache_data
+def dbscan_clustering(data, eps=.5, min_samples=5, metric='euclidean', workers=1):
+    clusters = fit_dbscan(data, eps, min_samples, metric, workers)
 
     # Determine size of each cluster
     cluster_sizes = pd.Series(clusters).value_counts().sort_index() 
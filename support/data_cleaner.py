@@ -4,42 +4,52 @@ import zipfile
 import tempfile
 import os
 import requests
+import json
+import io
+import pyarrow as pa
+import numpy as np
+import datetime as dt
+from support.fetcher import BASE_URL, fetch_pages
+from support.snapshot import SNAPSHOT_PATH, read_snapshot
+
+# Placeholder inspection date DOHMH uses for restaurants that have not been inspected yet
+UNINSPECTED_DATE = dt.date(1900, 1, 1)
 
 @st.cache_data
-def read_map_data(file_path="data/data.zip", map_data="data.json", from_nyc_db=False):
+def read_map_data(file_path="data/data.zip", map_data="data.json", from_nyc_db=False, snapshot_path=SNAPSHOT_PATH, columns=None, chunk_size=None, compact=False):
     """
     Function that read and cleans data from the NYC Dining dataset.
     This function is cached to improve performance.
     Specify from_nyc_db = True to load directly from DOHMH DB
+    If a Parquet snapshot exists at snapshot_path it is read instead (see build_data.py); set snapshot_path=None to skip it.
+    Specify columns to only load the columns needed.
+    Specify chunk_size to stream the zip in chunks of that many records with bounded memory (see stream_map_data).
+    Specify compact = True for the low memory layout described in compact_map_data.
+    """
+    data = load_map_data(file_path, map_data, from_nyc_db, snapshot_path, columns, chunk_size)
+    return compact_map_data(data) if compact else data
+
+def load_map_data(file_path="data/data.zip", map_data="data.json", from_nyc_db=False, snapshot_path=SNAPSHOT_PATH, columns=None, chunk_size=None):
     """
+    Uncached loader behind read_map_data.
+    """
+    if snapshot_path and not from_nyc_db and os.path.exists(snapshot_path):
+        return read_snapshot(snapshot_path, columns)
+    
+    if chunk_size and not from_nyc_db:
+        try:
+            data = stream_map_data(file_path, map_data, chunk_size)
+            return data[columns] if columns is not None else data
+        except ValueError as e:
+            print(f"Could not stream {map_data}: {e}. Defaulting to pd.read_json.")
+    
     if from_nyc_db:
-        base_url = r"https://data.cityofnewyork.us/resource/43nn-pn8j.json"
-        limit = 1000
-        offset = 0
-        data = pd.DataFrame()
-        
-        # Set up a loop to paginate through data
-        while True:
-            response = requests.get(f"{base_url}?$limit={limit}&$offset={offset}")
-            
-            # Handle if no response is returned
-            if response.status_code != 200:
-                print(f"Failed to fetch data: {response.status_code}. Defaulting to stored data.")
-                return read_map_data(file_path, from_nyc_db=False)
-            
-            new_data = response.json()
-            
-            if not new_data: # No more data to retrieve
-                break
-            
-            # convert new data to dataframe
-            new_df = pd.DataFrame(new_data)
-            
-            # append to existing dataframe
-            data = pd.concat([data, new_df], ignore_index=True)
-            
-            offset += limit
-        data.columns = data.columns.str.lower()
+        # Pages are fetched concurrently over a pooled session, each retried with backoff
+        try:
+            data, _ = fetch_pages(BASE_URL, page_size=1000)
+        except requests.RequestException as e:
+            print(f"Failed to fetch data: {e}. Defaulting to stored data.")
+            return load_map_data(file_path, map_data, False, snapshot_path, columns, chunk_size)
         print(f"Total rows fetched: {len(data)}")
     else:
         # Unpack Zip File and Read Data
@@ -50,6 +60,18 @@ def read_map_data(file_path="data/data.zip", map_data="data.json", from_nyc_db=F
             # Load data
             data = pd.read_json(os.path.join(temp_dir, 'data.json')) 
         
+    data = format_map_data(data)
+    
+    if columns is not None:
+        data = data[columns]
+        
+    return data
+
+def format_map_data(data):
+    """
+    Casts the numeric columns to nullable integers and parses the date columns.
+    Shared by the zip, API and incremental sync loaders.
+    """
     # Format Data Types
     data_types = {'zipcode':pd.Int64Dtype(),
                 'phone':pd.Int64Dtype(),
@@ -65,10 +87,108 @@ def read_map_data(file_path="data/data.zip", map_data="data.json", from_nyc_db=F
             data[col] = data[col].astype(data_type)
         except Exception as e:
             print(f"Column {col} has the following error: {e}")
-        
+
+    # The API returns every field as text
+    for col in ['camis', 'latitude', 'longitude']:
+        data[col] = pd.to_numeric(data[col], errors='coerce')
+
     for col in ['inspection date', 'grade date', 'record date']:
         data[col] = pd.to_datetime(data[col]).dt.date
-        
+
     return data
-        
-        
\ No newline at end of file
+
+def iter_json_records(file_path="data/data.zip", map_data="data.json", chunk_size=50000, block_size=1 << 20):
+    """
+    Yields lists of up to chunk_size records from a JSON array of records inside the zip.
+    The member is decompressed and decoded block by block, so the whole document is never held in memory.
+    """
+    decoder = json.JSONDecoder()
+    with zipfile.ZipFile(file_path, 'r') as zip_ref, zip_ref.open(map_data) as raw:
+        stream = io.TextIOWrapper(raw, encoding='utf-8')
+        buffer = stream.read(block_size).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f"{map_data} is not a JSON array of records")
+        pos, chunk = 1, []
+
+        while True:
+            # Skip separators, reading another block when the buffer runs out
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == ']':
+                break
+            try:
+                record, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Record is split across blocks
+                block = stream.read(block_size)
+                if not block:
+                    raise ValueError(f"{map_data} ended in the middle of a record")
+                buffer, pos = buffer[pos:] + block, 0
+                continue
+
+            chunk.append(record)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+def stream_map_data(file_path="data/data.zip", map_data="data.json", chunk_size=50000):
+    """
+    Streams the zipped records in chunks, cleaning each chunk with format_map_data and appending it
+    to an Arrow table. Peak memory stays close to the final frame plus one chunk of raw records.
+    Unlike pd.read_json, columns without a declared type keep the types found in the JSON.
+    """
+    tables = []
+    for records in iter_json_records(file_path, map_data, chunk_size):
+        chunk = format_map_data(pd.DataFrame.from_records(records))
+        tables.append(pa.Table.from_pandas(chunk, preserve_index=False))
+    table = pa.concat_tables(tables, promote_options='permissive')
+    del tables
+
+    # Release Arrow buffers column by column as they are converted
+    return table.to_pandas(self_destruct=True, split_blocks=True)
+
+def compact_map_data(data, max_category_ratio=0.5):
+    """
+    Returns a low memory copy of the inspections frame:
+    - text columns repeating often enough (unique values below max_category_ratio of rows) become categoricals
+    - integer columns are downcast to the narrowest type that fits, keeping nullable types nullable
+    - coordinates become float32 and date columns native datetime64
+    """
+    data = data.copy()
+    for col in data.columns:
+        series = data[col]
+        if col in ('inspection date', 'grade date', 'record date'):
+            data[col] = pd.to_datetime(series)
+        elif col in ('latitude', 'longitude'):
+            data[col] = series.astype(np.float32)
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            data[col] = pd.to_numeric(series, downcast='integer' if (series < 0).any() else 'unsigned')
+        elif series.dtype == object and series.nunique() < max_category_ratio * len(series):
+            data[col] = series.astype('category')
+    return data
+
+def memory_report(before, after):
+    """
+    Per-column memory (MB) and dtypes of two layouts of the same frame, with a total row.
+    """
+    report = pd.DataFrame({
+        'dtype before': before.dtypes.astype(str),
+        'dtype after': after.dtypes.astype(str),
+        'MB before': before.memory_usage(deep=True, index=False) / 1024 ** 2,
+        'MB after': after.memory_usage(deep=True, index=False) / 1024 ** 2,
+    })
+    report.loc['total'] = ['', '', report['MB before'].sum(), report['MB after'].sum()]
+    report['reduction'] = report['MB before'] / report['MB after']
+    return report.round(2)
+
+def is_inspected(dates):
+    """
+    Boolean mask of real inspection dates (not the 1900-01-01 placeholder).
+    Works on both date-object and datetime64 columns.
+    """
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates > pd.Timestamp(UNINSPECTED_DATE)
+    return dates > UNINSPECTED_DATE
+
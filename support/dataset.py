@@ -0,0 +1,73 @@
+import streamlit as st
+import numpy as np
+import pandas as pd
+from support.data_cleaner import compact_map_data, load_map_data
+from support.latest import LATEST_PATH, build_latest_inspections, read_latest_inspections
+from support.snapshot import SNAPSHOT_PATH
+from support.spatial import SPATIAL_INDEX_PATH, add_neighbourhood_scores, neighbourhood_columns, read_spatial_index
+
+
+def read_only(values):
+    """
+    Copy of values on a buffer numpy refuses to write to.
+    """
+    values = np.array(values, copy=True)
+    values.flags.writeable = False
+    return values
+
+def freeze_frame(data):
+    """
+    Rebuilds a frame on read-only buffers, so an in-place write raises instead of silently
+    changing the data every other session sees.
+    """
+    columns = {}
+    for col in data.columns:
+        values = data[col].array
+        if isinstance(values, pd.Categorical):
+            columns[col] = pd.Categorical.from_codes(read_only(values.codes), dtype=values.dtype)
+        elif isinstance(values, pd.arrays.IntegerArray):
+            columns[col] = pd.arrays.IntegerArray(read_only(values.to_numpy(values.dtype.numpy_dtype, na_value=0)),
+                                                  read_only(values.isna()))
+        else:
+            columns[col] = read_only(values)
+    return pd.DataFrame(columns, copy=False)
+
+@st.cache_resource
+def load_dataset(file_path="data/data.zip", snapshot_path=SNAPSHOT_PATH):
+    """
+    Loads the compact inspections frame once per process.
+    Unlike st.cache_data, st.cache_resource hands every session the same object instead of an unpickled copy.
+    """
+    return freeze_frame(compact_map_data(load_map_data(file_path, snapshot_path=snapshot_path)))
+
+def get_dataset(file_path="data/data.zip", snapshot_path=SNAPSHOT_PATH):
+    """
+    Shared, read-only inspections frame for a page.
+    The shallow copy keeps column assignment local to the caller while the column buffers stay shared;
+    derive new frames (filter, sort, groupby) rather than writing into it.
+    """
+    return load_dataset(file_path, snapshot_path).copy(deep=False)
+
+@st.cache_resource
+def load_latest_inspections(file_path="data/data.zip", snapshot_path=SNAPSHOT_PATH, latest_path=LATEST_PATH,
+                            index_path=SPATIAL_INDEX_PATH):
+    """
+    Loads the latest inspection per restaurant once per process, from the table stored at ingest
+    time (see build_data.py) or built from the shared dataset if it is missing.
+    Area scores are computed here if the table predates them, over the spatial index stored at ingest
+    time; the index is only rebuilt if it is missing or was built over other rows.
+    """
+    latest = read_latest_inspections(latest_path)
+    if latest is None:
+        latest = build_latest_inspections(load_dataset(file_path, snapshot_path))
+    if not set(neighbourhood_columns()) <= set(latest.columns):
+        index = read_spatial_index(index_path)
+        latest = add_neighbourhood_scores(latest, index if index is not None and index.indexes(latest) else None)
+    return freeze_frame(compact_map_data(latest))
+
+def get_latest_inspections(file_path="data/data.zip", snapshot_path=SNAPSHOT_PATH, latest_path=LATEST_PATH,
+                           index_path=SPATIAL_INDEX_PATH):
+    """
+    Shared, read-only latest inspection per restaurant; see get_dataset.
+    """
+    return load_latest_inspections(file_path, snapshot_path, latest_path, index_path).copy(deep=False)
@@ -0,0 +1,208 @@
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+from sklearn.neighbors import NearestNeighbors
+
+
+class DbscanGraph:
+    """
+    Radius neighbours graph of the clustering features (see support/cluster.py), built once at max_eps.
+    DBSCAN for any eps up to max_eps and any min_samples is derived from the stored distances without
+    computing new ones, and labels points exactly as sklearn's DBSCAN fit on the same features would.
+    Edges are kept sorted by distance, so the neighbourhoods at a given eps are a prefix of them.
+    """
+    def __init__(self, features, max_eps, metric='euclidean'):
+        points = features[:, :2] if metric == 'haversine' else features
+        self.max_eps, self.metric, self.n = max_eps, metric, len(points)
+
+        # Every pair within max_eps, both ways round and without the point itself
+        graph = NearestNeighbors(radius=max_eps, metric=metric).fit(points).radius_neighbors_graph(mode='distance')
+        order = np.argsort(graph.data, kind='stable')
+        self.rows = np.repeat(np.arange(self.n), np.diff(graph.indptr))[order]
+        self.cols = graph.indices[order]
+        self.distances = graph.data[order]
+
+    def __len__(self):
+        return self.n
+
+    def edges(self, eps):
+        """
+        Neighbour pairs (row, col) within eps.
+        """
+        if eps > self.max_eps:
+            raise ValueError(f"eps {eps} is larger than the graph's max_eps {self.max_eps}")
+        k = np.searchsorted(self.distances, eps, side='right')
+        return self.rows[:k], self.cols[:k]
+
+    def labels(self, eps, min_samples=5):
+        """
+        DBSCAN labels at eps and min_samples, -1 for noise.
+        A point is core when its neighbourhood, itself included, holds min_samples points. Clusters are the
+        connected components of core points, numbered in order of their first core point as sklearn expands
+        them; a border point joins the lowest numbered cluster among its core neighbours.
+        """
+        rows, cols = self.edges(eps)
+        core = np.bincount(rows, minlength=self.n) + 1 >= min_samples
+        labels = np.full(self.n, -1, dtype=np.int64)
+        core_points = np.flatnonzero(core)
+        if len(core_points) == 0:
+            return labels
+
+        core_edges = core[rows] & core[cols]
+        graph = csr_matrix((np.ones(core_edges.sum(), dtype=np.int8), (rows[core_edges], cols[core_edges])), shape=(self.n, self.n))
+        _, components = connected_components(graph, directed=False)
+        components = components[core_points]
+        _, first = np.unique(components, return_index=True)
+        numbers = np.empty(components.max() + 1, dtype=np.int64)
+        numbers[components[np.sort(first)]] = np.arange(len(first))
+        labels[core_points] = numbers[components]
+
+        border_edges = ~core[rows] & core[cols]
+        if border_edges.any():
+            border = pd.Series(labels[cols[border_edges]]).groupby(rows[border_edges]).min()
+            labels[border.index.to_numpy()] = border.to_numpy()
+        return labels
+
+    def clustering(self, eps, min_samples=5):
+        """
+        Labels and cluster sizes, as dbscan_clustering returns them.
+        """
+        labels = self.labels(eps, min_samples)
+        return labels, pd.Series(labels).value_counts().sort_index()
+
+
+def tree_algorithm(metric):
+    """
+    Neighbour search sklearn's DBSCAN picks for this metric on more than a handful of points. Tiles use the
+    same one so every pair's distance is computed exactly as in a single process fit.
+    """
+    return 'kd_tree' if metric == 'euclidean' else 'ball_tree'
+
+def partition_tiles(points, eps, metric, tiles):
+    """
+    Splits the (lat, lon) radians of points into about `tiles` tiles holding similar numbers of points,
+    first into longitude strips and then each strip by latitude.
+    Returns, per tile, the indices of the points it owns and of every point within its halo, which is
+    wide enough to hold all eps neighbours of its own points.
+    """
+    lat, lon = points[:, 0], points[:, 1]
+    if metric == 'haversine':
+        # Great circle distance d bounds |dlat| <= d and sin(|dlon| / 2) <= sin(d / 2) / cos(lat)
+        max_lat = min(np.abs(lat).max() + eps, np.pi / 2 - 1e-9)
+        lon_halo = 2 * np.arcsin(min(1.0, np.sin(eps / 2) / np.cos(max_lat)))
+    else:
+        lon_halo = eps
+    # A hair wider, extra halo points only cost time
+    lat_halo, lon_halo = eps * (1 + 1e-6), lon_halo * (1 + 1e-6)
+
+    n_strips = max(1, int(np.ceil(np.sqrt(tiles))))
+    n_rows = max(1, int(np.ceil(tiles / n_strips)))
+    by_lon = np.argsort(lon, kind='stable')
+    sorted_lon = lon[by_lon]
+    partitions = []
+    for strip in np.array_split(np.arange(len(points)), n_strips):
+        if len(strip) == 0:
+            continue
+        # Points tied on a strip edge go to the strip holding the first of them
+        lo, hi = sorted_lon[strip[0]], sorted_lon[strip[-1]]
+        strip_points = by_lon[strip]
+        near_strip = by_lon[np.searchsorted(sorted_lon, lo - lon_halo, side='left'):np.searchsorted(sorted_lon, hi + lon_halo, side='right')]
+        strip_points = strip_points[np.argsort(lat[strip_points], kind='stable')]
+        for own in np.array_split(strip_points, n_rows):
+            if len(own) == 0:
+                continue
+            south, north = lat[own].min(), lat[own].max()
+            halo = near_strip[(lat[near_strip] >= south - lat_halo) & (lat[near_strip] <= north + lat_halo)]
+            partitions.append((np.sort(own), halo))
+    return partitions
+
+def cluster_tile(points, own, others, eps, min_samples, metric):
+    """
+    DBSCAN work for one tile, given the points it owns followed by the rest of its halo and their
+    global indices: core flags and local cluster components of the points it owns, the local components
+    each of its non-core points touches, and its edges to points owned by other tiles.
+    """
+    tile = np.concatenate([own, others])
+    nn = NearestNeighbors(radius=eps, metric=metric, algorithm=tree_algorithm(metric)).fit(points)
+    graph = nn.radius_neighbors_graph(points[:len(own)], mode='connectivity')
+    rows = np.repeat(np.arange(len(own)), np.diff(graph.indptr))
+    cols = graph.indices
+
+    # Neighbourhoods include the point itself
+    core = np.diff(graph.indptr) >= min_samples
+    inside = cols < len(own)
+    core_neighbour = core[np.where(inside, cols, 0)] & inside
+    core_edges = core[rows] & core_neighbour
+    local = csr_matrix((np.ones(core_edges.sum(), dtype=np.int8), (rows[core_edges], cols[core_edges])), shape=(len(own), len(own)))
+    _, components = connected_components(local, directed=False)
+
+    touches = ~core[rows] & core_neighbour
+    return {'own': own, 'core': core, 'components': components,
+            'border_points': own[rows[touches]], 'border_components': components[cols[touches]],
+            'cross_from': own[rows[~inside]], 'cross_to': tile[cols[~inside]]}
+
+def merge_tiles(n, results):
+    """
+    Global DBSCAN labels from the tile results, numbered as sklearn numbers them.
+    """
+    core = np.zeros(n, dtype=bool)
+    point_component = np.full(n, -1, dtype=np.int64)
+    border_points, border_components, cross_from, cross_to = [], [], [], []
+    offset = 0
+    for result in results:
+        core[result['own']] = result['core']
+        point_component[result['own']] = result['components'] + offset
+        border_points.append(result['border_points'])
+        border_components.append(result['border_components'] + offset)
+        cross_from.append(result['cross_from'])
+        cross_to.append(result['cross_to'])
+        offset += len(result['own'])
+    border_points, border_components = np.concatenate(border_points), np.concatenate(border_components)
+    cross_from, cross_to = np.concatenate(cross_from), np.concatenate(cross_to)
+
+    labels = np.full(n, -1, dtype=np.int64)
+    core_points = np.flatnonzero(core)
+    if len(core_points) == 0:
+        return labels
+
+    # Join components linked by core to core edges across tiles
+    linked = core[cross_from] & core[cross_to]
+    joins = csr_matrix((np.ones(linked.sum(), dtype=np.int8), (point_component[cross_from[linked]], point_component[cross_to[linked]])),
+                       shape=(offset, offset))
+    _, clusters = connected_components(joins, directed=False)
+
+    # Clusters numbered in order of their first core point
+    core_clusters = clusters[point_component[core_points]]
+    _, first = np.unique(core_clusters, return_index=True)
+    numbers = np.empty(clusters.max() + 1, dtype=np.int64)
+    numbers[core_clusters[np.sort(first)]] = np.arange(len(first))
+    labels[core_points] = numbers[core_clusters]
+
+    # Border points join the lowest numbered cluster among their core neighbours, in any tile
+    reaching = ~core[cross_from] & core[cross_to]
+    candidates = pd.Series(np.concatenate([numbers[clusters[border_components]], labels[cross_to[reaching]]]))
+    border = candidates.groupby(np.concatenate([border_points, cross_from[reaching]])).min()
+    labels[border.index.to_numpy()] = border.to_numpy()
+    return labels
+
+def partitioned_dbscan(features, eps, min_samples=5, metric='euclidean', workers=4, tiles=None):
+    """
+    DBSCAN over overlapping spatial tiles clustered in parallel by a pool of `workers` processes, with the
+    border clusters merged into global labels identical to a single sklearn fit. Tiles split the first two
+    feature columns, (lat, lon) in radians as support/cluster.py builds them; longitudes are not wrapped at 180.
+    """
+    points = np.ascontiguousarray(features[:, :2] if metric == 'haversine' else features, dtype=float)
+    tasks = []
+    for own, halo in partition_tiles(points, eps, metric, tiles or 4 * workers):
+        others = np.setdiff1d(halo, own, assume_unique=True)
+        # Each tile only gets its own points and halo
+        tasks.append((points[np.concatenate([own, others])], own, others, eps, min_samples, metric))
+
+    if workers == 1:
+        results = [cluster_tile(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(cluster_tile, *zip(*tasks)))
+    return merge_tiles(len(points), results)
@@ -0,0 +1,95 @@
+import os
+from dataclasses import dataclass
+from support.assets import ASSETS_DIR, manifest_assets, write_map_assets
+from support.cluster import valid_inspection_rows
+from support.data_cleaner import compact_map_data
+from support.eda import EDA_PATH, build_eda_aggregates, write_eda_aggregates
+from support.incremental import INCREMENTAL_PATH, IncrementalClusters, read_incremental_clusters, write_incremental_clusters
+from support.latest import LATEST_PATH, write_latest_inspections
+from support.search import SEARCH_INDEX_PATH, SearchIndex, write_search_index
+from support.spatial import SPATIAL_INDEX_PATH, SpatialIndex, add_neighbourhood_scores, write_spatial_index
+from support.sweep import SWEEP_PATH, write_dbscan_sweep
+from support.trends import TRENDS_PATH, ScoreTrends, write_score_trends
+
+
+@dataclass(frozen=True)
+class DerivedPaths:
+    """
+    Where the artifacts derived from the snapshot are written; the defaults are the paths the pages read.
+    The DBSCAN sweep of the Cluster page is only run when sweep is set; the incremental labels at clusters
+    are started along with it and kept up to date by every later write.
+    """
+    latest: str = LATEST_PATH
+    index: str = SPATIAL_INDEX_PATH
+    search: str = SEARCH_INDEX_PATH
+    eda: str = EDA_PATH
+    trends: str = TRENDS_PATH
+    assets: str = ASSETS_DIR
+    sweep: str | None = None
+    clusters: str = INCREMENTAL_PATH
+
+    @classmethod
+    def under(cls, data_dir, assets_dir=None, sweep=False):
+        """
+        The default file names in data_dir, the map assets in assets_dir (data_dir/assets if not given).
+        """
+        def path(default):
+            return os.path.join(data_dir, os.path.basename(default))
+        return cls(path(LATEST_PATH), path(SPATIAL_INDEX_PATH), path(SEARCH_INDEX_PATH), path(EDA_PATH), path(TRENDS_PATH),
+                   assets_dir or os.path.join(data_dir, 'assets'), path(SWEEP_PATH) if sweep else None, path(INCREMENTAL_PATH))
+
+
+def write_derived(data, latest, paths=DerivedPaths(), trends=None):
+    """
+    Writes everything the pages read besides the snapshot, from the inspections and their latest inspection per
+    restaurant: the latest inspections with their area scores, the spatial and search indexes over them, the
+    EDA aggregates, the monthly score trends (computed from data unless given), the content-hashed map assets
+    (see support/assets.py) and the DBSCAN labels of the Cluster page (see write_clusters).
+    Returns the latest inspections with their area scores.
+    """
+    index = SpatialIndex.from_latest(latest)
+    latest = add_neighbourhood_scores(latest, index)
+    write_latest_inspections(latest, paths.latest)
+    print(f"Wrote {len(latest)} restaurants to {paths.latest}")
+
+    write_spatial_index(index, paths.index)
+    print(f"Wrote spatial index over {len(index)} restaurants to {paths.index}")
+
+    search_index = SearchIndex.from_latest(latest)
+    write_search_index(search_index, paths.search)
+    print(f"Wrote search index over {len(search_index)} restaurants to {paths.search}")
+
+    write_eda_aggregates(build_eda_aggregates(data, latest), paths.eda)
+    print(f"Wrote EDA aggregates to {paths.eda}")
+
+    trends = ScoreTrends.from_inspections(data) if trends is None else trends
+    write_score_trends(trends, paths.trends)
+    print(f"Wrote score trends over {trends.months()[1]} months to {paths.trends}")
+
+    manifest = write_map_assets(data, latest, paths.assets)
+    print(f"Wrote map assets {', '.join(sorted(manifest_assets(manifest)))} to {paths.assets}")
+
+    write_clusters(latest, paths)
+    return latest
+
+def write_clusters(latest, paths=DerivedPaths()):
+    """
+    DBSCAN labels of the rows the Cluster page clusters, typed as the page loads them. With paths.sweep, runs
+    the sweep over every slider config and starts the incremental labels of the page defaults at paths.clusters
+    from the same rows. Otherwise the incremental labels, if started, are updated from the restaurants that
+    changed since (see support/incremental.py), so the page keeps its defaults without a refit after a sync.
+    """
+    rows = valid_inspection_rows(compact_map_data(latest))
+    if paths.sweep:
+        stats = write_dbscan_sweep(rows, paths.sweep)
+        print(f"Wrote DBSCAN sweep of {stats['configs']} configs over {stats['restaurants']} restaurants to {paths.sweep} "
+              f"in {stats['build_seconds']:.2f}s ({stats['bytes'] / 1024 ** 2:.1f} MB)")
+        write_incremental_clusters(IncrementalClusters(rows), paths.clusters)
+        print(f"Started incremental DBSCAN labels at {paths.clusters}")
+        return
+    clusters = read_incremental_clusters(paths.clusters)
+    if clusters is not None:
+        stats = clusters.update(rows)
+        write_incremental_clusters(clusters, paths.clusters)
+        print(f"Updated incremental DBSCAN labels at {paths.clusters} from {stats['changed']} changed and "
+              f"{stats['closed']} closed restaurants")
@@ -0,0 +1,123 @@
+import streamlit as st
+import pandas as pd
+import os
+import pickle
+from support.data_cleaner import compact_map_data
+from support.dataset import get_dataset, get_latest_inspections
+from support.snapshot import SNAPSHOT_PATH
+
+EDA_PATH = "data/eda.pkl"
+
+# Violation codes by severity, from DOHMH's Food Service Establishment Inspection Scoring Parameters
+VIOLATION_SEVERITY = {
+    '02A': 'Critical',
+    '02B': 'Critical', '02C': 'Critical',
+    '02D': 'Critical', '02E': 'Critical',
+    '02F': 'Critical', '02G': 'Critical',
+    '02H': 'Critical', '02I': 'Critical',
+    '02J': 'Critical', '03A': 'Critical',
+    '03B': 'Critical', '03C': 'Critical',
+    '03D': 'Critical', '03E': 'Critical',
+    '03F': 'Critical', '03G': 'Critical',
+    '04A': 'Critical', '04B': 'Critical',
+    '04C': 'Critical', '04D': 'Critical',
+    '04E': 'Critical', '04F': 'Critical',
+    '04G': 'Critical', '04H': 'Critical',
+    '04I': 'Critical', '04J': 'Critical',
+    '04K': 'Critical', '04L': 'Critical',
+    '04M': 'Critical', '04N': 'Critical',
+    '04O': 'Critical', '05A': 'Critical',
+    '05B': 'Critical', '05C': 'Critical',
+    '05D': 'Critical', '05E': 'Critical',
+    '05F': 'Critical', '05G': 'Critical',
+    '05H': 'Critical', '05I': 'Critical',
+    '06A': 'Critical', '06B': 'Critical',
+    '06C': 'Critical', '06D': 'Critical',
+    '06E': 'Critical', '06F': 'Critical',
+    '06G': 'Critical', '06H': 'Critical',
+    '06I': 'Critical', '07A': 'Critical',
+    '08A': 'General', '08B': 'General',
+    '08C': 'General', '09A': 'General',
+    '09B': 'General', '09C': 'General',
+    '10A': 'General', '10B': 'General',
+    '10C': 'General', '10D': 'General',
+    '10E': 'General', '10G': 'General',
+    '10H': 'General', '10I': 'General',
+    '10J': 'General', '99B': 'General Other'
+}
+
+
+def build_eda_aggregates(data, latest):
+    """
+    Everything the EDA page shows, from the inspections frame and the latest inspection per restaurant:
+    the preview sample, the count of restaurants at each latest score (from which the histograms and
+    headline numbers are drawn), the same counts split by violation severity, the borough and cuisine
+    score statistics and the Spearman correlation matrix.
+    """
+    latest = compact_map_data(latest)
+    aggregates = {'sample': compact_map_data(data).sample(n=10, random_state=42), 'restaurants': len(latest)}
+
+    aggregates['score_counts'] = pd.to_numeric(latest['score'].dropna(), errors='coerce').value_counts().sort_index()
+
+    # Group order follows the rows, so the severities stack in the order a row level plot would use
+    severity = latest[['score']].assign(violation_severity=latest['violation code'].map(VIOLATION_SEVERITY))
+    severity = severity.dropna(subset=['violation_severity', 'score'])
+    aggregates['severity_counts'] = severity.groupby(['score', 'violation_severity'], sort=False, observed=True).size().reset_index(name='count')
+
+    # Summary statistics for score by borough
+    grouped_stats = latest[['score', 'boro']].groupby('boro', observed=True).agg({"score": ["count", "mean", "median", "min", "max", "std"]})
+    grouped_stats = grouped_stats.rename(columns={'count': 'Count', 'mean': 'Mean', 'median': 'Median', 'min': 'Min', 'max': 'Max', 'std': 'Std'})
+    grouped_stats = grouped_stats.dropna()
+    grouped_stats.columns = grouped_stats.columns.droplevel(0)
+    aggregates['borough_stats'] = grouped_stats.rename_axis("Borough").round(2)
+
+    # Average score by borough and by cuisine
+    for key, col in (('borough_means', 'boro'), ('cuisine_means', 'cuisine description')):
+        aggregates[key] = (
+            latest[[col, 'score']]
+            .dropna()
+            .groupby(col, as_index=False, observed=True)
+            .mean(numeric_only=True)
+            .rename(columns={'score': 'average_score'})
+            .sort_values(by='average_score', ascending=True)
+        )
+
+    # Categorical features numerically encoded for the correlation
+    correlation_data = latest[['score', 'zipcode', 'cuisine description', 'boro']].dropna()
+    for col in ['cuisine description', 'boro']:
+        correlation_data[col] = correlation_data[col].astype('category').cat.codes
+    aggregates['correlation'] = correlation_data.corr(method='spearman')
+    return aggregates
+
+def write_eda_aggregates(aggregates, eda_path=EDA_PATH):
+    """
+    Stores the EDA aggregates next to the data snapshot.
+    """
+    os.makedirs(os.path.dirname(eda_path) or '.', exist_ok=True)
+
+    # Write to a temporary file first so readers never see half written aggregates
+    tmp_path = f"{eda_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(aggregates, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, eda_path)
+    return eda_path
+
+def read_eda_aggregates(eda_path=EDA_PATH):
+    """
+    Reads the stored EDA aggregates, or None if they have not been built yet.
+    """
+    if not os.path.exists(eda_path):
+        return None
+    with open(eda_path, 'rb') as f:
+        return pickle.load(f)
+
+@st.cache_resource
+def load_eda_aggregates(file_path="data/data.zip", snapshot_path=SNAPSHOT_PATH, eda_path=EDA_PATH):
+    """
+    Loads the EDA aggregates once per process, from the file stored at ingest time (see build_data.py)
+    or built from the shared dataset if it is missing.
+    """
+    aggregates = read_eda_aggregates(eda_path)
+    if aggregates is None:
+        aggregates = build_eda_aggregates(get_dataset(file_path, snapshot_path), get_latest_inspections(file_path, snapshot_path))
+    return aggregates
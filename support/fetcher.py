@@ -0,0 +1,90 @@
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+import pandas as pd
+from requests.adapters import HTTPAdapter
+from tenacity import Retrying, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+BASE_URL = r"https://data.cityofnewyork.us/resource/43nn-pn8j.json"
+
+
+class ColumnAccumulator:
+    """
+    Collects API pages as per-column lists keyed by page offset.
+    Pages can arrive in any order; to_frame stitches them back together in offset order with a single
+    DataFrame construction. Offsets already collected are skipped when a failed pull is resumed.
+    """
+    def __init__(self):
+        self.pages = {}
+        self.bytes_downloaded = 0
+        self._lock = threading.Lock()
+
+    def add(self, offset, records, n_bytes):
+        # Socrata omits null fields, so collect the union of keys within the page
+        keys = dict.fromkeys(itertools.chain.from_iterable(records))
+        columns = {key: [record.get(key) for record in records] for key in keys}
+        with self._lock:
+            self.pages[offset] = (len(records), columns)
+            self.bytes_downloaded += n_bytes
+
+    def to_frame(self):
+        if not self.pages:
+            return pd.DataFrame()
+        pages = [self.pages[offset] for offset in sorted(self.pages)]
+        keys = dict.fromkeys(itertools.chain.from_iterable(columns for _, columns in pages))
+        data = pd.DataFrame({
+            key: list(itertools.chain.from_iterable(columns.get(key, [None] * n) for n, columns in pages))
+            for key in keys
+        })
+        data.columns = data.columns.str.lower().str.replace('_', ' ') # API uses snake_case field names
+        return data
+
+
+def make_session(pool_size=8):
+    """
+    Session whose connection pool is large enough for pool_size concurrent page requests.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def get_json(session, base_url, params, retries=5, backoff=0.5):
+    """
+    GETs one page, retrying connection errors and non-200 responses with exponential backoff.
+    Returns the decoded JSON and the number of bytes downloaded.
+    """
+    for attempt in Retrying(stop=stop_after_attempt(retries), wait=wait_exponential(multiplier=backoff, max=10),
+                            retry=retry_if_exception_type(requests.RequestException), reraise=True):
+        with attempt:
+            response = session.get(base_url, params=params, timeout=60)
+            response.raise_for_status()
+    return response.json(), len(response.content)
+
+def fetch_pages(base_url=BASE_URL, where=None, page_size=1000, max_workers=8, accumulator=None, session=None, retries=5):
+    """
+    Fetches every page matching the SoQL where clause with up to max_workers concurrent requests.
+    The row count is requested first so page offsets are known up front. Each page is retried on its own;
+    if one still fails the exception propagates, and passing the same accumulator again resumes the pull.
+    Returns the accumulated DataFrame and the bytes downloaded.
+    """
+    accumulator = accumulator if accumulator is not None else ColumnAccumulator()
+    session = session or make_session(max_workers)
+    params = {'$where': where} if where is not None else {}
+
+    # Work out the page offsets still missing
+    count, n_bytes = get_json(session, base_url, {**params, '$select': 'count(*) AS total'}, retries)
+    accumulator.bytes_downloaded += n_bytes
+    offsets = [offset for offset in range(0, int(count[0]['total']), page_size) if offset not in accumulator.pages]
+
+    def fetch(offset):
+        records, n_bytes = get_json(session, base_url, {**params, '$order': ':id', '$limit': page_size, '$offset': offset}, retries)
+        accumulator.add(offset, records, n_bytes)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # list() re-raises the first page that ran out of retries
+        list(executor.map(fetch, offsets))
+
+    return accumulator.to_frame(), accumulator.bytes_downloaded
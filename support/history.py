@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+from support.markers import NO_VIOLATIONS, map_rows
+
+# Restaurants per history shard; a popup fetches the shard holding its restaurant
+HISTORY_SHARD_SIZE = 64
+
+
+class HistoryIndex:
+    """
+    Inspection history of every restaurant on the map, held in flat arrays and indexed on sorted camis.
+    Restaurant i owns inspections bounds[i]:bounds[i + 1], inspection j owns violation codes
+    violation_bounds[j]:violation_bounds[j + 1]; violations is the string table the codes point into.
+    """
+    def __init__(self, data):
+        rows = map_rows(data)
+        camis = rows['camis'].to_numpy()
+        date_codes, dates = pd.factorize(pd.to_datetime(rows['inspection date']))
+        self.violation_codes, violations = pd.factorize(rows['violation description'].astype(object).fillna(NO_VIOLATIONS))
+        self.violations = violations.tolist()
+
+        # First row of each restaurant and of each inspection (restaurant + date)
+        new_restaurant = np.r_[True, camis[1:] != camis[:-1]]
+        restaurant_start = np.flatnonzero(new_restaurant)
+        inspection_start = np.flatnonzero(new_restaurant | np.r_[True, date_codes[1:] != date_codes[:-1]])
+
+        self.camis = camis[restaurant_start]
+        self.bounds = np.r_[np.searchsorted(inspection_start, restaurant_start), len(inspection_start)]
+        self.dates = dates.strftime('%Y-%m-%d').to_numpy()[date_codes[inspection_start]]
+        self.scores = rows['score'].fillna(0).to_numpy(dtype=np.int64)[inspection_start]
+        self.violation_bounds = np.r_[inspection_start, len(camis)]
+
+    def __len__(self):
+        return len(self.camis)
+
+    def lookup(self, camis):
+        """
+        Inspections of one restaurant, newest first, as [[inspection date, score, [violation, ...]], ...].
+        Returns None for a camis that is not on the map.
+        """
+        i = np.searchsorted(self.camis, camis)
+        if i == len(self.camis) or self.camis[i] != camis:
+            return None
+        return [[self.dates[j], int(self.scores[j]),
+                 [self.violations[code] for code in self.violation_codes[self.violation_bounds[j]:self.violation_bounds[j + 1]]]]
+                for j in range(self.bounds[i], self.bounds[i + 1])]
+
+    def shards(self, size=HISTORY_SHARD_SIZE):
+        """
+        Inspection histories split into static shards of about size restaurants, restaurant camis going to
+        shard camis % count: [{'violations': [violation, ...], 'restaurants': {camis: [[inspection date, score,
+        [violation code, ...]], ...]}}, ...]. Violation codes point into the violations table of their shard,
+        so each text is sent once per shard.
+        """
+        count = max(1, -(-len(self) // size))
+        dates, scores = self.dates.tolist(), self.scores.tolist()
+        codes, violation_bounds, bounds = self.violation_codes.tolist(), self.violation_bounds.tolist(), self.bounds.tolist()
+        shard_of = self.camis % count
+        order = np.argsort(shard_of, kind='stable')
+        starts = np.searchsorted(shard_of[order], np.arange(count + 1))
+        shards = []
+        for shard in range(count):
+            table, restaurants = {}, {}
+            for i in order[starts[shard]:starts[shard + 1]].tolist():
+                restaurants[int(self.camis[i])] = [
+                    [dates[j], scores[j], [table.setdefault(code, len(table)) for code in codes[violation_bounds[j]:violation_bounds[j + 1]]]]
+                    for j in range(bounds[i], bounds[i + 1])]
+            shards.append({'violations': [self.violations[code] for code in table], 'restaurants': restaurants})
+        return shards
@@ -0,0 +1,269 @@
+import streamlit as st
+import numpy as np
+import pandas as pd
+import os
+import pickle
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import connected_components
+from sklearn.neighbors import NearestNeighbors
+from sklearn.preprocessing import MinMaxScaler
+from support.cluster import km_to_rad
+from support.dbscan import tree_algorithm
+from support.sweep import sweep_fingerprint, sweep_key
+
+# Stored next to the DBSCAN sweep (see support/sweep.py)
+INCREMENTAL_PATH = "data/dbscan_sweep.incremental.pkl"
+# (metric, eps in km, min_samples, score weight) kept up to date between sweeps: the Cluster page defaults
+INCREMENTAL_CONFIGS = (('haversine', 0.03, 5, None), ('euclidean', 0.5, 5, 0.1))
+# Share of closed restaurants kept as empty slots before the state is rebuilt without them
+MAX_CLOSED_SHARE = 0.25
+
+
+def valid_rows_delta(old, new):
+    """
+    Changes between two versions of the valid inspection rows (see support/cluster.py): the rows of new
+    whose restaurant is new or was moved or re-scored, and the camis of restaurants that are no longer in it.
+    """
+    columns = ['latitude', 'longitude', 'score']
+    before = old.set_index('camis')[columns].reindex(new['camis'].to_numpy())
+    after = new[columns].to_numpy(dtype=float)
+    changed = ~np.all((before.to_numpy(dtype=float) == after) | (before.isna().to_numpy() & np.isnan(after)), axis=1)
+    closed = old.loc[~old['camis'].isin(new['camis']), 'camis'].to_numpy()
+    return new[changed], closed
+
+
+class IncrementalDbscan:
+    """
+    DBSCAN labels of the valid inspection rows kept up to date from deltas of changed restaurants,
+    for one metric, eps (in radians), min_samples and score weight.
+    Restaurants hold a slot each. The neighbour pairs within eps, the core flags and the connected
+    component of every core point are stored by slot, so an update only searches the neighbours of the
+    changed restaurants and only recomputes the clusters they touch.
+    Labels are the ones sklearn's DBSCAN gives cluster_features of the same rows, in any row order.
+    """
+    def __init__(self, df, eps, min_samples=5, metric='euclidean', score_weight=0.1):
+        self.eps, self.min_samples, self.metric, self.score_weight = eps, min_samples, metric, score_weight
+        # Rebuilds from scratch after the first fit
+        self.rebuilds = 0
+        # Coordinates keep their stored dtype so the radians match cluster_features exactly
+        self.fit(df['camis'].to_numpy(), df['latitude'].to_numpy(), df['longitude'].to_numpy(), df['score'].to_numpy(dtype=float))
+
+    def __len__(self):
+        return int(self.active.sum())
+
+    def fit(self, camis, latitude, longitude, score):
+        """
+        Builds the state from scratch, one slot per restaurant.
+        """
+        self.slots = pd.Index(camis)
+        self.latitude, self.longitude, self.score = latitude, longitude, score
+        # Scores are min-max scaled over every restaurant, as cluster_features does
+        self.scaler = MinMaxScaler().fit(pd.DataFrame({'score': score}))
+        self.points = self.features(latitude, longitude, score)
+        self.active = np.ones(len(camis), dtype=bool)
+
+        graph = self.neighbours().fit(self.points).radius_neighbors_graph(mode='connectivity')
+        self.rows = np.repeat(np.arange(len(camis)), np.diff(graph.indptr))
+        self.cols = graph.indices
+        self.core = np.bincount(self.rows, minlength=len(camis)) + 1 >= self.min_samples
+        self.component = np.full(len(camis), -1, dtype=np.int64)
+        self.next_component = 0
+        self.recluster(self.core.copy())
+
+    def features(self, latitude, longitude, score):
+        coords = np.radians(np.column_stack((latitude, longitude))).astype(float)
+        if self.metric == 'haversine':
+            return coords
+        return np.hstack((coords, self.scaler.transform(pd.DataFrame({'score': score})) * self.score_weight))
+
+    def neighbours(self):
+        # Same tree as sklearn's DBSCAN so every distance is computed exactly as in a full fit
+        return NearestNeighbors(radius=self.eps, metric=self.metric, algorithm=tree_algorithm(self.metric))
+
+    def recluster(self, region):
+        """
+        Recomputes the components of the core points in region, which must hold every cluster
+        any of its core points is linked to.
+        """
+        self.component[region] = -1
+        inside = region & self.core
+        local = np.cumsum(inside) - 1
+        edges = inside[self.rows] & inside[self.cols]
+        graph = csr_matrix((np.ones(edges.sum(), dtype=np.int8), (local[self.rows[edges]], local[self.cols[edges]])),
+                           shape=(inside.sum(), inside.sum()))
+        count, components = connected_components(graph, directed=False)
+        self.component[inside] = components + self.next_component
+        self.next_component += count
+
+    def update(self, changed, closed=()):
+        """
+        Applies a delta: changed holds the valid inspection rows of new, moved or re-scored restaurants
+        and closed the camis of restaurants to drop (see valid_rows_delta).
+        Returns the number of restaurants whose core flag or component was recomputed.
+        """
+        camis = changed['camis'].to_numpy()
+        slots = self.slots.get_indexer(camis)
+        closed_slots = self.slots.get_indexer(pd.Index(closed))
+        closed_slots = closed_slots[closed_slots >= 0]
+
+        # New restaurants get fresh slots at the end
+        new = slots < 0
+        if new.any():
+            start = len(self.slots)
+            self.slots = self.slots.append(pd.Index(camis[new]))
+            slots[new] = np.arange(start, start + new.sum())
+            grow = lambda values, fill: np.concatenate([values, np.full(new.sum(), fill, dtype=values.dtype)])
+            self.latitude, self.longitude, self.score = grow(self.latitude, np.nan), grow(self.longitude, np.nan), grow(self.score, np.nan)
+            self.active, self.core, self.component = grow(self.active, False), grow(self.core, False), grow(self.component, -1)
+            self.points = np.vstack([self.points, np.zeros((new.sum(), self.points.shape[1]))])
+        self.latitude[slots] = changed['latitude'].to_numpy()
+        self.longitude[slots] = changed['longitude'].to_numpy()
+        self.score[slots] = changed['score'].to_numpy(dtype=float)
+        self.active[slots], self.active[closed_slots] = True, False
+
+        # A new lowest or highest score rescales every score feature, and closures leave empty slots behind;
+        # either is cheaper to start again from
+        scores = self.score[self.active]
+        rescaled = self.metric != 'haversine' and (scores.min() != self.scaler.data_min_[0] or scores.max() != self.scaler.data_max_[0])
+        if rescaled or (~self.active).sum() > MAX_CLOSED_SHARE * len(self.active):
+            active = self.active
+            self.fit(self.slots.to_numpy()[active], self.latitude[active], self.longitude[active], self.score[active])
+            self.rebuilds += 1
+            return len(self)
+        slots = slots[self.active[slots]]
+        self.points[slots] = self.features(self.latitude[slots], self.longitude[slots], self.score[slots])
+
+        # Drop every pair of the changed and closed restaurants, then search the changed ones again
+        touched = np.zeros(len(self.active), dtype=bool)
+        touched[slots], touched[closed_slots] = True, True
+        dropped = touched[self.rows] | touched[self.cols]
+        affected = touched.copy()
+        affected[self.rows[dropped]] = True
+
+        found_rows, found_cols = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        if len(slots):
+            others = np.flatnonzero(self.active)
+            found = self.neighbours().fit(self.points[others]).radius_neighbors(self.points[slots], return_distance=False)
+            found_rows, found_cols = np.repeat(slots, [len(f) for f in found]), others[np.concatenate(found)]
+        found_cols, found_rows = found_cols[found_cols != found_rows], found_rows[found_cols != found_rows]
+        # Pairs of two changed restaurants are found from both sides already
+        mirrored = ~touched[found_cols]
+        self.rows = np.concatenate([self.rows[~dropped], found_rows, found_cols[mirrored]])
+        self.cols = np.concatenate([self.cols[~dropped], found_cols, found_rows[mirrored]])
+        affected[found_cols] = True
+
+        # Only restaurants that lost or gained a neighbour can change core flag
+        was_core = self.core
+        self.core = self.active & (np.bincount(self.rows, minlength=len(self.active)) + 1 >= self.min_samples)
+
+        # Clusters holding an affected core point, before or after, are recomputed with every cluster they now link to
+        seeds = affected & (was_core | self.core)
+        region = np.isin(self.component, self.component[seeds & was_core]) | (seeds & self.core)
+        linked = region[self.rows] & self.core[self.rows] & self.core[self.cols] & ~region[self.cols]
+        region |= np.isin(self.component, self.component[self.cols[linked]])
+        self.recluster(region)
+        self.component[~self.core] = -1
+        return int(region.sum())
+
+    def labels(self, camis):
+        """
+        DBSCAN labels of the restaurants in the order of camis, which must hold exactly the active ones.
+        Clusters are numbered in order of their first core point and border points join the lowest
+        numbered cluster among their core neighbours, as in a full fit on rows in this order.
+        """
+        order = self.slots.get_indexer(pd.Index(camis))
+        if len(order) != len(self) or (order < 0).any() or not self.active[order].all():
+            raise ValueError("camis must hold exactly the restaurants being clustered")
+        labels = np.full(len(order), -1, dtype=np.int64)
+        core = self.core[order]
+        components = self.component[order][core]
+        if len(components) == 0:
+            return labels
+
+        ids, first = np.unique(components, return_index=True)
+        numbers = np.empty(len(ids), dtype=np.int64)
+        numbers[np.argsort(first)] = np.arange(len(ids))
+        labels[core] = numbers[np.searchsorted(ids, components)]
+
+        position = np.full(len(self.active), -1, dtype=np.int64)
+        position[order] = np.arange(len(order))
+        slot_labels = np.full(len(self.active), -1, dtype=np.int64)
+        slot_labels[order] = labels
+        border = ~self.core[self.rows] & self.core[self.cols]
+        if border.any():
+            border = pd.Series(slot_labels[self.cols[border]]).groupby(position[self.rows[border]]).min()
+            labels[border.index.to_numpy()] = border.to_numpy()
+        return labels
+
+    def clustering(self, df):
+        """
+        Labels and cluster sizes of the rows of df, as dbscan_clustering returns them.
+        """
+        labels = self.labels(df['camis'].to_numpy())
+        return labels, pd.Series(labels).value_counts().sort_index()
+
+
+class IncrementalClusters:
+    """
+    IncrementalDbscan labels of several configs over the same valid inspection rows, along with those rows so
+    the next version of them can be diffed against them (see valid_rows_delta).
+    """
+    def __init__(self, df, configs=INCREMENTAL_CONFIGS):
+        self.states = {sweep_key(metric, eps_km, min_samples, score_weight):
+                       IncrementalDbscan(df, km_to_rad(eps_km), min_samples, metric, score_weight or 0)
+                       for metric, eps_km, min_samples, score_weight in configs}
+        self.keep_rows(df)
+
+    def keep_rows(self, df):
+        self.rows = df[['camis', 'latitude', 'longitude', 'score']].reset_index(drop=True)
+        self.fingerprint = sweep_fingerprint(df)
+
+    def update(self, df):
+        """
+        Brings every config up to date with the valid inspection rows df.
+        Returns the number of changed and closed restaurants and of restaurants recomputed over all configs.
+        """
+        changed, closed = valid_rows_delta(self.rows, df)
+        recomputed = sum(state.update(changed, closed) for state in self.states.values()) if len(changed) or len(closed) else 0
+        self.keep_rows(df)
+        return {'changed': len(changed), 'closed': len(closed), 'recomputed': recomputed}
+
+    def lookup(self, df, metric, eps_km, min_samples, score_weight):
+        """
+        Labels and cluster sizes of one config, as dbscan_clustering returns them, or None if it is not kept
+        or the labels are not of these rows.
+        """
+        state = self.states.get(sweep_key(metric, eps_km, min_samples, score_weight))
+        if state is None or len(df) != len(self.rows) or sweep_fingerprint(df) != self.fingerprint:
+            return None
+        return state.clustering(df)
+
+
+def write_incremental_clusters(clusters, path=INCREMENTAL_PATH):
+    """
+    Stores the incremental labels next to the DBSCAN sweep.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+
+    # Write to a temporary file first so readers never see half written labels
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(clusters, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    return path
+
+def read_incremental_clusters(path=INCREMENTAL_PATH):
+    """
+    Reads the stored incremental labels, or None if they have not been started.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return pickle.load(f)
+
+@st.cache_resource
+def load_incremental_clusters(path=INCREMENTAL_PATH):
+    """
+    Reads the stored incremental labels once per process (see build_data.py --dbscan-sweep).
+    """
+    return read_incremental_clusters(path)
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import os
+from support.snapshot import write_snapshot
+
+LATEST_PATH = "data/latest.parquet"
+
+
+def build_latest_inspections(data):
+    """
+    Most recent inspection row per restaurant (camis).
+    Uses a hash groupby + argmax over inspection dates, so the cost is linear rather than a full sort.
+    Ties keep the first row in the frame's order, as the previous sort + drop_duplicates did.
+    """
+    dates = pd.to_datetime(data['inspection date'])
+    latest_rows = dates.groupby(data['camis'].to_numpy(), sort=False).idxmax()
+    return data.loc[latest_rows.to_numpy()].reset_index(drop=True)
+
+def refresh_latest_inspections(latest, new_rows):
+    """
+    Updates the latest inspection table with newly arrived rows without touching the full history
+    or regrouping the stored table: only the restaurants in new_rows are compared with their stored row.
+    Their latest new row replaces the stored one unless that is more recent, so a re-issued inspection
+    on the same date replaces it too; restaurants seen for the first time are added. Replaced and added
+    rows move to the end of the table.
+    """
+    if new_rows.empty:
+        return latest
+    candidates = build_latest_inspections(new_rows)
+    positions = pd.Index(latest['camis']).get_indexer(candidates['camis'])
+    stored = positions >= 0
+
+    # A stored inspection without a date loses to a dated one, as idxmax skips missing dates
+    new_dates = pd.to_datetime(candidates['inspection date']).to_numpy()[stored]
+    stored_dates = pd.to_datetime(latest['inspection date'].iloc[positions[stored]]).to_numpy()
+    newer = (new_dates >= stored_dates) | (pd.isna(stored_dates) & pd.notna(new_dates))
+
+    winners = stored.copy()
+    winners[stored] = newer
+    keep = np.ones(len(latest), dtype=bool)
+    keep[positions[winners]] = False
+    return pd.concat([latest.loc[keep], candidates.loc[winners | ~stored]], ignore_index=True)
+
+def write_latest_inspections(latest, latest_path=LATEST_PATH):
+    """
+    Stores the latest inspection table next to the data snapshot.
+    """
+    return write_snapshot(latest, latest_path)
+
+def read_latest_inspections(latest_path=LATEST_PATH):
+    """
+    Reads the stored latest inspection table, or None if it has not been built yet.
+    """
+    return pd.read_parquet(latest_path) if os.path.exists(latest_path) else None
@@ -2,6 +2,8 @@ import streamlit as st
 import numpy as np
 import pandas as pd
 import pydeck as pdk
+from support.scores import COLOR_BINS, COLOR_GROUPS, score_bands
+from support.spatial import neighbourhood_columns
 
 # Color map for later functions
 color_map = {
@@ -10,19 +12,87 @@ color_map = {
         'red':[255, 0, 0, 200]
     }
 
+# Cluster assignment columns of the Cluster page, with their size columns
+CLUSTER_COLUMNS = {'euclidean_cluster': 'euclidean_cluster_size', 'haversine_cluster': 'haversine_cluster_size'}
+
 # Functions
 def get_color_group(score):
     """
     Gives a color grouping based on health inspection scores
     """
-    if score <= 13:
+    if score <= COLOR_BINS[0]:
         return 'green'
-    elif score <= 27:
+    elif score <= COLOR_BINS[1]:
         return 'yellow'
     else:
         return 'red'
 
+def color_groups(scores):
+    """
+    Color groups of an array of scores, as get_color_group gives them one at a time.
+    """
+    return COLOR_GROUPS[score_bands(scores)]
+
+def group_medians(groups, values, counts):
+    # Sort values within each group (a stable integer sort of the groups keeps the value order),
+    # then average the two middle ones as pandas does
+    order = np.argsort(values)
+    ordered = values[order[np.argsort(groups[order], kind='stable')]]
+    starts = np.r_[0, np.cumsum(counts)[:-1]]
+    return (ordered[starts + (counts - 1) // 2] + ordered[starts + counts // 2]) / 2
+
+def group_means(groups, values, n_groups):
+    # Missing values are skipped, groups without any are NaN
+    present = ~np.isnan(values)
+    totals = np.bincount(groups[present], weights=values[present], minlength=n_groups)
+    counts = np.bincount(groups[present], minlength=n_groups)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return totals / counts
+
+def summarize_clusters(df, cluster_columns=CLUSTER_COLUMNS):
+    """
+    Summaries of every clustering in df for the pydeck maps, one frame per cluster column: the median
+    position, mean score, size, mean area scores and color of each cluster, noise left out.
+    The member values are read once and every clustering is summarized with sorts and bincounts.
+    """
+    area_cols = [col for col in neighbourhood_columns() if col in df.columns]
+    latitude, longitude = df['latitude'].to_numpy(dtype=float), df['longitude'].to_numpy(dtype=float)
+    score = df['score'].to_numpy(dtype=float)
+    area = {col: df[col].to_numpy(dtype=float) for col in area_cols}
+
+    summaries = {}
+    for cluster_col, size_col in cluster_columns.items():
+        labels = df[cluster_col].to_numpy()
+        members = labels != -1
+        # Cluster labels are small non-negative integers, so groups are counted rather than sorted
+        counts = np.bincount(labels[members], minlength=1)
+        clusters = np.flatnonzero(counts)
+        groups = (np.cumsum(counts > 0) - 1)[labels[members]].astype(np.min_scalar_type(len(clusters)))
+        counts = counts[clusters]
+        summary = pd.DataFrame({
+            cluster_col: clusters,
+            'latitude': group_medians(groups, latitude[members], counts),
+            'longitude': group_medians(groups, longitude[members], counts),
+            'score': group_means(groups, score[members], len(clusters)),
+            size_col: counts,
+            # Mean area scores of the members, named for the pydeck tooltip (e.g. area_score_500m)
+            **{col.replace(' ', '_'): group_means(groups, values[members], len(clusters)).round(1) for col, values in area.items()},
+        })
+
+        # Assign colorings
+        summary['color_group'] = color_groups(summary['score'].to_numpy())
+        summary['color'] = summary['color_group'].map(color_map)
+        summaries[cluster_col] = summary
+    return summaries
+
 @st.cache_data
+def cluster_summaries(_df, euclidean_cluster, haversine_cluster, fingerprint):
+    """
+    summarize_clusters of the Cluster page's frame, cached on its two clusterings and a fingerprint
+    of the rows (see support/sweep.py) instead of hashing the whole frame on every rerun.
+    """
+    return summarize_clusters(_df)
+
 def format_cluster_map(df, cluster_col='euclidean_cluster', size_col='euclidean_cluster_size'):
     """Formats the cluster data so it may be used in a pydeck visual.
 
@@ -31,20 +101,4 @@ def format_cluster_map(df, cluster_col='euclidean_cluster', size_col='euclidean_
         cluster_col (str, optional): Name of column containing cluster assignments. Defaults to 'euclidean_cluster'.
         size_col (str, optional): Name of column containing cluster sizes. Defaults to 'euclidean_cluster_size'.
     """
-    # Group by cluster column and eliminate blank column
-    df = df[df[cluster_col] != -1].groupby(cluster_col).agg({
-        'latitude':'median',
-        'longitude':'median',
-        'score':'mean',
-        size_col:'first'
-    }).reset_index()
-    
-    # Assign colorings
-    df['color_group'] = df['score'].apply(get_color_group)
-    df['color'] = df['color_group'].map(color_map)
-    
-    return df
-    
-    
-
-
+    return summarize_clusters(df, {cluster_col: size_col})[cluster_col]
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import json
+import base64
+from support.data_cleaner import is_inspected
+from support.serialize import json_rows, pack_columns
+from support.spatial import neighbourhood_columns
+
+# Popup text for inspections without a recorded violation
+NO_VIOLATIONS = 'No violations recorded.'
+# Typed array of every marker column in the binary encoding, area scores are float32; the name column gets the
+# smallest unsigned type holding every name index
+MARKER_DTYPES = {'camis': np.uint32, 'latitude': np.float32, 'longitude': np.float32, 'average score': np.float32,
+                 'latest score': np.uint16}
+
+
+def map_rows(data):
+    """
+    Inspection rows that can be placed on the map: inspected and with a known, non-zero location.
+    Sorted by camis, newest inspection first.
+    """
+    has_location = (data['latitude'] != 0) & (data['longitude'] != 0) & data['latitude'].notna() & data['longitude'].notna()
+    rows = data.loc[has_location & is_inspected(data['inspection date']),
+                    ['camis', 'inspection date', 'violation description', 'score']]
+    return rows.sort_values(by=['camis', 'inspection date'], ascending=[True, False], kind='stable')
+
+def marker_columns(data, latest):
+    """
+    Aggregates the inspection rows into one record per restaurant for the Leaflet map, as a dict of column arrays
+    (camis, latitude, longitude, name index, average score, latest score, area score 250m, 500m, 1000m) and the
+    string table of names the name column refers to. Restaurants are sorted by camis, the template looks them up
+    by binary search. The average score is taken over violation rows, as the map always did. Area scores (see
+    support/spatial.py) are NaN where the latest table has none.
+    """
+    rows = map_rows(data)
+    scores = rows['score'].fillna(0).to_numpy(dtype=float)
+    average_scores = pd.Series(scores).groupby(rows['camis'].to_numpy(), sort=True).mean().round(2)
+
+    # Restaurant level attributes, aligned on camis
+    latest = latest.set_index('camis').reindex(average_scores.index)
+    name_codes, names = pd.factorize(latest['dba'].astype(object).fillna(''))
+    area_scores = latest.reindex(columns=neighbourhood_columns()).astype(float).round(1)
+
+    columns = {
+        'camis': average_scores.index.to_numpy(dtype=np.int64),
+        'latitude': latest['latitude'].to_numpy(dtype=float).round(6),
+        'longitude': latest['longitude'].to_numpy(dtype=float).round(6),
+        'name': name_codes.astype(np.int64),
+        'average score': average_scores.to_numpy(),
+        'latest score': latest['score'].fillna(0).to_numpy(dtype=np.int64),
+        **{f"area score {col}": area_scores[col].to_numpy() for col in area_scores.columns},
+    }
+    return columns, names.tolist()
+
+def build_marker_payload(data, latest):
+    """
+    Marker payload as Python objects, names deduplicated into a string table and referenced by index:
+    {
+        'names': [dba, ...],
+        'restaurants': [[camis, lat, lon, name index, average score, latest score, area score 250m, 500m, 1000m], ...]
+    }
+    Area scores are null where the latest table has none. Inspection history is not included,
+    popups fetch it on open from the static history shards (see support/history.py).
+    """
+    columns, names = marker_columns(data, latest)
+    values = [pd.Series(values).astype(object).where(pd.notna(values), None).tolist() for values in columns.values()]
+    return {'names': names, 'restaurants': [list(record) for record in zip(*values)]}
+
+def encode_marker_payload(columns, names):
+    """
+    Compact binary encoding of the marker columns (see support/serialize.py): one typed array per column, in
+    payload order, then the names. Coordinates and scores are single precision, which holds the stored
+    float32 coordinates and the rounded scores; missing area scores are NaN.
+    """
+    dtypes = {**MARKER_DTYPES, 'name': np.min_scalar_type(len(names))}
+    return pack_columns([columns[col].astype(dtypes.get(col, np.float32)) for col in columns], [names])
+
+def marker_payload_script(columns, names, encoding='binary'):
+    """
+    Expression the Leaflet template evaluates to its marker payload: the JSON object itself, or a call
+    decoding the base64 of the binary encoding, which skips JSON parsing in the browser.
+    """
+    if encoding == 'json':
+        return (f'{{"names":{json.dumps(names, separators=(",", ":"))},'
+                f'"restaurants":{json_rows(list(columns.values()))}}}')
+    return f'decodeMarkerPayload("{base64.b64encode(encode_marker_payload(columns, names)).decode("ascii")}")'
@@ -0,0 +1,31 @@
+import numpy as np
+
+# Score modes of the map, in the order of their rows in score_modes
+SCORE_MODES = ('average', 'latest')
+# Upper score bounds of the green and yellow bands, anything above is red
+COLOR_BINS = (13, 27)
+COLOR_GROUPS = np.array(['green', 'yellow', 'red'])
+# Score at which a heat point reaches full intensity
+HEAT_SCALE = 50
+
+
+def score_bands(scores):
+    """
+    Color band of every score: 0 green, 1 yellow, 2 red.
+    """
+    return np.digitize(scores, COLOR_BINS, right=True).astype(np.uint8)
+
+def heat_intensities(scores):
+    """
+    Heat intensity of every score, score / HEAT_SCALE clipped to [0, 1].
+    """
+    return np.clip(np.asarray(scores, dtype=np.float32) / HEAT_SCALE, 0, 1)
+
+def score_modes(average, latest):
+    """
+    Both score modes of the map in one pass over the restaurants, packed as arrays with one row per mode
+    (see SCORE_MODES), so switching modes is picking a row:
+    {'score': float32 (2, n), 'band': uint8 (2, n), 'intensity': float32 (2, n)}
+    """
+    scores = np.vstack([np.asarray(average, dtype=np.float32), np.asarray(latest, dtype=np.float32)])
+    return {'score': scores, 'band': score_bands(scores), 'intensity': heat_intensities(scores)}
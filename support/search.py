@@ -0,0 +1,190 @@
+import streamlit as st
+import numpy as np
+import pandas as pd
+import os
+import pickle
+import re
+import unicodedata
+from support.data_cleaner import is_inspected
+from support.dataset import load_latest_inspections
+from support.latest import LATEST_PATH
+from support.snapshot import SNAPSHOT_PATH
+
+SEARCH_INDEX_PATH = "data/search_index.pkl"
+# Characters kept by normalize, the space first; trigrams are numbered in base len(ALPHABET)
+ALPHABET = ' abcdefghijklmnopqrstuvwxyz0123456789'
+# Weight of an address, cuisine or borough match against a name match
+DETAIL_WEIGHT = 0.3
+# Bonus of names starting with the query, and of names equal to it, over any trigram similarity
+PREFIX_BONUS = 1.0
+EXACT_BONUS = 2.0
+# Lowest score a result needs
+MIN_SCORE = 0.15
+MAX_RESULTS = 10
+
+# Code of every byte in ALPHABET, anything else reads as a space
+CHAR_CODES = np.zeros(256, dtype=np.int64)
+CHAR_CODES[np.frombuffer(ALPHABET.encode(), dtype=np.uint8)] = np.arange(len(ALPHABET))
+
+
+def normalize(texts):
+    """
+    Lowercase ASCII of a Series of text, accents stripped and every run of other characters made a single space.
+    """
+    return (texts.fillna('').astype(str).str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii')
+            .str.lower().str.replace(r'[^a-z0-9]+', ' ', regex=True).str.strip())
+
+def normalize_query(text):
+    """
+    normalize for a single string, without the overhead of a Series on every keystroke.
+    """
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii').lower()
+    return re.sub(r'[^a-z0-9]+', ' ', text).strip()
+
+def trigrams(texts):
+    """
+    Trigram ids of a list of normalized texts, each padded with a space on both sides, as (text number, trigram id)
+    arrays. All texts are read as one byte buffer; windows crossing from one text into the next are dropped.
+    """
+    padded = [f" {text} " for text in texts]
+    codes = CHAR_CODES[np.frombuffer(''.join(padded).encode(), dtype=np.uint8)]
+    owner = np.repeat(np.arange(len(padded)), [len(text) for text in padded])
+    ids = codes[:-2] * len(ALPHABET) ** 2 + codes[1:-1] * len(ALPHABET) + codes[2:]
+    within = owner[:-2] == owner[2:]
+    return owner[:-2][within], ids[within]
+
+def posting_lists(owner, ids, documents):
+    """
+    Inverted index of (document, trigram id) pairs as CSR arrays over the trigrams that occur: the documents
+    holding keys[i] are postings[bounds[i]:bounds[i + 1]], sorted and each once. Also returns the distinct
+    trigram count per document.
+    """
+    pairs = np.unique(ids * documents + owner)
+    keys, counts = np.unique(pairs // documents, return_counts=True)
+    postings = (pairs % documents).astype(np.int32)
+    return keys.astype(np.int32), np.r_[0, np.cumsum(counts)].astype(np.int32), postings, np.bincount(postings, minlength=documents).astype(np.int32)
+
+
+class SearchIndex:
+    """
+    Fuzzy search over the name, address, cuisine and borough of every restaurant on the map.
+    Names and the other details each get a trigram inverted index (see posting_lists). A query is scored against
+    every restaurant at once from the posting lists of its trigrams. A name scores the mean of the share of query
+    trigrams it holds and its trigram similarity (shared / union), so closer names rank first; the longer details
+    only score DETAIL_WEIGHT times the share of query trigrams they hold. Names starting with or equal to the
+    query, found in the sorted names, get a bonus. The query is not padded at its end, so a partly typed word
+    matches as a prefix.
+    """
+    def __init__(self, records):
+        self.records = records.reset_index(drop=True)
+        names = normalize(self.records['dba'])
+        details = normalize(self.records['address'] + ' ' + self.records['cuisine'])
+        self.name_keys, self.name_bounds, self.name_postings, self.name_sizes = posting_lists(*trigrams(names.tolist()), len(names))
+        self.detail_keys, self.detail_bounds, self.detail_postings, self.detail_sizes = posting_lists(*trigrams(details.tolist()), len(details))
+        self.name_lengths = names.str.len().to_numpy()
+
+        # Names in sorted order for prefix lookups
+        self.name_order = np.argsort(names.to_numpy(dtype=str), kind='stable')
+        self.sorted_names = names.to_numpy(dtype=str)[self.name_order]
+
+    @classmethod
+    def from_latest(cls, latest):
+        """
+        Index over the inspected restaurants with a known, non-zero location, as on the map.
+        """
+        located = (latest['latitude'] != 0) & (latest['longitude'] != 0) & latest['latitude'].notna() & latest['longitude'].notna()
+        rows = latest.loc[located & is_inspected(latest['inspection date'])]
+        text = {col: rows[col].astype(str).where(rows[col].notna(), '') for col in ['dba', 'building', 'street', 'boro', 'cuisine description']}
+        zipcode = rows['zipcode'].astype('string').fillna('')
+        return cls(pd.DataFrame({
+            'camis': rows['camis'].to_numpy(dtype=np.int64),
+            'dba': text['dba'].to_numpy(),
+            'address': (text['building'] + ' ' + text['street'] + ', ' + text['boro'] + ' ' + zipcode).str.strip(' ,').to_numpy(),
+            'cuisine': text['cuisine description'].to_numpy(),
+            'latitude': rows['latitude'].to_numpy(dtype=float),
+            'longitude': rows['longitude'].to_numpy(dtype=float),
+        }))
+
+    def __len__(self):
+        return len(self.records)
+
+    @staticmethod
+    def shared(query_ids, keys, bounds, postings, documents):
+        # Number of the query trigrams each document holds
+        found = np.searchsorted(keys, query_ids)
+        found = found[(found < len(keys)) & (keys[np.minimum(found, len(keys) - 1)] == query_ids)]
+        return np.bincount(np.concatenate([postings[bounds[i]:bounds[i + 1]] for i in found] or [postings[:0]]), minlength=documents)
+
+    def matches(self, query, limit=MAX_RESULTS):
+        """
+        Positions of the best matching records for a query and their scores, best first.
+        """
+        query = normalize_query(query)
+        if not query:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        _, ids = trigrams([query])
+        query_ids = np.unique(ids[:-1])
+
+        scores = np.zeros(len(self))
+        if len(query_ids):
+            shared = self.shared(query_ids, self.name_keys, self.name_bounds, self.name_postings, len(self))
+            scores += (shared / len(query_ids) + shared / (len(query_ids) + self.name_sizes - shared)) / 2
+            scores += DETAIL_WEIGHT / len(query_ids) * self.shared(query_ids, self.detail_keys, self.detail_bounds, self.detail_postings, len(self))
+        start, end = np.searchsorted(self.sorted_names, [query, query + '\x7f'])
+        scores[self.name_order[start:end]] += PREFIX_BONUS
+        end = np.searchsorted(self.sorted_names, query, side='right')
+        scores[self.name_order[start:end]] += EXACT_BONUS
+
+        # Best candidates, then ordered by score and shorter names first
+        candidates = np.flatnonzero(scores >= MIN_SCORE)
+        if len(candidates) > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit)[:limit]]
+        candidates = candidates[np.lexsort((self.name_lengths[candidates], -scores[candidates]))]
+        return candidates, scores[candidates]
+
+    def search(self, query, limit=MAX_RESULTS):
+        """
+        Best matching restaurants for a query, best first, as a frame of the indexed records with their score.
+        """
+        positions, scores = self.matches(query, limit)
+        return self.records.iloc[positions].assign(score=scores.round(3))
+
+    def nbytes(self):
+        """
+        Size of the index arrays in bytes, without the records.
+        """
+        return sum(values.nbytes for values in vars(self).values() if isinstance(values, np.ndarray) and values.dtype != object)
+
+
+def write_search_index(index, index_path=SEARCH_INDEX_PATH):
+    """
+    Stores the search index next to the data snapshot.
+    """
+    os.makedirs(os.path.dirname(index_path) or '.', exist_ok=True)
+
+    # Write to a temporary file first so readers never see a half written index
+    tmp_path = f"{index_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, index_path)
+    return index_path
+
+def read_search_index(index_path=SEARCH_INDEX_PATH):
+    """
+    Reads the stored search index, or None if it has not been built yet.
+    """
+    if not os.path.exists(index_path):
+        return None
+    with open(index_path, 'rb') as f:
+        return pickle.load(f)
+
+@st.cache_resource
+def load_search_index(file_path="data/data.zip", snapshot_path=SNAPSHOT_PATH, latest_path=LATEST_PATH, index_path=SEARCH_INDEX_PATH):
+    """
+    Loads the search index once per process, from the file stored at ingest time (see build_data.py)
+    or built from the latest inspection table if it is missing.
+    """
+    index = read_search_index(index_path)
+    if index is None:
+        index = SearchIndex.from_latest(load_latest_inspections(file_path, snapshot_path, latest_path))
+    return index
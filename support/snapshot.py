@@ -0,0 +1,28 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import os
+
+SNAPSHOT_PATH = "data/data.parquet"
+
+
+def write_snapshot(data, snapshot_path=SNAPSHOT_PATH):
+    """
+    Writes the cleaned inspections frame as a typed Parquet snapshot.
+    Dtypes (nullable ints, dates) are kept in the file so loading needs no further casting.
+    """
+    os.makedirs(os.path.dirname(snapshot_path) or '.', exist_ok=True)
+    table = pa.Table.from_pandas(data, preserve_index=False)
+
+    # Write to a temporary file first so readers never see a half written snapshot
+    tmp_path = f"{snapshot_path}.tmp"
+    pq.write_table(table, tmp_path, compression='zstd')
+    os.replace(tmp_path, snapshot_path)
+    return snapshot_path
+
+def read_snapshot(snapshot_path=SNAPSHOT_PATH, columns=None):
+    """
+    Reads the Parquet snapshot with final dtypes already applied.
+    Pass columns to only read the columns a page needs.
+    """
+    return pd.read_parquet(snapshot_path, columns=columns)
@@ -0,0 +1,105 @@
+import time
+import os
+import pandas as pd
+from support.data_cleaner import format_map_data
+from support.derived import DerivedPaths, write_derived
+from support.fetcher import BASE_URL, fetch_pages
+from support.latest import build_latest_inspections, read_latest_inspections, refresh_latest_inspections
+from support.snapshot import SNAPSHOT_PATH, write_snapshot
+from support.trends import ScoreTrends, read_score_trends
+
+# An inspection is identified by restaurant + date; all of its violation rows are replaced together
+MERGE_KEYS = ['camis', 'inspection date']
+
+
+def fetch_delta(base_url=BASE_URL, watermark=None, watermark_field='record_date', page_size=1000, max_workers=8, accumulator=None):
+    """
+    Fetches the rows of the DOHMH feed where watermark_field is newer than watermark.
+    Pages are fetched concurrently (see support.fetcher.fetch_pages); pass an accumulator to resume a failed pull.
+    Returns the cleaned rows and the number of bytes downloaded.
+    """
+    where = f"{watermark_field} > '{watermark}'" if watermark is not None else None
+    delta, bytes_downloaded = fetch_pages(base_url, where, page_size, max_workers, accumulator)
+    if not delta.empty:
+        delta = format_map_data(delta)
+    return delta, bytes_downloaded
+
+def merge_delta(store, delta):
+    """
+    Replaces every inspection in store that also appears in delta and appends the new inspections.
+    """
+    # Align new rows with the stored schema
+    delta = delta.reindex(columns=store.columns).astype(store.dtypes.to_dict(), errors='ignore')
+
+    stale = pd.MultiIndex.from_frame(store[MERGE_KEYS]).isin(pd.MultiIndex.from_frame(delta[MERGE_KEYS]))
+    return pd.concat([store[~stale], delta], ignore_index=True)
+
+def sync_score_trends(trends, data, new_rows):
+    """
+    Appends the last new_rows rows of data (as merged by merge_delta) to the stored trends, or recomputes
+    them from data when there are none or the rows cannot be appended.
+    """
+    if trends is not None:
+        try:
+            trends.append(data.tail(new_rows))
+            return trends
+        except ValueError as e:
+            print(f"Could not append to the score trends: {e}. Recomputing them.")
+    return ScoreTrends.from_inspections(data)
+
+def sync_from_nyc_db(snapshot_path=SNAPSHOT_PATH, base_url=BASE_URL, page_size=1000, watermark=None, watermark_field='record_date', max_workers=8,
+                     paths=DerivedPaths()):
+    """
+    Incrementally syncs the local snapshot with the DOHMH feed.
+    Only rows with watermark_field newer than watermark are fetched. The watermark defaults to the newest
+    value already in the snapshot; without a snapshot the whole feed is pulled once.
+    The latest inspection table at paths.latest is refreshed from the new rows only, and everything else
+    derived from the snapshot rewritten from it (see support/derived.py).
+    The new inspections are appended to the score trends at paths.trends, which are only recomputed from
+    the full history when the new rows re-issue or back-date inspections.
+    Returns a dictionary of sync statistics.
+    """
+    store = pd.read_parquet(snapshot_path) if os.path.exists(snapshot_path) else None
+
+    # Default to the newest value already stored
+    store_field = watermark_field.replace('_', ' ')
+    if watermark is None and store is not None and store[store_field].notna().any():
+        watermark = f"{store[store_field].max().isoformat()}T00:00:00.000"
+
+    start = time.perf_counter()
+    delta, bytes_downloaded = fetch_delta(base_url, watermark, watermark_field, page_size, max_workers)
+    fetch_seconds = time.perf_counter() - start
+
+    # Merge new rows into the stored snapshot
+    start = time.perf_counter()
+    if store is None:
+        data = delta
+    elif delta.empty:
+        data = store
+    else:
+        data = merge_delta(store, delta)
+    merge_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if not delta.empty:
+        write_snapshot(data, snapshot_path)
+
+        # merge_delta appends the aligned new rows at the end
+        latest = read_latest_inspections(paths.latest)
+        if latest is None or store is None:
+            latest = build_latest_inspections(data)
+        else:
+            latest = refresh_latest_inspections(latest, data.tail(len(delta)))
+        trends = sync_score_trends(read_score_trends(paths.trends) if store is not None else None, data, len(delta))
+        write_derived(data, latest, paths, trends)
+    write_seconds = time.perf_counter() - start
+
+    stats = {'watermark': watermark,
+             'rows_fetched': len(delta),
+             'bytes_downloaded': bytes_downloaded,
+             'fetch_seconds': round(fetch_seconds, 3),
+             'merge_seconds': round(merge_seconds, 3),
+             'write_seconds': round(write_seconds, 3),
+             'rows_total': len(data)}
+    print(f"Synced {stats['rows_fetched']} rows ({stats['bytes_downloaded']} bytes) since {watermark}, merge took {stats['merge_seconds']}s")
+    return stats
@@ -0,0 +1,230 @@
+import numpy as np
+import pandas as pd
+import os
+import pickle
+from scipy.spatial import cKDTree
+from sklearn.neighbors import BallTree
+from support.data_cleaner import is_inspected
+
+SPATIAL_INDEX_PATH = "data/spatial_index.pkl"
+EARTH_RADIUS_M = 6371000.0
+# Radii (meters) of the area scores stored in the latest inspection table
+NEIGHBOURHOOD_RADII = (250, 500, 1000)
+
+
+def indexed_rows(latest):
+    """
+    Rows of the latest inspection table the spatial index covers: inspected restaurants with a known, non-zero location.
+    """
+    located = (latest['latitude'] != 0) & (latest['longitude'] != 0) & latest['latitude'].notna() & latest['longitude'].notna()
+    return latest.loc[located & is_inspected(latest['inspection date'])]
+
+
+class SpatialIndex:
+    """
+    Haversine BallTree over the latest inspection of every located restaurant.
+    Queries return the matching camis (nearest first for radius and k-NN queries) along with
+    score statistics; the *_batch variants take arrays of queries and return one row per query.
+    """
+    def __init__(self, camis, latitude, longitude, scores):
+        self.camis = np.asarray(camis, dtype=np.int64)
+        self.latitude = np.asarray(latitude, dtype=float)
+        self.longitude = np.asarray(longitude, dtype=float)
+        self.scores = np.asarray(scores, dtype=float)
+        self.tree = BallTree(np.radians(np.column_stack([self.latitude, self.longitude])), metric='haversine')
+        # Latitude order for bounding boxes
+        self.lat_order = np.argsort(self.latitude, kind='stable')
+        self.sorted_latitude = self.latitude[self.lat_order]
+
+    @classmethod
+    def from_latest(cls, latest):
+        """
+        Index over inspected restaurants with a known, non-zero location; missing scores count as 0
+        as on the Cluster page.
+        """
+        rows = indexed_rows(latest)
+        return cls(rows['camis'], rows['latitude'], rows['longitude'], rows['score'].astype(float).fillna(0))
+
+    def __len__(self):
+        return len(self.camis)
+
+    def indexes(self, latest):
+        """
+        Whether the index holds exactly the restaurants, locations and scores from_latest would index
+        in the latest inspection table, so a stored index can stand in for a rebuild.
+        """
+        rows = indexed_rows(latest)
+        return (len(rows) == len(self)
+                and np.array_equal(rows['camis'].to_numpy(dtype=np.int64), self.camis)
+                and np.array_equal(rows['latitude'].to_numpy(dtype=float), self.latitude)
+                and np.array_equal(rows['longitude'].to_numpy(dtype=float), self.longitude)
+                and np.array_equal(rows['score'].astype(float).fillna(0).to_numpy(), self.scores))
+
+    def _points(self, lat, lon):
+        return np.radians(np.column_stack([np.atleast_1d(lat), np.atleast_1d(lon)]).astype(float))
+
+    def _summary(self, indices, distances=None):
+        """
+        One row of camis and score statistics per query from ragged index arrays.
+        """
+        counts = np.fromiter((len(i) for i in indices), dtype=np.int64, count=len(indices))
+        flat = np.concatenate(indices) if len(indices) else np.empty(0, dtype=np.int64)
+        scores = self.scores[flat]
+        query = np.repeat(np.arange(len(indices)), counts)
+        nonempty = counts > 0
+        starts = np.r_[0, np.cumsum(counts)[:-1]][nonempty]
+
+        summary = pd.DataFrame({'count': counts})
+        summary['mean score'] = np.bincount(query, weights=scores, minlength=len(indices)) / np.where(nonempty, counts, np.nan)
+        summary['min score'] = np.nan
+        summary['max score'] = np.nan
+        if len(flat):
+            summary.loc[nonempty, 'min score'] = np.minimum.reduceat(scores, starts)
+            summary.loc[nonempty, 'max score'] = np.maximum.reduceat(scores, starts)
+        summary['camis'] = np.split(self.camis[flat], np.cumsum(counts)[:-1])
+        if distances is not None:
+            summary['distance m'] = [d * EARTH_RADIUS_M for d in distances]
+        return summary
+
+    def radius_batch(self, lat, lon, meters):
+        """
+        Restaurants within meters of each (lat, lon).
+        """
+        indices, distances = self.tree.query_radius(self._points(lat, lon), r=meters / EARTH_RADIUS_M,
+                                                    return_distance=True, sort_results=True)
+        return self._summary(list(indices), list(distances))
+
+    def nearest_batch(self, lat, lon, k=20):
+        """
+        The k restaurants nearest to each (lat, lon).
+        """
+        distances, indices = self.tree.query(self._points(lat, lon), k=min(k, len(self)))
+        return self._summary(list(indices), list(distances))
+
+    def bbox_batch(self, south, west, north, east):
+        """
+        Restaurants inside each bounding box, found from the latitude order and then filtered on longitude.
+        """
+        south, west, north, east = (np.atleast_1d(np.asarray(v, dtype=float)) for v in (south, west, north, east))
+        lower = np.searchsorted(self.sorted_latitude, south, side='left')
+        upper = np.searchsorted(self.sorted_latitude, north, side='right')
+        indices = []
+        for lo, hi, w, e in zip(lower, upper, west, east):
+            candidates = self.lat_order[lo:hi]
+            lon = self.longitude[candidates]
+            indices.append(candidates[(lon >= w) & (lon <= e)])
+        return self._summary(indices)
+
+    def _result(self, indices, distances=None):
+        """
+        Camis and score statistics of a single query, without the frame overhead of the batch path.
+        """
+        scores = self.scores[indices]
+        result = {'count': len(indices),
+                  'mean score': scores.mean() if len(indices) else np.nan,
+                  'min score': scores.min() if len(indices) else np.nan,
+                  'max score': scores.max() if len(indices) else np.nan,
+                  'camis': self.camis[indices]}
+        if distances is not None:
+            result['distance m'] = distances * EARTH_RADIUS_M
+        return result
+
+    def radius(self, lat, lon, meters):
+        """
+        Restaurants within meters of (lat, lon) as a dictionary of camis, distances and score statistics.
+        """
+        indices, distances = self.tree.query_radius(self._points(lat, lon), r=meters / EARTH_RADIUS_M,
+                                                    return_distance=True, sort_results=True)
+        return self._result(indices[0], distances[0])
+
+    def nearest(self, lat, lon, k=20):
+        """
+        The k nearest restaurants to (lat, lon); see radius.
+        """
+        distances, indices = self.tree.query(self._points(lat, lon), k=min(k, len(self)))
+        return self._result(indices[0], distances[0])
+
+    def bbox(self, south, west, north, east):
+        """
+        Restaurants inside a bounding box; see radius.
+        """
+        candidates = self.lat_order[np.searchsorted(self.sorted_latitude, south, side='left'):
+                                    np.searchsorted(self.sorted_latitude, north, side='right')]
+        lon = self.longitude[candidates]
+        return self._result(candidates[(lon >= west) & (lon <= east)])
+
+    def neighbourhood_scores(self, radii=NEIGHBOURHOOD_RADII, chunk_size=5000):
+        """
+        Distance weighted average of the neighbours' scores around every indexed restaurant, one column
+        per radius (see neighbourhood_columns). A neighbour at distance d counts with weight 1 - d / radius,
+        the restaurant itself is left out; restaurants without neighbours get NaN.
+        Neighbour pairs are found once at the largest radius, chunk_size restaurants at a time to bound memory.
+        """
+        radii = sorted(radii)
+        # Straight line (chord) distances between points on the unit sphere order pairs exactly like great
+        # circle distances, and a euclidean KD-tree finds them about twice as fast as the haversine ball tree
+        lat, lon = np.radians(self.latitude), np.radians(self.longitude)
+        points = np.column_stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)])
+        tree = cKDTree(points)
+        max_chord = 2 * np.sin(radii[-1] / EARTH_RADIUS_M / 2)
+
+        weighted_sums = np.zeros((len(radii), len(self)))
+        weight_sums = np.zeros((len(radii), len(self)))
+        for start in range(0, len(self), chunk_size):
+            chunk = points[start:start + chunk_size]
+            pairs = cKDTree(chunk).sparse_distance_matrix(tree, max_chord, output_type='ndarray')
+            others = pairs['j'] != pairs['i'] + start
+            query, neighbour = pairs['i'][others], pairs['j'][others]
+            distances = 2 * EARTH_RADIUS_M * np.arcsin(pairs['v'][others] / 2)
+            scores = self.scores[neighbour]
+            for k, radius in enumerate(radii):
+                near = distances <= radius
+                weights = 1 - distances[near] / radius
+                weighted_sums[k, start:start + len(chunk)] = np.bincount(query[near], weights=weights * scores[near], minlength=len(chunk))
+                weight_sums[k, start:start + len(chunk)] = np.bincount(query[near], weights=weights, minlength=len(chunk))
+
+        result = pd.DataFrame({'camis': self.camis})
+        for k, column in enumerate(neighbourhood_columns(radii)):
+            result[column] = (weighted_sums[k] / np.where(weight_sums[k] > 0, weight_sums[k], np.nan)).astype(np.float32)
+        return result
+
+def neighbourhood_columns(radii=NEIGHBOURHOOD_RADII):
+    """
+    Column names of the area scores, e.g. 'area score 500m'.
+    """
+    return [f"area score {radius}m" for radius in sorted(radii)]
+
+def add_neighbourhood_scores(latest, index=None, radii=NEIGHBOURHOOD_RADII):
+    """
+    Latest inspection table with its area score columns (re)computed over the spatial index,
+    which is built from the table if not given. Restaurants outside the index get NaN.
+    """
+    index = SpatialIndex.from_latest(latest) if index is None else index
+    scores = index.neighbourhood_scores(radii).set_index('camis')
+    latest = latest.drop(columns=neighbourhood_columns(radii), errors='ignore')
+    for column in scores.columns:
+        latest[column] = scores[column].reindex(latest['camis'].to_numpy()).to_numpy()
+    return latest
+
+
+def write_spatial_index(index, index_path=SPATIAL_INDEX_PATH):
+    """
+    Stores the spatial index next to the data snapshot.
+    """
+    os.makedirs(os.path.dirname(index_path) or '.', exist_ok=True)
+
+    # Write to a temporary file first so readers never see a half written index
+    tmp_path = f"{index_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, index_path)
+    return index_path
+
+def read_spatial_index(index_path=SPATIAL_INDEX_PATH):
+    """
+    Reads the stored spatial index, or None if it has not been built yet.
+    """
+    if not os.path.exists(index_path):
+        return None
+    with open(index_path, 'rb') as f:
+        return pickle.load(f)
@@ -0,0 +1,158 @@
+import streamlit as st
+import numpy as np
+import pandas as pd
+import json
+import os
+import time
+from support.cluster import cluster_features, dbscan_clustering, geospatial_preprocessing, km_to_rad
+from support.dbscan import DbscanGraph
+
+SWEEP_PATH = "data/dbscan_sweep.bin"
+# Parameter grid of the sweep; the Cluster page defaults (haversine 0.03 km, euclidean 0.5 km,
+# min_samples 5, score weight 0.1) are on it
+SWEEP_METRICS = ('euclidean', 'haversine')
+SWEEP_EPS_KM = (0.01, 0.02, 0.03, 0.05, 0.1, 0.25, 0.5, 1.0)
+SWEEP_MIN_SAMPLES = (3, 4, 5, 7, 10, 15)
+SWEEP_SCORE_WEIGHTS = (0.0, 0.05, 0.1, 0.2)
+
+
+def sweep_configs(metrics=SWEEP_METRICS, eps_km=SWEEP_EPS_KM, min_samples=SWEEP_MIN_SAMPLES, score_weights=SWEEP_SCORE_WEIGHTS):
+    """
+    (metric, eps in km, min_samples, score weight) of every fit in the sweep. Haversine fits only use
+    the coordinates, so they run once per eps and min_samples with a score weight of None.
+    """
+    return [(metric, float(eps), int(samples), None if metric == 'haversine' else float(weight))
+            for metric in metrics
+            for weight in (score_weights if metric == 'euclidean' else [None])
+            for eps in eps_km
+            for samples in min_samples]
+
+def sweep_key(metric, eps_km, min_samples, score_weight):
+    return (metric, float(eps_km), int(min_samples), None if metric == 'haversine' else float(score_weight))
+
+def sweep_fingerprint(df):
+    """
+    Hash of the rows and values the sweep was fit on, so a stale sweep is never used.
+    """
+    return str(int(pd.util.hash_pandas_object(df[['camis', 'latitude', 'longitude', 'score']], index=False).sum()))
+
+def sweep_metadata_path(path=SWEEP_PATH):
+    return f"{os.path.splitext(path)[0]}.json"
+
+def run_dbscan_sweep(df, configs):
+    """
+    Fits every config on the valid inspection rows df (see support/cluster.py).
+    Configs sharing a metric and score weight are derived from one neighbourhood graph built at their
+    largest eps (see support/dbscan.py), so distances are computed once per feature set.
+    Returns the labels as an int32 array (configs x restaurants) and the cluster sizes of each config,
+    indexed on label + 1 so noise comes first.
+    """
+    max_eps_km = {}
+    for metric, eps_km, _, score_weight in configs:
+        max_eps_km[metric, score_weight] = max(eps_km, max_eps_km.get((metric, score_weight), 0))
+
+    graph, graph_key = None, None
+    labels = np.empty((len(configs), len(df)), dtype=np.int32)
+    sizes = []
+    for i, (metric, eps_km, min_samples, score_weight) in enumerate(configs):
+        # Only one graph is held at a time, configs come grouped by feature set
+        if (metric, score_weight) != graph_key:
+            graph, graph_key = None, (metric, score_weight)
+            graph = DbscanGraph(cluster_features(df, score_weight or 0), km_to_rad(max_eps_km[graph_key]), metric)
+        labels[i] = graph.labels(km_to_rad(eps_km), min_samples)
+        sizes.append(np.bincount(labels[i] + 1).astype(np.int32))
+    return labels, sizes
+
+def write_dbscan_sweep(df, path=SWEEP_PATH, configs=None):
+    """
+    Runs the sweep and stores it as one int32 file the page memory maps: the labels of every config
+    followed by their cluster sizes. The configs, size offsets and a fingerprint of df go in a JSON file next to it.
+    Returns the number of configs, the build time and the bytes on disk.
+    """
+    configs = sweep_configs() if configs is None else configs
+    start = time.perf_counter()
+    labels, sizes = run_dbscan_sweep(df, configs)
+    build_seconds = time.perf_counter() - start
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    metadata = {'restaurants': len(df), 'fingerprint': sweep_fingerprint(df), 'configs': [list(c) for c in configs],
+                'size_bounds': np.r_[0, np.cumsum([len(s) for s in sizes])].tolist()}
+
+    # Write to temporary files first so readers never see a half written sweep
+    with open(f"{path}.tmp", 'wb') as f:
+        labels.tofile(f)
+        np.concatenate(sizes).tofile(f)
+    with open(f"{sweep_metadata_path(path)}.tmp", 'w') as f:
+        json.dump(metadata, f, separators=(',', ':'))
+    os.replace(f"{path}.tmp", path)
+    os.replace(f"{sweep_metadata_path(path)}.tmp", sweep_metadata_path(path))
+
+    return {'configs': len(configs), 'restaurants': len(df), 'build_seconds': round(build_seconds, 3),
+            'bytes': os.path.getsize(path) + os.path.getsize(sweep_metadata_path(path))}
+
+
+class DbscanSweep:
+    """
+    Stored DBSCAN sweep (see write_dbscan_sweep), memory mapped so a lookup only reads the config it returns.
+    """
+    def __init__(self, path=SWEEP_PATH):
+        with open(sweep_metadata_path(path)) as f:
+            metadata = json.load(f)
+        self.fingerprint = metadata['fingerprint']
+        self.rows = {sweep_key(*config): i for i, config in enumerate(metadata['configs'])}
+        self.size_bounds = np.asarray(metadata['size_bounds'], dtype=np.int64)
+        self.labels = np.memmap(path, dtype=np.int32, mode='r', shape=(len(metadata['configs']), metadata['restaurants']))
+        self.sizes = np.memmap(path, dtype=np.int32, mode='r', offset=self.labels.nbytes, shape=(int(self.size_bounds[-1]),))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def matches(self, df):
+        """
+        Whether the sweep was fit on exactly these rows.
+        """
+        return len(df) == self.labels.shape[1] and sweep_fingerprint(df) == self.fingerprint
+
+    def lookup(self, metric, eps_km, min_samples, score_weight):
+        """
+        Labels and cluster sizes (a series on label, as dbscan_clustering returns them) of one config,
+        or None if it is not on the grid.
+        """
+        row = self.rows.get(sweep_key(metric, eps_km, min_samples, score_weight))
+        if row is None:
+            return None
+        sizes = pd.Series(self.sizes[self.size_bounds[row]:self.size_bounds[row + 1]], dtype=np.int64)
+        sizes.index = sizes.index - 1
+        return np.asarray(self.labels[row]), sizes[sizes > 0]
+
+
+def read_dbscan_sweep(path=SWEEP_PATH):
+    """
+    Opens the stored sweep, or None if it has not been built yet.
+    """
+    if not (os.path.exists(path) and os.path.exists(sweep_metadata_path(path))):
+        return None
+    return DbscanSweep(path)
+
+@st.cache_resource
+def load_dbscan_sweep(path=SWEEP_PATH):
+    """
+    Opens the stored sweep once per process (see build_data.py --dbscan-sweep).
+    """
+    return read_dbscan_sweep(path)
+
+def sweep_clustering(df, metric, eps_km, min_samples, score_weight, sweep=None, clusters=None):
+    """
+    Labels and cluster sizes of one config, from the sweep when it holds it for these rows, then from the
+    incremental labels kept up to date by syncs since (see support/incremental.py), otherwise from a fit of
+    that config alone. A neighbourhood graph at the largest eps (see support/dbscan.py) only
+    pays off over the many configs of the sweep: built for a single fit it costs several times the fit and
+    holds every neighbour pair in memory.
+    """
+    result = sweep.lookup(metric, eps_km, min_samples, score_weight) if sweep is not None and sweep.matches(df) else None
+    if result is None and clusters is not None:
+        result = clusters.lookup(df, metric, eps_km, min_samples, score_weight)
+    if result is None:
+        data, eps = geospatial_preprocessing(df, score_weight or 0, eps_km)
+        result = dbscan_clustering(data, eps, min_samples, metric)
+    return result
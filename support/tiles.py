@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import json
+from support.scores import SCORE_MODES, score_bands, score_modes
+
+# Web mercator tiles, as Leaflet requests them
+TILE_SIZE = 256
+# Zoom levels tiles are built for; the map uses the nearest one outside this range
+MIN_ZOOM = 10
+MAX_ZOOM = 17
+# Grid cells in pixels: restaurants sharing a cluster cell are drawn as one cluster, heat points are summed per heat cell
+CLUSTER_CELL = 64
+HEAT_CELL = 4
+# Layout of the tile records built below, recorded in the map asset manifest (see support/assets.py) so tiles
+# written in an older layout are rebuilt rather than drawn; bump it whenever a record gains or changes a field
+TILE_FORMAT = 2
+
+
+def project(lat, lon, zoom):
+    """
+    Global pixel coordinates of lat/lon at a zoom level (spherical mercator).
+    """
+    scale = TILE_SIZE * 2 ** zoom
+    x = (np.asarray(lon, dtype=float) + 180) / 360 * scale
+    sin_lat = np.sin(np.radians(np.asarray(lat, dtype=float)))
+    y = (0.5 - np.log((1 + sin_lat) / (1 - sin_lat)) / (4 * np.pi)) * scale
+    return x, y
+
+def restaurant_frame(payload):
+    """
+    Restaurants of the marker payload (see support/markers.py) as a frame.
+    """
+    return pd.DataFrame([r[:6] for r in payload['restaurants']],
+                        columns=['camis', 'latitude', 'longitude', 'name', 'average score', 'latest score'])
+
+def group_by_tile(tile_x, tile_y, records):
+    """
+    Splits records into one list per (x, y) tile.
+    """
+    if len(records) == 0:
+        return {}
+    order = np.lexsort((tile_y, tile_x))
+    tile_x, tile_y = tile_x[order], tile_y[order]
+    starts = np.flatnonzero(np.r_[True, (tile_x[1:] != tile_x[:-1]) | (tile_y[1:] != tile_y[:-1])])
+    records = [records[i] for i in order]
+    bounds = np.r_[starts, len(order)]
+    return {(int(tile_x[a]), int(tile_y[a])): records[a:b] for a, b in zip(bounds[:-1], bounds[1:])}
+
+def cell_records(frame, x, y, cell, columns, how, banded=False):
+    """
+    Aggregates the frame on a pixel grid, returning the tile of each cell and one record per cell:
+    [mean latitude, mean longitude, count, *columns aggregated with how], followed by the color band
+    of each aggregated column when banded.
+    """
+    cell_x, cell_y = (x // cell).astype(np.int64), (y // cell).astype(np.int64)
+    cells = frame.groupby([cell_x, cell_y], sort=False).agg(
+        latitude=('latitude', 'mean'), longitude=('longitude', 'mean'), count=('camis', 'size'),
+        **{col: (col, how) for col in columns})
+    # Rounded and banded a column at a time, then zipped into records of Python numbers
+    values = [cells['latitude'].round(6), cells['longitude'].round(6), cells['count'], *(cells[col].round(3) for col in columns)]
+    bands = [score_bands(cells[col].to_numpy()) for col in columns] if banded else []
+    records = [list(record) for record in zip(*(column.tolist() for column in [*values, *bands]))]
+    cell_x, cell_y = cells.index.get_level_values(0).to_numpy(), cells.index.get_level_values(1).to_numpy()
+    return cell_x * cell // TILE_SIZE, cell_y * cell // TILE_SIZE, records
+
+def build_tiles(restaurants, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM):
+    """
+    Precomputes the map layers for every tile holding a restaurant, from min_zoom to max_zoom:
+    {
+        (z, x, y): {
+            'clusters': [[lat, lon, count, mean average score, mean latest score, average band, latest band], ...],
+            'markers': [[camis, lat, lon, average score, latest score, average band, latest band], ...],
+            'heat': [[lat, lon, count, average intensity, latest intensity], ...]
+        }
+    }
+    Clusters are restaurants sharing a CLUSTER_CELL grid cell, which is aligned to tiles so a cluster never
+    spans two of them; at max_zoom every restaurant is a marker. Color bands and heat intensities of both
+    score modes come from one pass over the restaurants (see support/scores.py), so the map switches modes
+    without recomputing them. Intensities are summed per HEAT_CELL, as leaflet.heat would sum the individual points.
+    """
+    frame = restaurants[['camis', 'latitude', 'longitude', 'average score', 'latest score']].copy()
+    modes = score_modes(frame['average score'], frame['latest score'])
+    for row, mode in enumerate(SCORE_MODES):
+        frame[f"{mode} intensity"] = modes['intensity'][row].astype(float)
+    markers = [list(record) for record in zip(*(frame[col].tolist() for col in ['camis', 'latitude', 'longitude', 'average score', 'latest score']),
+                                              *(bands.tolist() for bands in modes['band']))]
+
+    tiles = {}
+    for zoom in range(min_zoom, max_zoom + 1):
+        x, y = project(frame['latitude'], frame['longitude'], zoom)
+        layers = {}
+        # Restaurants alone in their cell (or all of them at max_zoom) are markers, the rest clusters
+        if zoom < max_zoom:
+            cell_size = frame.groupby([(x // CLUSTER_CELL).astype(np.int64), (y // CLUSTER_CELL).astype(np.int64)])['camis'].transform('size').to_numpy()
+            clustered = cell_size > 1
+        else:
+            clustered = np.zeros(len(frame), dtype=bool)
+        if clustered.any():
+            layers['clusters'] = group_by_tile(*cell_records(frame[clustered], x[clustered], y[clustered], CLUSTER_CELL,
+                                                             ['average score', 'latest score'], 'mean', banded=True))
+        single = np.flatnonzero(~clustered)
+        layers['markers'] = group_by_tile((x[single] // TILE_SIZE).astype(np.int64), (y[single] // TILE_SIZE).astype(np.int64),
+                                          [markers[i] for i in single])
+        layers['heat'] = group_by_tile(*cell_records(frame, x, y, HEAT_CELL, ['average intensity', 'latest intensity'], 'sum'))
+
+        for layer, by_tile in layers.items():
+            for (tile_x, tile_y), records in by_tile.items():
+                tile = tiles.setdefault((zoom, tile_x, tile_y), {'clusters': [], 'markers': [], 'heat': []})
+                tile[layer] = records
+    return tiles
+
+def tile_files(tiles):
+    """
+    Tiles encoded as static files, {"{z}/{x}/{y}.json": JSON bytes}. Tiles without restaurants have no file,
+    the map reads a missing tile as an empty one.
+    """
+    return {f"{zoom}/{x}/{y}.json": json.dumps(tile, separators=(',', ':')).encode('utf-8')
+            for (zoom, x, y), tile in tiles.items()}
@@ -0,0 +1,312 @@
+import streamlit as st
+import numpy as np
+import pandas as pd
+import os
+from support.data_cleaner import is_inspected
+from support.dataset import load_dataset
+from support.snapshot import SNAPSHOT_PATH
+
+TRENDS_PATH = "data/trends.npz"
+# Levels the trends are kept at and the inspection column keying each; the city has a single key
+TREND_LEVELS = {'city': None, 'borough': 'boro', 'zipcode': 'zipcode', 'restaurant': 'camis'}
+GRADES = ('A', 'B', 'C')
+# Grade transition codes (previous grade * 3 + grade) that improved or declined the grade
+IMPROVED = [3, 6, 7]
+DECLINED = [1, 2, 5]
+# Trailing window of the rolling trends, in months
+ROLLING_MONTHS = 12
+# Cells are keyed code << MONTH_BITS | month (months since 1970), so they sort by key then month
+MONTH_BITS = 32
+MONTH_MASK = (1 << MONTH_BITS) - 1
+
+
+def inspection_table(data):
+    """
+    One entry per inspection (restaurant + date) of the inspections frame, sorted by camis then date, as arrays:
+    camis, date, month (months since 1970), borough, zip code, score (NaN when unscored) and grade code
+    (index into GRADES, -1 when ungraded). Each inspection takes the values of its first row.
+    """
+    rows = data.loc[is_inspected(data['inspection date']) & data['camis'].notna(),
+                    ['camis', 'boro', 'zipcode', 'inspection date', 'score', 'grade']]
+    camis = rows['camis'].to_numpy(dtype=np.int64)
+    dates = pd.to_datetime(rows['inspection date']).to_numpy().astype('datetime64[D]')
+
+    # lexsort is stable, so the first row of an inspection stays first
+    order = np.lexsort((dates, camis))
+    camis, dates = camis[order], dates[order]
+    first = np.flatnonzero(np.r_[True, (camis[1:] != camis[:-1]) | (dates[1:] != dates[:-1])])
+    order = order[first]
+    return {
+        'camis': camis[first],
+        'date': dates[first],
+        'month': dates[first].astype('datetime64[M]').astype(np.int64),
+        'boro': rows['boro'].to_numpy(dtype=object)[order],
+        'zipcode': pd.to_numeric(rows['zipcode']).to_numpy(dtype=float, na_value=np.nan)[order],
+        'score': pd.to_numeric(rows['score']).to_numpy(dtype=float, na_value=np.nan)[order],
+        'grade': pd.Categorical(rows['grade'].to_numpy(dtype=object)[order], categories=GRADES).codes,
+    }
+
+def grade_transitions(camis, grades, previous=None):
+    """
+    Code of the grade transition (previous grade * 3 + grade) at every graded inspection of a table sorted
+    by camis then date, -1 where the restaurant has no earlier graded inspection. previous gives the grade
+    each row's restaurant had before the table starts (-1 for none).
+    """
+    graded = np.flatnonzero(grades >= 0)
+    prior = np.full(len(graded), -1, dtype=np.int64) if previous is None else previous[graded].astype(np.int64)
+    same = camis[graded[1:]] == camis[graded[:-1]]
+    prior[1:][same] = grades[graded[:-1]][same]
+
+    transitions = np.full(len(camis), -1, dtype=np.int64)
+    transitions[graded] = np.where(prior >= 0, prior * 3 + grades[graded], -1)
+    return transitions
+
+def month_cells(codes, months, scores, transitions):
+    """
+    Sums the inspections of one level by (key code, month) cell: the sorted cell ids, the score sums and
+    counts of scored inspections, and the count of each grade transition code.
+    Inspections without a key (code -1) are left out.
+    """
+    keep = codes >= 0
+    cells, inverse = np.unique((codes[keep].astype(np.int64) << MONTH_BITS) | months[keep], return_inverse=True)
+    scores, transitions = scores[keep], transitions[keep]
+    scored = ~np.isnan(scores)
+    moved = transitions >= 0
+    return {
+        'cells': cells,
+        'sums': np.bincount(inverse[scored], weights=scores[scored], minlength=len(cells)).astype(np.int64),
+        'counts': np.bincount(inverse[scored], minlength=len(cells)).astype(np.int32),
+        'transitions': np.bincount(inverse[moved] * 9 + transitions[moved], minlength=len(cells) * 9).reshape(-1, 9).astype(np.int32),
+    }
+
+def rolling_sum(values, window):
+    """
+    Sums over the trailing window along the last axis.
+    """
+    totals = np.cumsum(values, axis=-1)
+    totals[..., window:] = totals[..., window:] - totals[..., :-window]
+    return totals
+
+def ratio(numerator, denominator):
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+
+class ScoreTrends:
+    """
+    Monthly inspection score trends of the whole history at every level of TREND_LEVELS, in flat arrays.
+    Each level keeps its keys and, per (key, month) cell holding inspections, the score sum, the number of
+    scored inspections and the count of each grade transition between a restaurant's consecutive graded
+    inspections; cells are sorted on code << MONTH_BITS | month. The last inspection date and graded grade
+    of every restaurant (aligned with the restaurant keys) let newer inspections be appended.
+    Rolling means and rates are derived from the cells on request.
+    """
+    def __init__(self, arrays):
+        self.arrays = arrays
+
+    @classmethod
+    def from_inspections(cls, data):
+        """
+        Trends over the full history of the inspections frame.
+        """
+        table = inspection_table(data)
+        transitions = grade_transitions(table['camis'], table['grade'])
+        arrays = {}
+        for level, column in TREND_LEVELS.items():
+            if column is None:
+                keys, codes = np.zeros(1, dtype=np.int64), np.zeros(len(table['camis']), dtype=np.int64)
+            else:
+                codes, keys = pd.factorize(table[column], sort=True)
+                keys = np.asarray(keys, dtype=str if column == 'boro' else np.int64)
+            arrays[f"{level}_keys"] = keys
+            arrays.update({f"{level}_{name}": values for name, values in month_cells(codes, table['month'], table['score'], transitions).items()})
+
+        restaurants = len(arrays['restaurant_keys'])
+        arrays['last_date'] = np.full(restaurants, np.datetime64('NaT'), dtype='datetime64[D]')
+        arrays['last_grade'] = np.full(restaurants, -1, dtype=np.int8)
+        trends = cls(arrays)
+        trends.update_restaurants(pd.Index(arrays['restaurant_keys']).get_indexer(table['camis']), table)
+        return trends
+
+    def update_restaurants(self, codes, table):
+        """
+        Records the last inspection date and graded grade of the restaurants in a table sorted by camis then date.
+        """
+        if not len(codes):
+            return
+        last = np.flatnonzero(np.r_[codes[1:] != codes[:-1], True])
+        self.arrays['last_date'][codes[last]] = table['date'][last]
+        graded = np.flatnonzero(table['grade'] >= 0)
+        if not len(graded):
+            return
+        last = graded[np.r_[codes[graded[1:]] != codes[graded[:-1]], True]]
+        self.arrays['last_grade'][codes[last]] = table['grade'][last]
+
+    def key_codes(self, level, values):
+        """
+        Codes of values among the keys of a level, adding the keys not seen yet. Missing values get -1.
+        """
+        keys = self.arrays[f"{level}_keys"]
+        codes = pd.Index(keys).get_indexer(values)
+        new = pd.unique(values[(codes == -1) & pd.notna(values)])
+        if len(new):
+            keys = np.concatenate([keys, np.asarray(new, dtype=keys.dtype if keys.dtype.kind != 'U' else str)])
+            self.arrays[f"{level}_keys"] = keys
+            codes = pd.Index(keys).get_indexer(values)
+        return codes
+
+    def append(self, data):
+        """
+        Adds newly arrived inspection rows without touching the stored history, e.g. the rows of the last month.
+        Every new inspection has to be later than the last stored inspection of its restaurant; raises a
+        ValueError otherwise (re-issued or back-dated inspections), in which case rebuild with from_inspections.
+        Returns the number of inspections appended.
+        """
+        table = inspection_table(data)
+        if not len(table['camis']):
+            return 0
+        restaurants = len(self.arrays['restaurant_keys'])
+        codes = self.key_codes('restaurant', table['camis'])
+        known = codes < restaurants
+        if (table['date'][known] <= self.arrays['last_date'][codes[known]]).any():
+            raise ValueError("New rows include inspections on or before the last stored inspection of their restaurant")
+
+        added = len(self.arrays['restaurant_keys']) - restaurants
+        self.arrays['last_date'] = np.r_[self.arrays['last_date'], np.full(added, np.datetime64('NaT'), dtype='datetime64[D]')]
+        self.arrays['last_grade'] = np.r_[self.arrays['last_grade'], np.full(added, -1, dtype=np.int8)]
+        transitions = grade_transitions(table['camis'], table['grade'], self.arrays['last_grade'][codes])
+
+        for level, column in TREND_LEVELS.items():
+            if column is None:
+                level_codes = np.zeros(len(codes), dtype=np.int64)
+            elif level == 'restaurant':
+                level_codes = codes
+            else:
+                level_codes = self.key_codes(level, table[column])
+            self.merge_cells(level, month_cells(level_codes, table['month'], table['score'], transitions))
+        self.update_restaurants(codes, table)
+        return len(codes)
+
+    def merge_cells(self, level, new):
+        """
+        Adds the cells of new inspections into a level: existing cells are summed in place, the rest inserted in order.
+        """
+        cells = self.arrays[f"{level}_cells"]
+        positions = np.searchsorted(cells, new['cells'])
+        found = positions < len(cells)
+        found[found] = cells[positions[found]] == new['cells'][found]
+        for name, values in new.items():
+            stored = self.arrays[f"{level}_{name}"]
+            if name != 'cells':
+                stored[positions[found]] += values[found]
+            self.arrays[f"{level}_{name}"] = np.insert(stored, positions[~found], values[~found], axis=0)
+
+    def months(self):
+        """
+        First month (months since 1970) and number of months covered.
+        """
+        months = self.arrays['city_cells'] & MONTH_MASK
+        return (int(months[0]), int(months[-1] - months[0]) + 1) if len(months) else (0, 0)
+
+    def month_index(self):
+        first, count = self.months()
+        return pd.DatetimeIndex(np.arange(first, first + count).astype('datetime64[M]').astype('datetime64[ns]'), name='month')
+
+    def keys(self, level):
+        """
+        Sorted keys of a level.
+        """
+        return np.sort(self.arrays[f"{level}_keys"]).tolist()
+
+    def dense(self, level, codes=None):
+        """
+        Score sums, scored inspection counts and grade transition counts of the given key codes (every key
+        if None) as (keys x months) arrays, the transitions with a last axis of 9 codes.
+        """
+        cells = self.arrays[f"{level}_cells"]
+        if codes is None:
+            codes = np.arange(len(self.arrays[f"{level}_keys"]))
+            index, rows = np.arange(len(cells)), cells >> MONTH_BITS
+        else:
+            codes = np.asarray(codes, dtype=np.int64)
+            start = np.searchsorted(cells, codes << MONTH_BITS)
+            lengths = np.searchsorted(cells, (codes + 1) << MONTH_BITS) - start
+            index = np.arange(lengths.sum()) + np.repeat(start - np.r_[0, np.cumsum(lengths)[:-1]], lengths)
+            rows = np.repeat(np.arange(len(codes)), lengths)
+        first, count = self.months()
+        columns = (cells[index] & MONTH_MASK) - first
+
+        sums, counts = np.zeros((len(codes), count)), np.zeros((len(codes), count))
+        transitions = np.zeros((len(codes), count, 9))
+        sums[rows, columns] = self.arrays[f"{level}_sums"][index]
+        counts[rows, columns] = self.arrays[f"{level}_counts"][index]
+        transitions[rows, columns] = self.arrays[f"{level}_transitions"][index]
+        return sums, counts, transitions
+
+    def trend(self, level, key=None, window=ROLLING_MONTHS):
+        """
+        Monthly trend of one key of a level (a borough, zip code or camis; none for the city) as a frame
+        indexed by month: scored inspections, average score, average score over the trailing window of months
+        and the share of grade transitions over that window that improved or declined the grade.
+        Returns None for an unknown key.
+        """
+        code = 0 if level == 'city' else pd.Index(self.arrays[f"{level}_keys"]).get_indexer([key])[0]
+        if code == -1:
+            return None
+        sums, counts, transitions = (values[0] for values in self.dense(level, [code]))
+        moves = rolling_sum(transitions.T, window)
+        rolling_moves = moves.sum(axis=0)
+        return pd.DataFrame({
+            'inspections': counts.astype(np.int64),
+            'average score': ratio(sums, counts),
+            'rolling average score': ratio(rolling_sum(sums, window), rolling_sum(counts, window)),
+            'improved': ratio(moves[IMPROVED].sum(axis=0), rolling_moves),
+            'declined': ratio(moves[DECLINED].sum(axis=0), rolling_moves),
+        }, index=self.month_index())
+
+    def rolling_scores(self, level, keys=None, window=ROLLING_MONTHS):
+        """
+        Average score over the trailing window of months of several keys of a level (every key if None),
+        one column per key, indexed by month.
+        """
+        level_keys = self.arrays[f"{level}_keys"]
+        codes = np.argsort(level_keys, kind='stable') if keys is None else pd.Index(level_keys).get_indexer(keys)
+        codes = codes[codes >= 0]
+        sums, counts, _ = self.dense(level, codes)
+        return pd.DataFrame(ratio(rolling_sum(sums, window), rolling_sum(counts, window)).T,
+                            index=self.month_index(), columns=level_keys[codes].tolist())
+
+
+def write_score_trends(trends, trends_path=TRENDS_PATH):
+    """
+    Stores the trend arrays next to the data snapshot as one compressed .npz file; most transition
+    counts are zero, so it is about a tenth of the arrays' size and reads back in milliseconds.
+    """
+    os.makedirs(os.path.dirname(trends_path) or '.', exist_ok=True)
+
+    # Write to a temporary file first so readers never see half written trends
+    tmp_path = f"{trends_path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.savez_compressed(f, **trends.arrays)
+    os.replace(tmp_path, trends_path)
+    return trends_path
+
+def read_score_trends(trends_path=TRENDS_PATH):
+    """
+    Reads the stored trends, or None if they have not been built yet.
+    """
+    if not os.path.exists(trends_path):
+        return None
+    with np.load(trends_path) as arrays:
+        return ScoreTrends({name: arrays[name] for name in arrays.files})
+
+@st.cache_resource
+def load_score_trends(file_path="data/data.zip", snapshot_path=SNAPSHOT_PATH, trends_path=TRENDS_PATH):
+    """
+    Loads the score trends once per process, from the file stored at ingest time (see build_data.py)
+    or built from the shared dataset if it is missing.
+    """
+    trends = read_score_trends(trends_path)
+    if trends is None:
+        trends = ScoreTrends.from_inspections(load_dataset(file_path, snapshot_path))
+    return trends